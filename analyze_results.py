@@ -1,65 +1,378 @@
-import json
-import pandas as pd
-import matplotlib.pyplot as plt
-
-# Load results
-with open('output/results.json', 'r') as f:
-    results = json.load(f)
-
-# Extract statistics
-frames = []
-for frame in results:
-    frame_idx = frame.get('frame')
-    time = frame.get('time')
-    players = frame.get('players', [])
-    ball = frame.get('ball', {})
-    tactical = frame.get('tactical', {})
-    player_count = len(players)
-    ball_x = ball.get('bbox', [None, None, None, None])[0]
-    ball_y = ball.get('bbox', [None, None, None, None])[1]
-    space_control = tactical.get('space_control', [])
-    passing_options = tactical.get('passing_options', [])
-    frames.append({
-        'frame': frame_idx,
-        'time': time,
-        'player_count': player_count,
-        'ball_x': ball_x,
-        'ball_y': ball_y,
-        'space_control': space_control,
-        'passing_options': len(passing_options)
-    })
-
-df = pd.DataFrame(frames)
-
-# Save to CSV and Excel
-csv_path = 'output/results_summary.csv'
-excel_path = 'output/results_summary.xlsx'
-df.to_csv(csv_path, index=False)
-df.to_excel(excel_path, index=False)
-
-# Plot player count per frame
-df.plot(x='frame', y='player_count', kind='line', title='Player Count per Frame')
-plt.xlabel('Frame')
-plt.ylabel('Number of Players')
-plt.tight_layout()
-plt.savefig('output/player_count_per_frame.png')
-plt.close()
-
-# Plot ball trajectory
-plt.plot(df['ball_x'], df['ball_y'], marker='o')
-plt.title('Ball Trajectory')
-plt.xlabel('Ball X')
-plt.ylabel('Ball Y')
-plt.tight_layout()
-plt.savefig('output/ball_trajectory.png')
-plt.close()
-
-# Plot tactical metrics: number of passing options per frame
-df.plot(x='frame', y='passing_options', kind='line', title='Passing Options per Frame')
-plt.xlabel('Frame')
-plt.ylabel('Number of Passing Options')
-plt.tight_layout()
-plt.savefig('output/passing_options_per_frame.png')
-plt.close()
-
-print('Summary CSV, Excel, and plots saved in output/.')
+import argparse
+import glob
+import json
+import math
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import yaml
+
+from keypoints import as_array, pose_metrics
+
+BALL_COLUMNS = ['ball_x1', 'ball_y1', 'ball_x2', 'ball_y2']
+FRAME_COLUMNS = ['frame', 'time', 'player_count'] + BALL_COLUMNS + [
+    'ball_confidence', 'ball_pitch_x', 'ball_pitch_y']
+PLAYER_COLUMNS = ['frame', 'time', 'track_id', 'team', 'x1', 'y1', 'x2', 'y2',
+                  'pitch_x', 'pitch_y']
+
+# How per-chunk track aggregates combine into the running totals
+TRACK_AGGREGATES = {
+    'frames': 'sum', 'first_time': 'min', 'last_time': 'max',
+    'distance': 'sum', 'moving_time': 'sum', 'max_speed': 'max',
+    'space_control_sum': 'sum', 'space_control_frames': 'sum',
+    'passing_options': 'sum', 'pose_frames': 'sum', 'body_lean_sum': 'sum',
+    'hip_torque_sum': 'sum'}
+
+def read_chunks(path, chunk_size=1000, keypoints=False):
+    # Yields (frames, players) DataFrames from any results format: a parquet
+    # directory one part at a time, JSON Lines chunk_size frames at a time,
+    # or the legacy JSON array (which has to be loaded whole). With
+    # keypoints, players gets a 'keypoints' column of (33, 4) arrays (None
+    # without a pose).
+    if os.path.isdir(path):
+        yield from _parquet_chunks(path, keypoints)
+        return
+    with open(path) as f:
+        first = f.read(64).lstrip()[:1]
+    if first == '[':
+        with open(path) as f:
+            results = json.load(f)
+        for start in range(0, len(results), chunk_size):
+            yield _to_tables(results[start:start + chunk_size], keypoints)
+        return
+    batch = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                batch.append(json.loads(line))
+            if len(batch) >= chunk_size:
+                yield _to_tables(batch, keypoints)
+                batch = []
+    if batch:
+        yield _to_tables(batch, keypoints)
+
+def _parquet_chunks(path, keypoints=False):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Reading parquet results requires pyarrow")
+    for part in sorted(glob.glob(os.path.join(path, 'frames', 'part-*.parquet'))):
+        frames = pq.read_table(part, columns=FRAME_COLUMNS + ['tactical']).to_pandas()
+        players_part = os.path.join(path, 'players', os.path.basename(part))
+        if os.path.exists(players_part):
+            # Keypoints are by far the widest column; only read on request
+            players = pq.read_table(players_part, columns=PLAYER_COLUMNS + (
+                ['keypoints'] if keypoints else [])).to_pandas()
+            if keypoints:
+                players['keypoints'] = [None if kp is None else np.asarray(
+                    kp, dtype=np.float32).reshape(-1, 4) for kp in players['keypoints']]
+        else:
+            players = pd.DataFrame(columns=PLAYER_COLUMNS + (['keypoints'] if keypoints else []))
+        yield frames, players.astype({'team': float, 'pitch_x': float, 'pitch_y': float})
+
+def _to_tables(results, keypoints=False):
+    # Frame dicts -> the same two tables the parquet writer produces
+    balls = [r.get('ball') or {} for r in results]
+    frames = pd.DataFrame({
+        'frame': [r['frame'] for r in results],
+        'time': [r['time'] for r in results],
+        'player_count': [len(r.get('players', [])) for r in results]})
+    frames[BALL_COLUMNS] = np.array(
+        [b.get('bbox') or [np.nan] * 4 for b in balls], dtype=np.float64).reshape(-1, 4)
+    frames['ball_confidence'] = [b.get('confidence', np.nan) for b in balls]
+    frames[['ball_pitch_x', 'ball_pitch_y']] = np.array(
+        [b.get('pitch') or [np.nan] * 2 for b in balls], dtype=np.float64).reshape(-1, 2)
+    frames['tactical'] = [r.get('tactical') or {} for r in results]
+
+    players = pd.DataFrame(
+        [(r['frame'], r['time'], p['track_id'], p.get('team'), *p['bbox'][:4],
+          *(p.get('pitch') or (None, None)))
+         for r in results for p in r.get('players', [])],
+        columns=PLAYER_COLUMNS)
+    if keypoints:
+        players['keypoints'] = [
+            as_array(p['pose']['keypoints']) if p.get('pose') else None
+            for r in results for p in r.get('players', [])]
+    return frames, players.astype({'team': float, 'pitch_x': float, 'pitch_y': float})
+
+def _tactical_tables(frames):
+    # Long tables (frame, track_id, area) and (frame, track_id) of open
+    # passing lanes, plus per-frame option counts and team control shares.
+    # Legacy list-valued space_control carries no track ids and is skipped.
+    control, options, per_frame = [], [], []
+    for frame, tactical in zip(frames['frame'], frames['tactical']):
+        if isinstance(tactical, str):
+            tactical = json.loads(tactical)
+        space = tactical.get('space_control')
+        if isinstance(space, dict):
+            control.extend((frame, int(track_id), area) for track_id, area in space.items())
+        lanes = tactical.get('passing_options') or []
+        options.extend((frame, int(lane['track_id'])) for lane in lanes if 'track_id' in lane)
+        shares = {int(team): share for team, share in
+                  (tactical.get('team_control') or {}).items()}
+        per_frame.append((len(lanes), shares.get(0, np.nan), shares.get(1, np.nan)))
+    control = pd.DataFrame(control, columns=['frame', 'track_id', 'area'])
+    options = pd.DataFrame(options, columns=['frame', 'track_id'])
+    per_frame = pd.DataFrame(
+        per_frame, columns=['passing_options', 'team_control_0', 'team_control_1'],
+        index=frames.index)
+    return control, options, per_frame
+
+
+def _pose_tables(players):
+    # Per-track pose frame counts and body lean / hip torque sums, computed
+    # for the whole chunk at once over the (poses, 33, 4) stack of the rows
+    # that have a pose. Lean is taken as absolute so leaning left and right
+    # do not cancel.
+    posed = players[players['keypoints'].notna()]
+    if not len(posed):
+        return pd.DataFrame(columns=['pose_frames', 'body_lean_sum', 'hip_torque_sum'])
+    metrics = pose_metrics(np.stack(posed['keypoints'].to_list()))
+    by_track = pd.DataFrame({
+        'body_lean': np.abs(metrics['body_lean']),
+        'hip_torque': metrics['hip_torque']},
+        index=pd.Index(posed['track_id'].to_numpy(), name='track_id')).groupby(level=0)
+    return pd.DataFrame({
+        'pose_frames': by_track['body_lean'].count(),
+        'body_lean_sum': by_track['body_lean'].sum(),
+        'hip_torque_sum': by_track['hip_torque'].sum()})
+
+def _accumulate(total, counts):
+    # Running sum of grouped counts across chunks
+    return counts if total is None else total.add(counts, fill_value=0)
+
+
+class ResultsAnalyzer:
+    # Per-track and per-frame aggregates over a results stream, updated one
+    # chunk at a time so memory is bounded by the chunk size plus one row per
+    # track (and heatmap cell). Distance, speed and heatmaps use calibrated
+    # pitch coordinates in metres; players without them only count as frames.
+    # Pose averages need chunks read with keypoints=True.
+    def __init__(self, pitch_dimensions=(105, 68), heatmap_cell=5.0,
+                 max_speed=12.0, max_gap=1.0):
+        self.pitch_length, self.pitch_width = pitch_dimensions
+        self.heatmap_cell = heatmap_cell
+        self.heatmap_shape = (math.ceil(self.pitch_width / heatmap_cell),
+                              math.ceil(self.pitch_length / heatmap_cell))
+        self.max_speed = max_speed  # m/s; faster steps are tracking jumps
+        self.max_gap = max_gap  # Seconds; longer gaps do not count as movement
+        self.located_rows = 0
+        self._frames = []
+        self._tracks = None
+        self._teams = None
+        self._heatmaps = None
+        self._last = pd.DataFrame(columns=['track_id', 'frame', 'time', 'pitch_x', 'pitch_y'])
+
+    def update(self, frames, players):
+        control, options, per_frame = _tactical_tables(frames)
+        self._frames.append(self._frame_summary(frames, per_frame))
+
+        located = players.dropna(subset=['pitch_x', 'pitch_y'])
+        self.located_rows += len(located)
+        steps = self._steps(located)
+        by_track = players.groupby('track_id')
+        poses = _pose_tables(players) if 'keypoints' in players else \
+            pd.DataFrame(columns=['pose_frames', 'body_lean_sum', 'hip_torque_sum'])
+        chunk = pd.DataFrame({
+            'frames': by_track.size(),
+            'first_time': by_track['time'].min(),
+            'last_time': by_track['time'].max(),
+            'distance': steps.groupby('track_id')['distance'].sum(),
+            'moving_time': steps.groupby('track_id')['dt'].sum(),
+            'max_speed': steps.groupby('track_id')['speed'].max(),
+            'space_control_sum': control.groupby('track_id')['area'].sum(),
+            'space_control_frames': control.groupby('track_id').size(),
+            'passing_options': options.groupby('track_id').size(),
+            'pose_frames': poses['pose_frames'],
+            'body_lean_sum': poses['body_lean_sum'],
+            'hip_torque_sum': poses['hip_torque_sum']})
+        chunk = chunk[chunk['frames'].notna()]
+        if self._tracks is not None:
+            chunk = pd.concat([self._tracks, chunk])
+        self._tracks = chunk.groupby(level=0).agg(TRACK_AGGREGATES)
+
+        self._teams = _accumulate(
+            self._teams, players.dropna(subset=['team']).groupby(['track_id', 'team']).size())
+        self._heatmaps = _accumulate(
+            self._heatmaps, located.groupby([located['track_id'], self._cells(located)]).size())
+
+    def frame_summary(self):
+        if not self._frames:
+            return pd.DataFrame()
+        return pd.concat(self._frames, ignore_index=True)
+
+    def track_summary(self):
+        if self._tracks is None:
+            return pd.DataFrame()
+        tracks = self._tracks.copy()
+        tracks.index.name = 'track_id'
+        # Majority team label over the track's lifetime
+        if self._teams is not None and len(self._teams):
+            votes = self._teams.rename('votes').reset_index().sort_values('votes')
+            tracks['team'] = votes.drop_duplicates('track_id', keep='last') \
+                .set_index('track_id')['team']
+        else:
+            tracks['team'] = np.nan
+        tracks['duration'] = tracks['last_time'] - tracks['first_time']
+        tracks['avg_speed'] = tracks['distance'] / tracks['moving_time'].replace(0, np.nan)
+        tracks['avg_space_control'] = tracks['space_control_sum'] / \
+            tracks['space_control_frames'].replace(0, np.nan)
+        tracks['frames'] = tracks['frames'].astype(np.int64)
+        pose_frames = tracks['pose_frames'].replace(0, np.nan)
+        tracks['avg_body_lean'] = tracks['body_lean_sum'] / pose_frames
+        tracks['avg_hip_torque'] = tracks['hip_torque_sum'] / pose_frames
+        tracks['passing_options'] = tracks['passing_options'].astype(np.int64)
+        tracks['pose_frames'] = tracks['pose_frames'].astype(np.int64)
+        return tracks.drop(columns=['space_control_sum', 'space_control_frames',
+                                    'body_lean_sum', 'hip_torque_sum'])
+
+    def heatmaps(self, by='track'):
+        # {track_id (or team): (rows, cols) sample counts}, row 0 at pitch y=0
+        counts = self._heatmaps
+        if counts is None:
+            return {}
+        if by == 'team':
+            teams = self.track_summary()['team']
+            keys = teams.reindex(counts.index.get_level_values(0)).to_numpy()
+            valid = ~np.isnan(keys)
+            counts = counts[valid].groupby(
+                [keys[valid].astype(np.int64), counts.index.get_level_values(1)[valid]]).sum()
+        maps = {}
+        for key, cells in counts.groupby(level=0):
+            grid = np.zeros(self.heatmap_shape)
+            grid.flat[cells.index.get_level_values(1)] = cells.to_numpy()
+            maps[int(key)] = grid
+        return maps
+
+    def heatmap_table(self):
+        if self._heatmaps is None:
+            return pd.DataFrame(columns=['track_id', 'cell_x', 'cell_y', 'samples'])
+        counts = self._heatmaps.rename('samples').reset_index()
+        counts.columns = ['track_id', 'cell', 'samples']
+        rows, cols = np.divmod(counts.pop('cell').to_numpy(), self.heatmap_shape[1])
+        counts.insert(1, 'cell_x', cols)
+        counts.insert(2, 'cell_y', rows)
+        counts['samples'] = counts['samples'].astype(np.int64)
+        return counts
+
+    def _steps(self, located):
+        # Per-sample displacement within each track. Each track's last
+        # located sample from the previous chunk is prepended so steps span
+        # chunk boundaries.
+        located = located[['track_id', 'frame', 'time', 'pitch_x', 'pitch_y']]
+        if len(self._last):
+            located = pd.concat([self._last, located])
+        located = located.sort_values(['track_id', 'frame'], kind='stable')
+        self._last = located.groupby('track_id').tail(1)
+        by_track = located.groupby('track_id')
+        dt = by_track['time'].diff()
+        distance = np.hypot(by_track['pitch_x'].diff(), by_track['pitch_y'].diff())
+        speed = distance / dt
+        valid = (dt > 0) & (dt <= self.max_gap) & (speed <= self.max_speed)
+        return pd.DataFrame({'track_id': located['track_id'], 'distance': distance,
+                             'dt': dt, 'speed': speed})[valid]
+
+    def _cells(self, located):
+        rows, cols = self.heatmap_shape
+        x = np.clip((located['pitch_x'].to_numpy() // self.heatmap_cell), 0, cols - 1)
+        y = np.clip((located['pitch_y'].to_numpy() // self.heatmap_cell), 0, rows - 1)
+        return pd.Series((y * cols + x).astype(np.int64), index=located.index, name='cell')
+
+    @staticmethod
+    def _frame_summary(frames, per_frame):
+        summary = frames[['frame', 'time', 'player_count', 'ball_confidence',
+                          'ball_pitch_x', 'ball_pitch_y']].copy()
+        # NO_BALL frames have an all-zero box and zero confidence
+        found = frames['ball_confidence'].fillna(0).to_numpy() > 0
+        summary['ball_x'] = np.where(found, (frames['ball_x1'] + frames['ball_x2']) / 2, np.nan)
+        summary['ball_y'] = np.where(found, (frames['ball_y1'] + frames['ball_y2']) / 2, np.nan)
+        return pd.concat([summary, per_frame], axis=1)
+
+def analyze(path, chunk_size=1000, poses=False, **kwargs):
+    analyzer = ResultsAnalyzer(**kwargs)
+    for frames, players in read_chunks(path, chunk_size, keypoints=poses):
+        analyzer.update(frames, players)
+    return analyzer
+
+def write_outputs(analyzer, output_dir='output'):
+    os.makedirs(output_dir, exist_ok=True)
+    frames = analyzer.frame_summary()
+    tracks = analyzer.track_summary()
+    frames.to_parquet(os.path.join(output_dir, 'frames_summary.parquet'), index=False)
+    tracks.to_parquet(os.path.join(output_dir, 'tracks_summary.parquet'))
+    analyzer.heatmap_table().to_parquet(
+        os.path.join(output_dir, 'heatmaps.parquet'), index=False)
+
+    # Plot player count per frame
+    frames.plot(x='frame', y='player_count', kind='line', title='Player Count per Frame')
+    plt.xlabel('Frame')
+    plt.ylabel('Number of Players')
+    plt.tight_layout()
+    plt.savefig(os.path.join(output_dir, 'player_count_per_frame.png'))
+    plt.close()
+
+    # Plot ball trajectory
+    plt.plot(frames['ball_x'], frames['ball_y'], marker='o')
+    plt.title('Ball Trajectory')
+    plt.xlabel('Ball X')
+    plt.ylabel('Ball Y')
+    plt.tight_layout()
+    plt.savefig(os.path.join(output_dir, 'ball_trajectory.png'))
+    plt.close()
+
+    # Plot tactical metrics: number of passing options per frame
+    frames.plot(x='frame', y='passing_options', kind='line', title='Passing Options per Frame')
+    plt.xlabel('Frame')
+    plt.ylabel('Number of Passing Options')
+    plt.tight_layout()
+    plt.savefig(os.path.join(output_dir, 'passing_options_per_frame.png'))
+    plt.close()
+
+    # Plot distance covered by the 30 longest-running tracks
+    if len(tracks) and analyzer.located_rows:
+        top = tracks.nlargest(30, 'distance')
+        top['distance'].plot(kind='bar', title='Distance Covered per Track')
+        plt.xlabel('Track')
+        plt.ylabel('Distance (m)')
+        plt.tight_layout()
+        plt.savefig(os.path.join(output_dir, 'distance_per_track.png'))
+        plt.close()
+
+    # Plot one positional heatmap per team
+    for team, grid in analyzer.heatmaps(by='team').items():
+        plt.imshow(grid, origin='lower', cmap='hot', interpolation='bilinear',
+                   extent=(0, analyzer.pitch_length, 0, analyzer.pitch_width))
+        plt.title(f'Team {team} Heatmap')
+        plt.xlabel('Pitch X (m)')
+        plt.ylabel('Pitch Y (m)')
+        plt.colorbar(label='Samples')
+        plt.tight_layout()
+        plt.savefig(os.path.join(output_dir, f'heatmap_team_{team}.png'))
+        plt.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Summarize analysis results per frame and per track')
+    parser.add_argument('results', nargs='?',
+                        help='Results file (json/jsonl) or parquet directory; defaults to results_path')
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--output-dir', default='output')
+    parser.add_argument('--chunk-size', type=int, default=1000,
+                        help='Frames per chunk for JSON inputs (parquet reads one part at a time)')
+    parser.add_argument('--poses', action='store_true',
+                        help='Average body lean and hip torque per track from the keypoints')
+    parser.add_argument('--heatmap-cell', type=float, default=5.0, help='Heatmap cell size in metres')
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+    analyzer = analyze(args.results or config.get('results_path', 'output/results.json'),
+                       args.chunk_size, poses=args.poses,
+                       pitch_dimensions=config.get('pitch_dimensions', (105, 68)),
+                       heatmap_cell=args.heatmap_cell)
+    write_outputs(analyzer, args.output_dir)
+    if not analyzer.located_rows:
+        print('No pitch coordinates in the results (calibration_points unset): '
+              'distance, speed and heatmaps are empty.')
+    print(f'Frame and track summaries (parquet) and plots saved in {args.output_dir}/.')
@@ -0,0 +1,175 @@
+import cv2
+import numpy as np
+
+NO_BALL = {'bbox': [0, 0, 0, 0], 'confidence': 0}
+
+class BallTracker:
+    # Detects the ball once per frame. Measurements come from YOLO
+    # sports-ball boxes when available, otherwise from HoughCircles inside
+    # a region around the Kalman-predicted position; the full frame (at
+    # reduced scale) is only searched once the ball has been lost.
+    def __init__(self, roi_size=160, lost_after=5, coast_frames=3,
+                 full_search_scale=0.5, min_radius=5, max_radius=30,
+                 accel_std=2000.0, reacquire_confidence=0.5):
+        self.roi_size = roi_size  # Half-width of the search window, pixels
+        self.lost_after = lost_after  # Misses before falling back to full frame
+        self.coast_frames = coast_frames  # Misses reported as predictions
+        self.full_search_scale = full_search_scale
+        self.min_radius = min_radius
+        self.max_radius = max_radius
+        self.accel_std = accel_std  # Process noise, pixels/s^2
+        # YOLO confidence that overrides the current lock anywhere in frame
+        self.reacquire_confidence = reacquire_confidence
+        self.reset()
+
+    def reset(self):
+        self.kalman = cv2.KalmanFilter(4, 2)
+        self.kalman.measurementMatrix = np.array(
+            [[1, 0, 0, 0], [0, 1, 0, 0]], dtype=np.float32)
+        self.kalman.measurementNoiseCov = np.eye(2, dtype=np.float32) * 4.0
+        self.initialized = False
+        self.missed = 0
+        self.radius = 10.0
+        self.stats = {'yolo': 0, 'roi': 0, 'full': 0, 'predicted': 0, 'lost': 0}
+
+    def locate(self, frame, players, candidates=None, dt=None):
+        # players: track dict (id -> {'bbox'}); candidates: YOLO ball detections
+        dt = 0.04 if dt is None or dt <= 0 else dt
+        predicted = self._predict(dt) if self.initialized else None
+
+        measurement, source = self._from_candidates(candidates, predicted)
+        if measurement is None and predicted is not None \
+                and self.missed < self.lost_after:
+            measurement = self._hough(frame, players, predicted)
+            source = 'roi'
+        if measurement is None and (predicted is None
+                                    or self.missed >= self.lost_after):
+            measurement = self._hough(frame, players, None)
+            source = 'full'
+
+        if measurement is not None:
+            x, y, r, confidence = measurement
+            if source in ('full', 'reacquired') or self.missed > self.coast_frames:
+                # Re-acquired after losing it: restart the filter there
+                self.initialized = False
+            self._correct(x, y)
+            self.radius = r
+            self.missed = 0
+            source = 'yolo' if source == 'reacquired' else source
+            self.stats[source] += 1
+            return self._ball(x, y, r, confidence, source)
+
+        self.missed += 1
+        if predicted is not None and self.missed <= self.coast_frames:
+            self.stats['predicted'] += 1
+            return self._ball(predicted[0], predicted[1], self.radius, 0.3,
+                              'predicted')
+        self.stats['lost'] += 1
+        return dict(NO_BALL)
+
+    def _predict(self, dt):
+        self.kalman.transitionMatrix = np.array(
+            [[1, 0, dt, 0], [0, 1, 0, dt], [0, 0, 1, 0], [0, 0, 0, 1]],
+            dtype=np.float32)
+        self.kalman.processNoiseCov = (self.accel_std ** 2 * np.array(
+            [[dt**4 / 4, 0, dt**3 / 2, 0], [0, dt**4 / 4, 0, dt**3 / 2],
+             [dt**3 / 2, 0, dt**2, 0], [0, dt**3 / 2, 0, dt**2]])
+        ).astype(np.float32)
+        state = self.kalman.predict()
+        return float(state[0, 0]), float(state[1, 0])
+
+    def _correct(self, x, y):
+        if not self.initialized:
+            self.kalman.statePost = np.array([[x], [y], [0], [0]], dtype=np.float32)
+            self.kalman.errorCovPost = np.diag(
+                [4.0, 4.0, 1e6, 1e6]).astype(np.float32)
+            self.initialized = True
+            return
+        self.kalman.correct(np.array([[x], [y]], dtype=np.float32))
+
+    def _from_candidates(self, candidates, predicted):
+        if not candidates:
+            return None, None
+        boxes = np.asarray([c['bbox'] for c in candidates], dtype=np.float32)
+        centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+        confidence = np.asarray([c['confidence'] for c in candidates])
+        source = 'yolo'
+        best = None
+        if predicted is not None:
+            # Nearest box to the prediction, if it is inside the search window
+            dist = np.linalg.norm(centers - np.asarray(predicted), axis=1)
+            nearest = int(np.argmin(dist))
+            if dist[nearest] <= self.roi_size * (1 + self.missed):
+                best = nearest
+        if best is None:
+            best = int(np.argmax(confidence))
+            if predicted is not None:
+                if confidence[best] < self.reacquire_confidence:
+                    return None, None
+                source = 'reacquired'
+        radius = float(np.mean(boxes[best, 2:] - boxes[best, :2]) / 2)
+        return (float(centers[best, 0]), float(centers[best, 1]), radius,
+                float(confidence[best])), source
+
+    def _hough(self, frame, players, predicted):
+        height, width = frame.shape[:2]
+        if predicted is not None:
+            # Window grows with every missed frame
+            half = int(self.roi_size * (1 + self.missed))
+            x0 = int(np.clip(predicted[0] - half, 0, width))
+            y0 = int(np.clip(predicted[1] - half, 0, height))
+            x1 = int(np.clip(predicted[0] + half, 0, width))
+            y1 = int(np.clip(predicted[1] + half, 0, height))
+            scale = 1.0
+        else:
+            x0, y0, x1, y1 = 0, 0, width, height
+            scale = self.full_search_scale
+        if x1 - x0 < 2 * self.min_radius or y1 - y0 < 2 * self.min_radius:
+            return None
+
+        gray = cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+        if scale != 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale,
+                              interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)  # Hough needs smooth edges
+        circles = cv2.HoughCircles(
+            gray, cv2.HOUGH_GRADIENT, 1, 20, param1=50, param2=30,
+            minRadius=max(int(self.min_radius * scale), 1),
+            maxRadius=max(int(self.max_radius * scale), 2))
+        if circles is None:
+            return None
+
+        circles = circles[0].astype(np.float64)
+        circles[:, :3] /= scale
+        circles[:, 0] += x0
+        circles[:, 1] += y0
+
+        # Drop circles inside player boxes (shirt numbers, heads)
+        if players:
+            boxes = np.asarray([p['bbox'] for p in players.values()],
+                               dtype=np.float64)
+            inside = ((circles[:, None, 0] >= boxes[None, :, 0]) &
+                      (circles[:, None, 0] <= boxes[None, :, 2]) &
+                      (circles[:, None, 1] >= boxes[None, :, 1]) &
+                      (circles[:, None, 1] <= boxes[None, :, 3])).any(axis=1)
+            circles = circles[~inside]
+        if not len(circles):
+            return None
+
+        if predicted is not None:
+            # Closest circle to the prediction
+            dist = np.linalg.norm(circles[:, :2] - np.asarray(predicted), axis=1)
+            best = int(np.argmin(dist))
+        else:
+            best = 0  # HoughCircles orders by accumulator votes
+        x, y, r = circles[best, :3]
+        return float(x), float(y), float(r), 0.8
+
+    @staticmethod
+    def _ball(x, y, r, confidence, source):
+        return {
+            'bbox': [int(round(x - r)), int(round(y - r)),
+                     int(round(x + r)), int(round(y + r))],
+            'confidence': confidence,
+            'source': source
+        }
\ No newline at end of file
@@ -0,0 +1,366 @@
+import glob
+import json
+import os
+import queue
+import time
+import traceback
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import multiprocessing as mp
+
+import cv2
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from tracking import iou_matrix
+from writers import make_writer
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.mts')
+
+# One FootballAnalyzer per worker process, so models load once per worker
+_worker = {}
+
+def _init_worker(config_path, overrides, progress):
+    import yaml
+    from main import FootballAnalyzer
+    with open(config_path) as f:
+        config = yaml.safe_load(f)
+    # Overrides go in before the analyzer builds its detector, pose engine
+    # and other components from the config
+    config.update(overrides)
+    _worker['analyzer'] = FootballAnalyzer(config_path, config=config)
+    _worker['progress'] = progress
+
+def _run_job(job):
+    analyzer = _worker['analyzer']
+    progress = _worker['progress']
+    cap = cv2.VideoCapture(job['video'])
+    opened = cap.isOpened()
+    cap.release()
+    if not opened:
+        raise IOError(f"Cannot open video: {job['video']}")
+    # Fresh tracker per job: ids restart at 0 and are stitched afterwards
+    analyzer.tracker = analyzer._make_tracker()
+    analyzer.exporter.output_dir = os.path.join(
+        os.path.dirname(job['output']), job['id'] + '-visualizations')
+    start = time.perf_counter()
+    sink = make_writer(job['output'], fmt=job['format'])
+    frames = 0
+    analyzer.exporter.start(job['id'])
+    try:
+        for result in analyzer.iter_video(
+                job['video'], job['start_frame'], job['end_frame']):
+            sink.write(result)
+            frames += 1
+            if frames % 50 == 0:
+                progress.put((job['id'], frames, result['frame']))
+        # One file per job; shards cover their overlap frames too
+        analyzer._save_kinematics(job['id'])
+    finally:
+        try:
+            analyzer.exporter.close()
+        finally:
+            sink.close()
+    return frames, time.perf_counter() - start
+
+def find_videos(inputs, manifest=None):
+    # Directories are searched recursively; a manifest lists one path per
+    # line (blank lines and '#' comments ignored), relative to the manifest
+    videos = []
+    for path in inputs:
+        if os.path.isdir(path):
+            videos.extend(sorted(
+                p for p in glob.glob(os.path.join(path, '**', '*'), recursive=True)
+                if p.lower().endswith(VIDEO_EXTENSIONS)))
+        else:
+            videos.append(path)
+    if manifest:
+        base = os.path.dirname(manifest)
+        with open(manifest) as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if line:
+                    videos.append(os.path.join(base, line))
+    return videos
+
+def plan_shards(video, shard_seconds=None, overlap_seconds=2.0,
+                analysis_fps=None):
+    # [(start, end, emit_from)] frame ranges. Shards after the first start
+    # overlap_seconds early so their tracker is warm at emit_from, and the
+    # overlap frames are used to stitch track ids. Boundaries are multiples
+    # of the sampling step so both shards analyze the same overlap frames.
+    cap = cv2.VideoCapture(video)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+    if not shard_seconds or total <= 0:
+        return [(0, None, 0)]
+    step = max(int(round(fps / analysis_fps)), 1) if analysis_fps else 1
+    length = max(int(shard_seconds * fps) // step, 1) * step
+    overlap = int(overlap_seconds * fps) // step * step
+    shards = []
+    for emit_from in range(0, total, length):
+        end = emit_from + length
+        shards.append((max(emit_from - overlap, 0),
+                       None if end >= total else end, emit_from))
+    return shards
+
+def stitch_ids(previous, following, min_iou=0.5):
+    # Map track ids of the following shard onto the previous shard's ids by
+    # majority IoU vote over the frames both analyzed
+    votes = defaultdict(int)
+    for frame_idx in sorted(set(previous) & set(following)):
+        a, b = previous[frame_idx], following[frame_idx]
+        if not a or not b:
+            continue
+        iou = iou_matrix([p['bbox'] for p in a], [p['bbox'] for p in b])
+        rows, cols = linear_sum_assignment(-iou)
+        for r, c in zip(rows, cols):
+            if iou[r, c] >= min_iou:
+                votes[(a[r]['track_id'], b[c]['track_id'])] += 1
+    if not votes:
+        return {}
+    ids_a = sorted({a for a, _ in votes})
+    ids_b = sorted({b for _, b in votes})
+    counts = np.zeros((len(ids_a), len(ids_b)))
+    for (a, b), n in votes.items():
+        counts[ids_a.index(a), ids_b.index(b)] = n
+    rows, cols = linear_sum_assignment(-counts)
+    return {ids_b[c]: ids_a[r] for r, c in zip(rows, cols) if counts[r, c] > 0}
+
+def remap_result(result, mapping):
+    # Rewrite every track id in a frame result
+    players = [dict(p, track_id=mapping[p['track_id']]) for p in result['players']]
+    tactical = dict(result.get('tactical') or {})
+    if 'space_control' in tactical:
+        tactical['space_control'] = {
+            mapping.get(_as_id(k), k): v
+            for k, v in tactical['space_control'].items()}
+    if 'passing_options' in tactical:
+        tactical['passing_options'] = [
+            dict(o, track_id=mapping.get(o['track_id'], o['track_id']))
+            if 'track_id' in o else o for o in tactical['passing_options']]
+    events = [dict(e, track_id=mapping.get(e['track_id'], e['track_id']))
+              for e in result.get('events', [])]
+    return dict(result, players=players, tactical=tactical, events=events)
+
+def _as_id(key):
+    # JSON object keys come back as strings
+    return int(key) if isinstance(key, str) and key.lstrip('-').isdigit() else key
+
+def _read_jsonl(path):
+    with open(path) as f:
+        for line in f:
+            yield json.loads(line)
+
+def merge_shards(shards, output, fmt):
+    # shards: [(jsonl path, start_frame, emit_from)] in order. Frames before
+    # emit_from only serve stitching; track ids continue across shards.
+    sink = make_writer(output, fmt=fmt)
+    next_id = 0
+    tail = {}  # Previous shard's frames inside this shard's overlap
+    try:
+        for i, (path, _, emit_from) in enumerate(shards):
+            next_start = shards[i + 1][1] if i + 1 < len(shards) else None
+            head, local_ids = {}, set()
+            for result in _read_jsonl(path):
+                local_ids.update(p['track_id'] for p in result['players'])
+                if result['frame'] < emit_from:
+                    head[result['frame']] = result['players']
+            stitched = stitch_ids(tail, head)
+
+            mapping = {}
+            for track_id in sorted(local_ids):
+                if track_id in stitched:
+                    mapping[track_id] = stitched[track_id]
+                else:
+                    mapping[track_id] = next_id
+                    next_id += 1
+
+            tail = {}
+            for result in _read_jsonl(path):
+                if result['frame'] < emit_from:
+                    continue
+                result = remap_result(result, mapping)
+                sink.write(result)
+                if next_start is not None and result['frame'] >= next_start:
+                    tail[result['frame']] = result['players']
+    finally:
+        sink.close()
+
+
+class BatchRunner:
+    # Runs one job per video (or per time-range shard) on a process pool and
+    # keeps summary.json current: per-job status, progress, attempts, errors
+    def __init__(self, config_path='config.yaml', output_dir='output/batch',
+                 jobs=2, fmt='jsonl', retries=1, shard_seconds=None,
+                 overlap_seconds=2.0, overrides=None):
+        self.config_path = config_path
+        self.output_dir = output_dir
+        self.jobs = jobs
+        self.format = fmt
+        self.retries = retries
+        self.shard_seconds = shard_seconds
+        self.overlap_seconds = overlap_seconds
+        self.overrides = overrides or {}
+        self.summary_path = os.path.join(output_dir, 'summary.json')
+        self.summary = {'jobs': {}, 'videos': {}}
+
+    def run(self, videos):
+        os.makedirs(self.output_dir, exist_ok=True)
+        jobs = self._plan(videos)
+        manager = mp.get_context('spawn').Manager()
+        progress = manager.Queue()
+        pending = {}
+        try:
+            with ProcessPoolExecutor(
+                    max_workers=self.jobs, mp_context=mp.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.config_path, self.overrides, progress)) as pool:
+                for job in jobs:
+                    pending[pool.submit(_run_job, job)] = job
+                    self._update(job, status='queued')
+                while pending:
+                    done, _ = wait(list(pending), timeout=1.0,
+                                   return_when=FIRST_COMPLETED)
+                    self._drain(progress)
+                    for future in done:
+                        job = pending.pop(future)
+                        retry = self._finish(job, future)
+                        if retry:
+                            pending[pool.submit(_run_job, job)] = job
+                    if done:
+                        self._merge_ready(videos)
+        finally:
+            manager.shutdown()
+            self._write_summary()
+        return self.summary
+
+    def _plan(self, videos):
+        analysis_fps = self._config().get('analysis_fps')
+        jobs = []
+        for video in videos:
+            name = os.path.splitext(os.path.basename(video))[0]
+            shards = plan_shards(video, self.shard_seconds, self.overlap_seconds,
+                                 analysis_fps)
+            sharded = len(shards) > 1
+            entry = self.summary['videos'][video] = {
+                'output': os.path.join(self.output_dir, self._filename(name)),
+                'jobs': [], 'status': 'pending'}
+            for i, (start, end, emit_from) in enumerate(shards):
+                job_id = f"{name}-{i:03d}" if sharded else name
+                output = os.path.join(self.output_dir, 'shards', job_id + '.jsonl') \
+                    if sharded else entry['output']
+                job = {'id': job_id, 'video': video, 'start_frame': start,
+                       'end_frame': end, 'emit_from': emit_from, 'output': output,
+                       'format': 'jsonl' if sharded else self.format}
+                os.makedirs(os.path.dirname(output), exist_ok=True)
+                entry['jobs'].append(job_id)
+                jobs.append(job)
+                self.summary['jobs'][job_id] = {
+                    'video': video, 'start_frame': start, 'end_frame': end,
+                    'emit_from': emit_from, 'status': 'planned', 'attempts': 0,
+                    'frames': 0}
+        return jobs
+
+    def _finish(self, job, future):
+        # Returns True when the job should be resubmitted
+        record = self.summary['jobs'][job['id']]
+        record['attempts'] += 1
+        try:
+            frames, seconds = future.result()
+        except Exception as exc:
+            record['error'] = ''.join(traceback.format_exception(
+                type(exc), exc, exc.__traceback__))
+            retry = record['attempts'] <= self.retries
+            self._update(job, status='retrying' if retry else 'failed')
+            return retry
+        record.pop('error', None)
+        self._update(job, status='done', frames=frames, seconds=round(seconds, 2))
+        return False
+
+    def _merge_ready(self, videos):
+        for video in videos:
+            entry = self.summary['videos'][video]
+            if entry['status'] != 'pending':
+                continue
+            states = [self.summary['jobs'][j]['status'] for j in entry['jobs']]
+            if 'failed' in states:
+                entry['status'] = 'failed'
+            elif all(state == 'done' for state in states):
+                if len(entry['jobs']) > 1:
+                    jobs = [self._job_output(j) for j in entry['jobs']]
+                    merge_shards(jobs, entry['output'], self.format)
+                entry['status'] = 'done'
+        self._write_summary()
+
+    def _job_output(self, job_id):
+        record = self.summary['jobs'][job_id]
+        return (os.path.join(self.output_dir, 'shards', job_id + '.jsonl'),
+                record['start_frame'], record['emit_from'])
+
+    def _drain(self, progress):
+        changed = False
+        while True:
+            try:
+                job_id, frames, frame_idx = progress.get_nowait()
+            except queue.Empty:
+                break
+            record = self.summary['jobs'][job_id]
+            record.update(frames=frames, last_frame=frame_idx)
+            changed = True
+        if changed:
+            self._write_summary()
+
+    def _update(self, job, **fields):
+        record = self.summary['jobs'][job['id']]
+        record.update(fields)
+        self._write_summary()
+
+    def _write_summary(self):
+        tmp = self.summary_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.summary, f, indent=2)
+        os.replace(tmp, self.summary_path)
+
+    def _config(self):
+        import yaml
+        with open(self.config_path) as f:
+            config = yaml.safe_load(f)
+        config.update(self.overrides)
+        return config
+
+    def _filename(self, name):
+        return name if self.format == 'parquet' else f"{name}.{self.format}"
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        description='Analyze many videos (or shards of one) on a process pool')
+    parser.add_argument('inputs', nargs='*', help='Video files or directories')
+    parser.add_argument('--manifest', help='Text file listing one video per line')
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--output-dir', default='output/batch')
+    parser.add_argument('--jobs', type=int, default=2, help='Worker processes')
+    parser.add_argument('--format', choices=['jsonl', 'parquet'], default='jsonl')
+    parser.add_argument('--retries', type=int, default=1)
+    parser.add_argument('--shard-minutes', type=float,
+                        help='Split each video into time ranges of this length')
+    parser.add_argument('--overlap-seconds', type=float, default=2.0,
+                        help='Shard overlap used to stitch track ids')
+    args = parser.parse_args()
+
+    videos = find_videos(args.inputs, args.manifest)
+    if not videos:
+        parser.error('no videos found')
+    runner = BatchRunner(
+        args.config, args.output_dir, jobs=args.jobs, fmt=args.format,
+        retries=args.retries,
+        shard_seconds=args.shard_minutes * 60 if args.shard_minutes else None,
+        overlap_seconds=args.overlap_seconds)
+    summary = runner.run(videos)
+    failed = [v for v, entry in summary['videos'].items() if entry['status'] != 'done']
+    print(f"{len(videos) - len(failed)}/{len(videos)} videos done, "
+          f"summary: {runner.summary_path}")
+    if failed:
+        raise SystemExit(1)
@@ -0,0 +1,246 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ball import BallTracker
+from calibration import PitchCalibrator
+from keypoints import pose_metrics
+from main import FootballAnalyzer
+from tactical import TacticalAnalyzer
+from teams import TeamClassifier
+from tracking import KalmanTracker, Tracker
+from writers import JsonLinesWriter
+
+from stubs import ColourDetector, StubPoseEngine
+from synthetic import SyntheticMatch
+
+PLAYER_COUNTS = (10, 22, 40)
+RESOLUTIONS = ((640, 360), (1280, 720), (1920, 1080))
+STAGE_SIZE = (1280, 720)  # Resolution for the image-based stage benchmarks
+
+REPEAT = 3  # Timed passes per benchmark; the fastest is reported
+
+def measure(setup, run, items, repeat=REPEAT):
+    # Items per second of run(state) and its peak Python/numpy allocation.
+    # Timing and memory use separate passes: tracemalloc slows code down.
+    elapsed = float('inf')
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        elapsed = min(elapsed, time.perf_counter() - start)
+
+    state = setup()
+    tracemalloc.start()
+    run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'fps': round(items / max(elapsed, 1e-9), 2),
+            'ms_per_item': round(elapsed / items * 1000, 4),
+            'peak_mb': round(peak / 2 ** 20, 2)}
+
+def stage_benchmarks(players, frames):
+    match = SyntheticMatch(players, frames, seed=players)
+    size = STAGE_SIZE
+    detections = [match.detections(f, size) for f in range(frames)]
+    images = [match.render(f, size) for f in range(frames)]
+    tracks = [{i: {'bbox': d['bbox']} for i, d in enumerate(frame)}
+              for frame in detections]
+    pitch = match.positions * [105, 68]
+    tactical_players = [
+        [{'bbox': d['bbox'], 'pitch': list(pitch[f, i]), 'team': int(match.teams[i]) % 2,
+          'track_id': i} for i, d in enumerate(detections[f])]
+        for f in range(frames)]
+    balls = [{'bbox': match.ball_box(f, size), 'confidence': 0.9,
+              'pitch': list(match.ball[f] * [105, 68])} for f in range(frames)]
+    keypoints = [match.keypoints(f) for f in range(frames)]
+    width, height = size
+    corners = [[0, 0, 0, 0], [width, 0, 105, 0], [width, height, 105, 68],
+               [0, height, 0, 68]]
+
+    def each(fn):
+        def run(state):
+            for f in range(frames):
+                fn(state, f)
+        return run
+
+    benchmarks = {
+        'tracker.hungarian': (
+            lambda: Tracker(assignment='hungarian'),
+            each(lambda t, f: t.update(detections[f]))),
+        'tracker.kalman': (
+            KalmanTracker,
+            each(lambda t, f: t.update(detections[f], 0.04))),
+        'ball.locate': (
+            BallTracker,
+            each(lambda b, f: b.locate(images[f], tracks[f], None, 0.04))),
+        'teams.assign': (
+            lambda: TeamClassifier(warmup_samples=players * 2),
+            each(lambda t, f: t.assign(images[f], tracks[f]))),
+        'calibration.locate': (
+            lambda: PitchCalibrator(corners),
+            each(lambda c, f: c.locate(images[f], tracks[f], balls[f]))),
+        'tactical.voronoi': (
+            TacticalAnalyzer,
+            each(lambda t, f: t.analyze_positions(tactical_players[f], balls[f]))),
+        'tactical.grid': (
+            lambda: TacticalAnalyzer(space_control_mode='grid'),
+            each(lambda t, f: t.analyze_positions(tactical_players[f], balls[f]))),
+        # PoseAnalyzer._analyze_pose is pose_metrics on one (33, 4) pose
+        'pose.analyze_pose': (
+            lambda: None,
+            each(lambda _, f: [pose_metrics(kp) for kp in keypoints[f]])),
+        'pose.metrics_stack': (
+            lambda: None,
+            each(lambda _, f: pose_metrics(keypoints[f]))),
+    }
+    return {f"{name}@{players}": measure(setup, run, frames)
+            for name, (setup, run) in benchmarks.items()}
+
+def writer_benchmark(players, frames, workdir):
+    match = SyntheticMatch(players, frames, seed=players)
+    engine = StubPoseEngine()
+    results = [{
+        'frame': f, 'time': f / 25,
+        'players': [{'track_id': i, 'bbox': d['bbox'], 'team': i % 2,
+                     'pitch': [1.0, 2.0], 'pose': pose}
+                    for i, (d, pose) in enumerate(zip(
+                        match.detections(f, STAGE_SIZE),
+                        engine.analyze(range(players), [np.ones((2, 2, 3))] * players)))],
+        'tactical': {}, 'ball': {'bbox': [0, 0, 0, 0], 'confidence': 0}}
+        for f in range(frames)]
+    path = os.path.join(workdir, 'bench.jsonl')
+
+    def run(writer):
+        for result in results:
+            writer.write(result)
+        writer.close()
+    return {f"writer.jsonl@{players}": measure(
+        lambda: JsonLinesWriter(path), run, frames)}
+
+def end_to_end(size, frames, players, workdir, base_config):
+    match = SyntheticMatch(players, frames, seed=1)
+    video = match.write_video(os.path.join(workdir, f"match_{size[0]}x{size[1]}.avi"), size)
+    # Uncalibrated, as in the default config (kinematics is then skipped;
+    # tests/test_kinematics.py covers both paths)
+    config = dict(base_config, analysis_fps=None, event_fps=None, cache_dir=None,
+                  visualization_mode='off', profile=True, team_warmup_samples=players * 2,
+                  calibration_points=[], kinematics=True,
+                  kinematics_dir=os.path.join(workdir, 'kinematics'))
+
+    def setup():
+        return FootballAnalyzer(config=dict(config), detector=ColourDetector(),
+                                pose_engine=StubPoseEngine())
+
+    analyzers = []
+
+    def run(analyzer):
+        analyzer.analyze_video(video)
+        analyzers.append(analyzer)
+
+    name = f"pipeline@{size[0]}x{size[1]}"
+    results = {name: measure(setup, run, frames, repeat=1)}
+    # Per-stage frames/s from the timed pass's profiler: analyzed frames over
+    # the stage's total time, so batched stages (detect) compare with the rest
+    profiler = analyzers[0].profiler
+    for stage, (_, wall, _) in profiler.stages.items():
+        results[f"{name}/{stage}"] = {
+            'fps': round(profiler.frames / max(wall, 1e-9), 2),
+            'ms_per_item': round(wall / max(profiler.frames, 1) * 1000, 4)}
+    return results
+
+def compare(results, baseline, tolerance):
+    # Names whose frames/s fell more than tolerance below the baseline. The
+    # pipeline's per-stage rows come from a single pass and are only shown.
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get('results', {}).get(name)
+        if not reference:
+            continue
+        ratio = result['fps'] / max(reference['fps'], 1e-9)
+        result['vs_baseline'] = round(ratio, 3)
+        if ratio < 1 - tolerance and '/' not in name:
+            regressions.append(name)
+    return regressions
+
+def machine():
+    return {'python': platform.python_version(), 'numpy': np.__version__,
+            'platform': platform.platform(), 'processor': platform.processor(),
+            'cpus': os.cpu_count()}
+
+def print_table(results):
+    print(f"{'benchmark':<44}{'frames/s':>12}{'ms/item':>11}{'peak MB':>9}{'vs base':>9}")
+    for name, result in results.items():
+        peak = result.get('peak_mb')
+        ratio = result.get('vs_baseline')
+        print(f"{name:<44}{result['fps']:>12.1f}{result['ms_per_item']:>11.3f}"
+              f"{'' if peak is None else f'{peak:.1f}':>9}"
+              f"{'' if ratio is None else f'{ratio:.2f}':>9}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='CPU-only benchmarks on synthetic matches (no model downloads)')
+    parser.add_argument('--players', type=int, nargs='+', default=list(PLAYER_COUNTS))
+    parser.add_argument('--frames', type=int, default=100,
+                        help='Frames per stage benchmark and end-to-end video')
+    parser.add_argument('--quick', action='store_true',
+                        help='Fewer frames and only the smallest resolution')
+    parser.add_argument('--only', help='Run benchmarks whose name contains this')
+    parser.add_argument('--config', default=os.path.join(ROOT, 'config.yaml'))
+    parser.add_argument('--baseline', default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'baseline.json'))
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed frames/s drop before a benchmark is a regression')
+    parser.add_argument('--output', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    frames = 20 if args.quick else args.frames
+    resolutions = RESOLUTIONS[:1] if args.quick else RESOLUTIONS
+    with open(args.config) as f:
+        base_config = yaml.safe_load(f)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for players in args.players:
+            results.update(stage_benchmarks(players, frames))
+            results.update(writer_benchmark(players, frames, workdir))
+        for size in resolutions:
+            results.update(end_to_end(size, frames, 22, workdir, base_config))
+    if args.only:
+        results = {k: v for k, v in results.items() if args.only in k}
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('machine') != machine():
+            print("Note: baseline was recorded on a different machine")
+        if baseline.get('frames') != frames:
+            print(f"Note: baseline used {baseline.get('frames')} frames per benchmark")
+        regressions = compare(results, baseline, args.tolerance)
+    print_table(results)
+
+    report = {'machine': machine(), 'frames': frames, 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    if regressions:
+        print(f"Regressions (> {args.tolerance:.0%} slower): {', '.join(regressions)}")
+        raise SystemExit(1)
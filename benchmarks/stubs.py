@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+
+from keypoints import KeypointView, NUM_LANDMARKS, pose_metrics
+from synthetic import PITCH_GREEN
+
+class ColourDetector:
+    # Stands in for PlayerDetector on synthetic videos: anything that is not
+    # pitch green (or a pitch line) and is player-sized becomes a person
+    def __init__(self, batch_size=8, min_area=40):
+        self.batch_size = batch_size
+        self.min_area = min_area
+
+    def detect(self, frame):
+        return self.detect_batch([frame])[0]
+
+    def detect_batch(self, frames):
+        return [self._detect(frame) for frame in frames]
+
+    def _detect(self, frame):
+        green = np.array(PITCH_GREEN)
+        mask = (np.abs(frame.astype(np.int16) - green).sum(axis=2) > 90) \
+            & (frame.min(axis=2) < 200)  # White lines and the ball are not players
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask.astype(np.uint8))
+        detections = []
+        for x, y, w, h, area in stats[1:count]:
+            if area >= self.min_area and h > w:
+                detections.append({'bbox': [int(x), int(y), int(x + w), int(y + h)],
+                                   'confidence': 0.9, 'class_id': 0})
+        return detections
+
+
+class StubPoseEngine:
+    # PoseEngine interface without MediaPipe: a fixed pseudo-random pose per
+    # track, with the same result layout as PoseAnalyzer
+    def __init__(self, seed=0):
+        self.seed = seed
+        self._results = {}
+        self._next_ticket = 0
+
+    def complexity(self, tier):
+        return 0
+
+    def submit(self, track_ids, crops, tiers=None):
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        self._results[ticket] = [self._pose(track_id, crop)
+                                 for track_id, crop in zip(track_ids, crops)]
+        return ticket
+
+    def collect(self, ticket):
+        return self._results.pop(ticket), 0.0
+
+    def analyze(self, track_ids, crops, tiers=None):
+        return self.collect(self.submit(track_ids, crops, tiers))[0]
+
+    def close(self):
+        pass
+
+    def _pose(self, track_id, crop):
+        if crop is None or crop.size == 0:
+            return None
+        keypoints = np.random.default_rng((self.seed, track_id)).uniform(
+            0, 1, (NUM_LANDMARKS, 4)).astype(np.float32)
+        metrics = pose_metrics(keypoints)
+        return {'keypoints': KeypointView(keypoints),
+                'analysis': {name: float(value) for name, value in metrics.items()}}
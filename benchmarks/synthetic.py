@@ -0,0 +1,82 @@
+import cv2
+import numpy as np
+
+from keypoints import NUM_LANDMARKS
+
+PITCH_GREEN = (40, 140, 40)
+TEAM_COLOURS = [(0, 0, 220), (220, 120, 0), (20, 220, 220)]  # BGR, last = referee
+
+class SyntheticMatch:
+    # Seeded players doing a bounded random walk plus a bouncing ball, in
+    # normalized [0, 1] coordinates so any resolution renders the same match
+    def __init__(self, players=22, frames=100, seed=0):
+        rng = np.random.default_rng(seed)
+        self.players = players
+        self.frames = frames
+        self.teams = np.array([i % 2 for i in range(players)])
+        self.teams[-1:] = 2 if players > 2 else self.teams[-1:]
+        steps = rng.normal(0, 0.004, (frames, players, 2))
+        positions = rng.uniform(0.1, 0.9, (players, 2)) + np.cumsum(steps, axis=0)
+        # Reflect at the borders so players stay on screen
+        positions = np.abs(positions)
+        positions = np.where(positions > 1, 2 - positions, positions)
+        self.positions = np.clip(positions, 0.05, 0.95)
+
+        velocity = rng.uniform(-0.01, 0.01, 2)
+        ball = np.empty((frames, 2))
+        point = rng.uniform(0.2, 0.8, 2)
+        for f in range(frames):
+            point = point + velocity
+            for axis in range(2):
+                if not 0.02 < point[axis] < 0.98:
+                    velocity[axis] = -velocity[axis]
+            ball[f] = point
+        self.ball = ball
+
+    def boxes(self, frame_idx, size):
+        # (players, 4) pixel boxes, feet at the player position
+        width, height = size
+        box_w, box_h = max(width // 60, 4), max(height // 12, 8)
+        cx = self.positions[frame_idx, :, 0] * width
+        cy = self.positions[frame_idx, :, 1] * height
+        return np.stack([cx - box_w / 2, cy - box_h, cx + box_w / 2, cy],
+                        axis=1).astype(int)
+
+    def ball_box(self, frame_idx, size):
+        width, height = size
+        radius = max(width // 160, 3)
+        x, y = self.ball[frame_idx] * [width, height]
+        return [int(x - radius), int(y - radius), int(x + radius), int(y + radius)]
+
+    def render(self, frame_idx, size):
+        width, height = size
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[:] = PITCH_GREEN
+        cv2.line(frame, (width // 2, 0), (width // 2, height), (255, 255, 255), 2)
+        for box, team in zip(self.boxes(frame_idx, size), self.teams):
+            x1, y1, x2, y2 = (int(v) for v in box)
+            cv2.rectangle(frame, (x1, y1), (x2, y2), TEAM_COLOURS[team], -1)
+        x1, y1, x2, y2 = self.ball_box(frame_idx, size)
+        cv2.circle(frame, ((x1 + x2) // 2, (y1 + y2) // 2), (x2 - x1) // 2,
+                   (255, 255, 255), -1)
+        return frame
+
+    def write_video(self, path, size, fps=25):
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, size)
+        for frame_idx in range(self.frames):
+            writer.write(self.render(frame_idx, size))
+        writer.release()
+        return path
+
+    def detections(self, frame_idx, size, jitter=2.0, seed=0):
+        # Detector-shaped output with pixel noise, in player order
+        rng = np.random.default_rng((seed, frame_idx))
+        boxes = self.boxes(frame_idx, size) + rng.normal(0, jitter, (self.players, 4))
+        return [{'bbox': [int(v) for v in box], 'confidence': 0.9, 'class_id': 0}
+                for box in boxes]
+
+    def keypoints(self, frame_idx, seed=0):
+        # (players, 33, 4) float32 pose stack
+        rng = np.random.default_rng((seed, frame_idx))
+        keypoints = rng.uniform(0, 1, (self.players, NUM_LANDMARKS, 4))
+        return keypoints.astype(np.float32)
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import pickle
+
+# Bump a stage's version when its code changes in a way that alters output
+STAGE_VERSIONS = {'detections': 'yolov8s-1', 'tracks': 2, 'poses': 'mediapipe-3'}
+
+# Config keys each stage's output depends on (a trailing '_' is a prefix).
+# Stages chain: tracks include the detections key, poses the tracks key, so
+# changing only tactical settings keeps every cached stage valid. Session
+# reuse changes MediaPipe output, so the session pool settings (sessions
+# are per pose worker) are part of the poses key.
+STAGE_SETTINGS = {
+    'detections': ('ball_use_detector', 'ball_detector_confidence'),
+    'tracks': ('analysis_fps', 'event_fps', 'event_window', 'event_ball_distance',
+               'detect_every', 'tracker_', 'kalman_', 'ball_', 'calibration_',
+               'pitch_dimensions', 'team_', 'pipeline', 'pipeline_queue_depth'),
+    'poses': ('pose_quality', 'pose_tiers', 'pose_schedule', 'pose_input_size',
+              'pose_crop_padding', 'pose_min_height', 'pose_near_distance',
+              'pose_far_distance', 'pose_far_every', 'pose_budget_ms',
+              'pose_tier_switch_frames', 'pose_workers', 'pose_max_sessions',
+              'pose_session_ttl'),
+}
+STAGES = ('detections', 'tracks', 'poses')
+
+def video_fingerprint(path, sample_size=1 << 20):
+    # Content hash of the file size plus samples from the start, middle and
+    # end; hashing a whole match would take longer than the cache saves
+    size = os.path.getsize(path)
+    digest = hashlib.sha1(str(size).encode())
+    with open(path, 'rb') as f:
+        for offset in (0, max(size // 2 - sample_size // 2, 0),
+                       max(size - sample_size, 0)):
+            f.seek(offset)
+            digest.update(f.read(sample_size))
+    return digest.hexdigest()
+
+def stage_settings(config, stage):
+    keys = STAGE_SETTINGS[stage]
+    return {key: value for key, value in sorted(config.items())
+            if key in keys or any(k.endswith('_') and key.startswith(k)
+                                  for k in keys)}
+
+def _digest(*parts):
+    text = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+class StageStore:
+    # frame_idx -> record for one stage of one video/config. Records live in
+    # pickled chunks of chunk_size consecutive frame indices, loaded lazily
+    # and rewritten atomically (.tmp + rename) once the run moves past them,
+    # so an interrupted run loses at most the chunk in progress.
+    # Unpickling runs code from the file: only load caches you wrote.
+    def __init__(self, path, chunk_size=256):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.chunks = {}
+        self.dirty = set()
+        os.makedirs(path, exist_ok=True)
+        self.complete = os.path.exists(os.path.join(path, 'COMPLETE'))
+
+    def mark_complete(self):
+        self.flush()
+        open(os.path.join(self.path, 'COMPLETE'), 'w').close()
+        self.complete = True
+
+    def get(self, frame_idx, default=None):
+        return self._chunk(frame_idx // self.chunk_size).get(frame_idx, default)
+
+    def put(self, frame_idx, record):
+        number = frame_idx // self.chunk_size
+        # Moving on to a new chunk: the previous ones are finished
+        if self.dirty - {number}:
+            self.flush(keep=number)
+        self._chunk(number)[frame_idx] = record
+        self.dirty.add(number)
+
+    def items(self, start_frame=0):
+        # (frame_idx, record) in frame order, one chunk in memory at a time
+        numbers = {int(name[6:-4]) for name in os.listdir(self.path)
+                   if name.startswith('chunk-') and name.endswith('.pkl')}
+        for number in sorted(numbers | self.dirty):
+            if (number + 1) * self.chunk_size <= start_frame:
+                continue
+            chunk = self._chunk(number)
+            for frame_idx in sorted(chunk):
+                if frame_idx >= start_frame:
+                    yield frame_idx, chunk[frame_idx]
+
+    def flush(self, keep=None):
+        for number in sorted(self.dirty - {keep}):
+            target = self._chunk_path(number)
+            with open(target + '.tmp', 'wb') as f:
+                pickle.dump(self.chunks[number], f, pickle.HIGHEST_PROTOCOL)
+            os.replace(target + '.tmp', target)
+            # Finished chunks are not kept in memory
+            del self.chunks[number]
+        self.dirty &= {keep}
+
+    def _chunk(self, number):
+        chunk = self.chunks.get(number)
+        if chunk is None:
+            # Access is sequential: drop clean chunks before loading the next
+            for loaded in list(self.chunks):
+                if loaded not in self.dirty:
+                    del self.chunks[loaded]
+            path = self._chunk_path(number)
+            chunk = {}
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    chunk = pickle.load(f)
+            self.chunks[number] = chunk
+        return chunk
+
+    def _chunk_path(self, number):
+        return os.path.join(self.path, f"chunk-{number:06d}.pkl")
+
+
+class ResultCache:
+    # Per-stage cache of detections, tracks (with ball, team and pitch
+    # position) and poses, under root/<video fingerprint>/<stage>-<key>/.
+    # The key covers the stage version and the config it depends on.
+    def __init__(self, root, config, chunk_size=256):
+        self.root = root
+        self.config = config
+        self.chunk_size = chunk_size
+        self.stores = {}
+        self.full_run = True
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def open(self, video_path, full_run=True):
+        # Partial runs (resumed or time-range shards) number their tracks
+        # differently, so they only share detections
+        self.close()
+        self.full_run = full_run
+        video = video_fingerprint(video_path)
+        key = video
+        for stage in STAGES:
+            key = _digest(key, stage, STAGE_VERSIONS[stage],
+                          stage_settings(self.config, stage))
+            self.stores[stage] = StageStore(
+                os.path.join(self.root, video, f"{stage}-{key}"), self.chunk_size)
+
+    @property
+    def replayable(self):
+        # Tracks and poses for a whole run: tactics need no video at all
+        return bool(self.stores) and self.stores['tracks'].complete \
+            and self.stores['poses'].complete
+
+    def detections(self, frame_idx):
+        found = self.stores['detections'].get(frame_idx)
+        self.stats['hits' if found is not None else 'misses'] += 1
+        return found
+
+    def store_detections(self, frame_idx, detections):
+        self.stores['detections'].put(frame_idx, detections)
+
+    def poses(self, frame_idx, tracks):
+        # Cached poses in track order, or None unless every track is cached
+        if not self.full_run:
+            return None
+        cached = self.stores['poses'].get(frame_idx)
+        if cached is None or any(track_id not in cached for track_id in tracks):
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        return [cached[track_id] for track_id in tracks]
+
+    def record(self, frame_idx, timestamp, tracks, poses, ball):
+        if not self.full_run or self.stores['tracks'].complete:
+            return
+        self.stores['tracks'].put(frame_idx, (timestamp, tracks, ball))
+        self.stores['poses'].put(frame_idx, dict(zip(tracks, poses)))
+
+    def replay(self, start_frame=0, end_frame=None):
+        # (frame_idx, timestamp, tracks, poses, ball) in frame order; both
+        # stores hold the same frames since record() writes them together
+        for (frame_idx, (timestamp, tracks, ball)), (_, poses) in zip(
+                self.stores['tracks'].items(start_frame),
+                self.stores['poses'].items(start_frame)):
+            if end_frame is not None and frame_idx >= end_frame:
+                break
+            yield frame_idx, timestamp, tracks, \
+                [poses.get(track_id) for track_id in tracks], ball
+
+    def mark_complete(self):
+        for stage in ('tracks', 'poses'):
+            self.stores[stage].mark_complete()
+
+    def close(self):
+        for store in self.stores.values():
+            store.flush()
+        self.stores = {}
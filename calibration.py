@@ -0,0 +1,191 @@
+import cv2
+import numpy as np
+
+class PitchCalibrator:
+    # Frame -> pitch (metres) homography. The reference view is registered
+    # from configured image/pitch point pairs; later views are registered
+    # against it with ORB features on the white pitch-line mask. The
+    # homography is cached and only re-estimated when a cheap check on a
+    # downscaled frame reports a camera cut (colour histogram change) or a
+    # pan (phase-correlation shift since the last estimate, with players and
+    # ball blanked out so their motion is not taken for the camera's). A new
+    # estimate that maps the reference landmarks off the pitch is rejected
+    # and the last good homography is kept.
+    def __init__(self, points=None, cut_threshold=0.6, pan_threshold=8.0,
+                 pan_response=0.1, check_scale=0.25, min_matches=12,
+                 max_features=1000, pitch_dimensions=(105, 68), pitch_margin=10.0):
+        # points: [[x_px, y_px, x_m, y_m], ...] on the first analyzed frame
+        self.points = np.asarray(points, dtype=np.float32).reshape(-1, 4) \
+            if points else np.zeros((0, 4), dtype=np.float32)
+        self.cut_threshold = cut_threshold  # Histogram correlation below = cut
+        self.pan_threshold = pan_threshold  # Full-resolution pixels
+        self.pan_response = pan_response  # Phase-correlation peak below = no pan
+        self.check_scale = check_scale
+        self.min_matches = min_matches  # RANSAC inliers to accept a registration
+        self.pitch_dimensions = pitch_dimensions
+        self.pitch_margin = pitch_margin  # Metres landmarks may land off the pitch
+        self.orb = cv2.ORB_create(max_features)
+        self.matcher = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
+        self.reset()
+
+    @property
+    def enabled(self):
+        return len(self.points) >= 4
+
+    def reset(self):
+        self.homography = None
+        self.reference = None  # (keypoints, descriptors, frame -> pitch)
+        self._anchor = None  # Downscaled gray frame of the last estimate
+        self._hist = None
+        self.stats = {'cached': 0, 'pan': 0, 'cut': 0, 'failed': 0, 'rejected': 0}
+
+    def update(self, frame, boxes=None):
+        # Returns the frame -> pitch homography, or None while uncalibrated.
+        # boxes: pixel boxes of moving objects to leave out of the pan check
+        if not self.enabled:
+            return None
+        small = cv2.resize(frame, None, fx=self.check_scale, fy=self.check_scale,
+                           interpolation=cv2.INTER_AREA)
+        hist = self._histogram(small)
+        gray = np.float32(cv2.cvtColor(self._blank(small, boxes), cv2.COLOR_BGR2GRAY))
+
+        if self.reference is None:
+            self._set_reference(frame)
+            reason = None
+        elif cv2.compareHist(self._hist, hist, cv2.HISTCMP_CORREL) \
+                < self.cut_threshold:
+            reason = 'cut'
+        elif self.homography is None:
+            reason = 'failed'  # Keep trying to re-register after a bad view
+        else:
+            (dx, dy), response = cv2.phaseCorrelate(self._anchor, gray)
+            shift = np.hypot(dx, dy) / self.check_scale
+            # A weak peak, or a shift that does not line the views up better
+            # than no motion, is something moving in a still view
+            reason = 'pan' if shift > self.pan_threshold and \
+                response >= self.pan_response and \
+                self._aligns(self._anchor, gray, dx, dy) else 'cached'
+
+        self._hist = hist
+        if reason == 'cached':
+            self.stats['cached'] += 1
+            return self.homography
+        if reason is not None:
+            candidates = [self._register(frame)]
+            if reason == 'pan':
+                # Too few line features or a bad fit: treat the pan as a
+                # pure shift
+                candidates.append(self.homography @ np.array(
+                    [[1, 0, -dx / self.check_scale], [0, 1, -dy / self.check_scale],
+                     [0, 0, 1]]))
+            estimated = [h for h in candidates if h is not None]
+            homography = next((h for h in estimated if self._plausible(h)), None)
+            if estimated and homography is None:
+                # Keep the last good estimate and its anchor
+                self.stats['rejected'] += 1
+                return self.homography
+            self.homography = homography
+            self.stats['failed' if homography is None else reason] += 1
+        self._anchor = gray
+        return self.homography
+
+    def project(self, points):
+        # (N, 2) pixel points -> (N, 2) pitch metres, one call per frame
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 1, 2)
+        if self.homography is None or not len(points):
+            return None
+        return cv2.perspectiveTransform(points, self.homography).reshape(-1, 2)
+
+    def locate(self, frame, tracks, ball):
+        # Adds 'pitch' (x, y metres) to copies of the tracks and the ball:
+        # players at the bottom centre of their box, the ball at its centre
+        boxes = np.asarray([p['bbox'] for p in tracks.values()] + [ball['bbox']],
+                           dtype=np.float32).reshape(-1, 4)
+        if self.update(frame, boxes) is None:
+            return tracks, ball
+        feet = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, boxes[:, 3]], axis=1)
+        feet[-1, 1] = (boxes[-1, 1] + boxes[-1, 3]) / 2
+        pitch = self.project(feet).tolist()
+        tracks = {track_id: dict(player, pitch=xy)
+                  for (track_id, player), xy in zip(tracks.items(), pitch)}
+        if ball['confidence'] > 0:
+            ball = dict(ball, pitch=pitch[-1])
+        return tracks, ball
+
+    def _set_reference(self, frame):
+        image, pitch = self.points[:, :2], self.points[:, 2:]
+        homography, _ = cv2.findHomography(image, pitch)
+        if homography is None:
+            raise ValueError("calibration_points do not define a homography")
+        keypoints, descriptors = self.orb.detectAndCompute(self._line_mask(frame), None)
+        self.reference = (keypoints, descriptors, homography)
+        self.homography = homography
+
+    def _register(self, frame):
+        ref_keypoints, ref_descriptors, ref_homography = self.reference
+        keypoints, descriptors = self.orb.detectAndCompute(self._line_mask(frame), None)
+        if descriptors is None or ref_descriptors is None:
+            return None
+        matches = self.matcher.match(descriptors, ref_descriptors)
+        if len(matches) < self.min_matches:
+            return None
+        src = np.float32([keypoints[m.queryIdx].pt for m in matches])
+        dst = np.float32([ref_keypoints[m.trainIdx].pt for m in matches])
+        to_reference, inliers = cv2.findHomography(src, dst, cv2.RANSAC, 5.0)
+        if to_reference is None or inliers.sum() < self.min_matches:
+            return None
+        return ref_homography @ to_reference
+
+    def _plausible(self, homography):
+        # The reference landmarks must stay in front of the camera and land
+        # on the pitch (within pitch_margin metres)
+        image = np.c_[self.points[:, :2], np.ones(len(self.points))]
+        projected = image @ np.asarray(homography, dtype=np.float64).T
+        if not np.isfinite(projected).all() or (projected[:, 2] <= 0).any():
+            return False
+        pitch = projected[:, :2] / projected[:, 2:]
+        length, width = self.pitch_dimensions
+        return bool(((pitch >= -self.pitch_margin) &
+                     (pitch <= np.array([length, width]) + self.pitch_margin)).all())
+
+    @staticmethod
+    def _aligns(anchor, gray, dx, dy, gain=0.9):
+        # Mean difference over the overlap with the anchor shifted by
+        # (dx, dy), against the views compared as they are
+        height, width = gray.shape
+        shifted = cv2.warpAffine(anchor, np.float32([[1, 0, dx], [0, 1, dy]]),
+                                 (width, height))
+        x0, x1 = max(int(np.ceil(dx)), 0), width + min(int(np.floor(dx)), 0)
+        y0, y1 = max(int(np.ceil(dy)), 0), height + min(int(np.floor(dy)), 0)
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return False
+        moved = np.abs(gray[y0:y1, x0:x1] - shifted[y0:y1, x0:x1]).mean()
+        still = np.abs(gray[y0:y1, x0:x1] - anchor[y0:y1, x0:x1]).mean()
+        return moved < gain * still
+
+    def _blank(self, small, boxes):
+        # Paint the boxes (full-resolution pixels) with the frame's median
+        # colour, one pixel wider to cover downscaling blur
+        if boxes is None or not len(boxes):
+            return small
+        small = small.copy()
+        fill = np.median(small.reshape(-1, 3), axis=0)
+        height, width = small.shape[:2]
+        scaled = np.asarray(boxes, dtype=np.float64) * self.check_scale
+        for x1, y1, x2, y2 in scaled.astype(int):
+            small[max(y1 - 1, 0):min(y2 + 2, height),
+                  max(x1 - 1, 0):min(x2 + 2, width)] = fill
+        return small
+
+    @staticmethod
+    def _line_mask(frame):
+        # White, unsaturated pixels: pitch markings (and some noise)
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        mask = cv2.inRange(hsv, (0, 0, 180), (180, 60, 255))
+        return cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+
+    @staticmethod
+    def _histogram(small):
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        hist = cv2.calcHist([hsv], [0, 1], None, [30, 32], [0, 180, 0, 256])
+        return cv2.normalize(hist, hist).flatten()
@@ -1,42 +1,74 @@
-
-import cv2
-from ultralytics import YOLO
-import numpy as np
-import tempfile
-
-class PlayerDetector:
-    def __init__(self):
-        self.model = YOLO('yolov8s.pt')  # Load pretrained model
-        self.class_ids = [0]  # Person class in COCO
-        
-    def detect(self, frame):
-        import os
-        # Save frame to a temporary file to avoid numpy ambiguity in YOLO
-        with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp:
-            cv2.imwrite(tmp.name, frame)
-            tmp_path = tmp.name
-
-        results = self.model.predict(source=tmp_path, verbose=False)
-
-        detections = []
-        # Handle both single and list outputs
-        if not isinstance(results, list):
-            results = [results]
-        for result in results:
-            boxes = getattr(result, 'boxes', None)
-            if boxes is None and hasattr(result, '__getitem__'):
-                try:
-                    boxes = result[0].boxes
-                except Exception:
-                    continue
-            if boxes is not None:
-                for box in boxes:
-                    if int(box.cls) in self.class_ids and box.conf > 0.5:
-                        x1, y1, x2, y2 = map(int, box.xyxy[0])
-                        detections.append({
-                            'bbox': [x1, y1, x2, y2],
-                            'confidence': float(box.conf)
-                        })
-        # Remove the temp file
-        os.remove(tmp_path)
-        return detections
\ No newline at end of file
+import numpy as np
+
+PERSON_CLASS = 0  # COCO person
+BALL_CLASS = 32  # COCO sports ball
+
+def split_detections(detections):
+    # (players, ball candidates) from one frame's detections; None when
+    # detection was skipped for the frame
+    if detections is None:
+        return None, None
+    players = [d for d in detections if d.get('class_id', PERSON_CLASS) == PERSON_CLASS]
+    balls = [d for d in detections if d.get('class_id') == BALL_CLASS]
+    return players, balls
+
+class PlayerDetector:
+    def __init__(self, batch_size=8, confidence=0.5, detect_ball=False,
+                 ball_confidence=0.25):
+        from ultralytics import YOLO  # Imported here so stub detectors need no torch
+        self.model = YOLO('yolov8s.pt')  # Load pretrained model
+        self.class_ids = [PERSON_CLASS]  # Person class in COCO
+        self.batch_size = batch_size
+        self.confidence = confidence
+        # Sports-ball boxes come out of the same inference pass
+        self.class_confidence = {PERSON_CLASS: confidence}
+        if detect_ball:
+            self.class_ids.append(BALL_CLASS)
+            self.class_confidence[BALL_CLASS] = ball_confidence
+
+    def detect(self, frame):
+        return self.detect_batch([frame])[0]
+
+    def detect_batch(self, frames):
+        # Frames are handed to YOLO in memory as a list of BGR arrays (a list
+        # also avoids the numpy truth-value ambiguity in predict's source check)
+        detections = []
+        for start in range(0, len(frames), self.batch_size):
+            chunk = list(frames[start:start + self.batch_size])
+            results = self.model.predict(source=chunk, verbose=False)
+            # Handle both single and list outputs
+            if not isinstance(results, list):
+                results = [results]
+            detections.extend(self._parse_result(r) for r in results)
+        return detections
+
+    def _parse_result(self, result):
+        boxes = getattr(result, 'boxes', None)
+        if boxes is None and hasattr(result, '__getitem__'):
+            try:
+                boxes = result[0].boxes
+            except Exception:
+                return []
+        if boxes is None or len(boxes) == 0:
+            return []
+
+        cls = self._to_numpy(boxes.cls).astype(int)
+        conf = self._to_numpy(boxes.conf)
+        xyxy = self._to_numpy(boxes.xyxy).astype(int)
+        threshold = np.full(len(cls), self.confidence)
+        for class_id, class_conf in self.class_confidence.items():
+            threshold[cls == class_id] = class_conf
+        keep = np.isin(cls, self.class_ids) & (conf > threshold)
+
+        return [
+            {'bbox': [int(v) for v in box], 'confidence': float(c),
+             'class_id': int(k)}
+            for box, c, k in zip(xyxy[keep], conf[keep], cls[keep])
+        ]
+
+    @staticmethod
+    def _to_numpy(values):
+        # Boxes hold torch tensors (possibly on GPU); fall back to plain arrays
+        if hasattr(values, 'cpu'):
+            values = values.cpu().numpy()
+        return np.asarray(values)
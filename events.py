@@ -0,0 +1,173 @@
+import numpy as np
+
+from keypoints import JOINT_NAMES, LANDMARK_INDEX, NUM_LANDMARKS, as_array, \
+    joint_angles, trunk_lean
+
+LEGS = ('left', 'right')
+KNEES = [JOINT_NAMES.index('left_knee'), JOINT_NAMES.index('right_knee')]
+FEET = [LANDMARK_INDEX['LEFT_FOOT_INDEX'], LANDMARK_INDEX['RIGHT_FOOT_INDEX']]
+
+class PoseEventDetector:
+    # Kicks/shots and dribbles from short pose sequences. Each track keeps a
+    # ring buffer of its last `window` poses in frame pixels, and joint
+    # angles and angular velocities are computed for all buffered tracks at
+    # once. A kick is a fast knee extension with that foot at the ball (a
+    # shot when faster still); a dribble is the ball staying at a moving
+    # player's feet for dribble_duration seconds. Distances and speeds are in
+    # bbox heights so they do not depend on how far the player is from the
+    # camera. A track stays quiet for `cooldown` seconds after an event.
+    def __init__(self, window=8, min_visibility=0.5, kick_velocity=400.0,
+                 shot_velocity=800.0, recent_steps=2, ball_distance=0.35,
+                 dribble_speed=0.5, dribble_duration=1.0, max_gap=0.5,
+                 cooldown=1.0, max_lean=10.0, ttl=25, capacity=32):
+        self.window = window
+        self.min_visibility = min_visibility
+        self.kick_velocity = kick_velocity  # deg/s of knee extension
+        self.shot_velocity = shot_velocity  # deg/s
+        self.recent_steps = recent_steps  # Newest steps searched for a kick
+        self.ball_distance = ball_distance  # Foot to ball, bbox heights
+        self.dribble_speed = dribble_speed  # Bbox heights per second
+        self.dribble_duration = dribble_duration  # Seconds
+        self.max_gap = max_gap  # Seconds between samples that keep a dribble
+        self.cooldown = cooldown  # Seconds
+        self.max_lean = max_lean  # Trunk lean (deg) above which kicks get feedback
+        self.ttl = ttl  # Updates before an unseen track's slot is freed
+        self.capacity = capacity
+        self.reset()
+
+    def reset(self):
+        self.slots = {}  # track_id -> slot
+        self.tick = 0
+        self._allocate(self.capacity)
+
+    def _allocate(self, capacity):
+        self.ids = np.full(capacity, -1, dtype=np.int64)
+        self.points = np.full((capacity, self.window, NUM_LANDMARKS, 2), np.nan,
+                              dtype=np.float32)
+        self.times = np.full((capacity, self.window), np.nan)
+        self.feet = np.full((capacity, self.window, 2), np.nan)  # Bbox bottom centre
+        self.head = np.zeros(capacity, dtype=np.int64)  # Next ring position
+        self.last_seen = np.zeros(capacity, dtype=np.int64)
+        self.quiet_until = np.full(capacity, -np.inf)
+        self.dribble_run = np.zeros(capacity)  # Seconds with the ball at the feet
+
+    def _grow(self):
+        old = (self.ids, self.points, self.times, self.feet, self.head,
+               self.last_seen, self.quiet_until, self.dribble_run)
+        self._allocate(2 * len(self.ids))
+        for new, values in zip((self.ids, self.points, self.times, self.feet,
+                                self.head, self.last_seen, self.quiet_until,
+                                self.dribble_run), old):
+            new[:len(values)] = values
+
+    def update(self, frame_idx, timestamp, players, ball):
+        # players: frame result dicts (track_id, bbox, pose). Returns the
+        # events that end at this frame.
+        self.tick += 1
+        self._expire()
+        posed = [p for p in players if p.get('pose')]
+        if not posed:
+            return []
+        slots = np.array([self._slot(p['track_id']) for p in posed])
+        boxes = np.array([p['bbox'] for p in posed], dtype=np.float64)
+        keypoints = np.stack([as_array(p['pose']['keypoints']) for p in posed])
+
+        # Crop-normalized landmarks -> frame pixels; hidden ones become NaN
+        size = np.maximum(boxes[:, 2:] - boxes[:, :2], 1.0)
+        points = boxes[:, None, :2] + keypoints[..., :2] * size[:, None, :]
+        points[keypoints[..., 3] < self.min_visibility] = np.nan
+        gap = timestamp - self.times[slots, (self.head[slots] - 1) % self.window]
+        head = self.head[slots]
+        self.points[slots, head] = points
+        self.times[slots, head] = timestamp
+        self.feet[slots, head] = np.stack(
+            [(boxes[:, 0] + boxes[:, 2]) / 2, boxes[:, 3]], axis=1)
+        self.head[slots] = (head + 1) % self.window
+        self.last_seen[slots] = self.tick
+
+        # Buffers in time order, oldest first: (tracks, window, ...)
+        order = (self.head[slots, None] + np.arange(self.window)) % self.window
+        times = self.times[slots[:, None], order]
+        angles = joint_angles(self.points[slots[:, None], order])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            velocity = np.diff(angles, axis=1) / np.diff(times, axis=1)[..., None]
+        knee_velocity = _nanmax(velocity[:, -self.recent_steps:, KNEES], axis=1)
+
+        heights = size[:, 1]
+        if ball and ball.get('confidence', 0) > 0:
+            x1, y1, x2, y2 = ball['bbox']
+            ball_centre = np.array([(x1 + x2) / 2, (y1 + y2) / 2])
+            foot_distance = np.linalg.norm(
+                points[:, FEET] - ball_centre, axis=2) / heights[:, None]
+        else:
+            foot_distance = np.full((len(posed), 2), np.nan)
+        at_ball = foot_distance <= self.ball_distance
+
+        # Player speed from the oldest buffered bbox to the newest one
+        feet = self.feet[slots[:, None], order]
+        oldest = np.argmax(~np.isnan(times), axis=1)
+        rows = np.arange(len(slots))
+        span = times[:, -1] - times[rows, oldest]
+        moved = np.linalg.norm(feet[:, -1] - feet[rows, oldest], axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            speed = np.where(span > 0, moved / span / heights, 0.0)
+
+        kicking = at_ball & (knee_velocity >= self.kick_velocity)
+        dribbling = at_ball.any(axis=1) & (speed >= self.dribble_speed) & \
+            (gap <= self.max_gap)
+        run = self.dribble_run[slots] = np.where(
+            dribbling, self.dribble_run[slots] + np.nan_to_num(gap), 0.0)
+        lean = trunk_lean(points)
+        quiet = timestamp < self.quiet_until[slots]
+
+        events = []
+        for i in np.flatnonzero(~quiet & (kicking.any(axis=1) |
+                                          (run >= self.dribble_duration))):
+            event = {'track_id': posed[i]['track_id'], 'frame': frame_idx,
+                     'time': timestamp,
+                     'body_lean': None if np.isnan(lean[i]) else float(lean[i])}
+            if kicking[i].any():
+                leg = int(np.argmax(np.where(kicking[i], knee_velocity[i], -np.inf)))
+                event['type'] = 'shot' if knee_velocity[i, leg] >= self.shot_velocity \
+                    else 'kick'
+                event['leg'] = LEGS[leg]
+                event['knee_velocity'] = float(knee_velocity[i, leg])
+                if event['body_lean'] is not None and event['body_lean'] > self.max_lean:
+                    event['feedback'] = (
+                        f"{event['body_lean'] - self.max_lean:.0f}° excessive "
+                        f"body lean during {event['type']}")
+            else:
+                event['type'] = 'dribble'
+                event['duration'] = float(run[i])
+                self.dribble_run[slots[i]] = 0.0
+            self.quiet_until[slots[i]] = timestamp + self.cooldown
+            events.append(event)
+        return events
+
+    def _slot(self, track_id):
+        slot = self.slots.get(track_id)
+        if slot is None:
+            free = np.flatnonzero(self.ids < 0)
+            if not len(free):
+                self._grow()
+                free = np.flatnonzero(self.ids < 0)
+            slot = self.slots[track_id] = int(free[0])
+            self.ids[slot] = track_id
+        return slot
+
+    def _expire(self):
+        # Free the slots of tracks unseen for ttl updates
+        stale = np.flatnonzero((self.ids >= 0) & (self.tick - self.last_seen > self.ttl))
+        for slot in stale:
+            del self.slots[int(self.ids[slot])]
+        self.ids[stale] = -1
+        self.points[stale] = np.nan
+        self.times[stale] = np.nan
+        self.feet[stale] = np.nan
+        self.head[stale] = 0
+        self.quiet_until[stale] = -np.inf
+        self.dribble_run[stale] = 0.0
+
+def _nanmax(values, axis):
+    # nanmax that returns -inf instead of warning on all-NaN slices
+    return np.where(np.isnan(values), -np.inf, values).max(axis=axis)
@@ -0,0 +1,101 @@
+from collections.abc import Mapping
+import numpy as np
+
+# MediaPipe PoseLandmark order
+LANDMARK_NAMES = [
+    'NOSE', 'LEFT_EYE_INNER', 'LEFT_EYE', 'LEFT_EYE_OUTER', 'RIGHT_EYE_INNER',
+    'RIGHT_EYE', 'RIGHT_EYE_OUTER', 'LEFT_EAR', 'RIGHT_EAR', 'MOUTH_LEFT',
+    'MOUTH_RIGHT', 'LEFT_SHOULDER', 'RIGHT_SHOULDER', 'LEFT_ELBOW',
+    'RIGHT_ELBOW', 'LEFT_WRIST', 'RIGHT_WRIST', 'LEFT_PINKY', 'RIGHT_PINKY',
+    'LEFT_INDEX', 'RIGHT_INDEX', 'LEFT_THUMB', 'RIGHT_THUMB', 'LEFT_HIP',
+    'RIGHT_HIP', 'LEFT_KNEE', 'RIGHT_KNEE', 'LEFT_ANKLE', 'RIGHT_ANKLE',
+    'LEFT_HEEL', 'RIGHT_HEEL', 'LEFT_FOOT_INDEX', 'RIGHT_FOOT_INDEX'
+]
+LANDMARK_INDEX = {name: i for i, name in enumerate(LANDMARK_NAMES)}
+FIELDS = ('x', 'y', 'z', 'visibility')
+NUM_LANDMARKS = len(LANDMARK_NAMES)
+
+def as_array(keypoints):
+    # (33, 4) float32 from a KeypointView, legacy keypoint dict or array
+    if isinstance(keypoints, KeypointView):
+        return keypoints.array
+    if isinstance(keypoints, Mapping):
+        return np.array([[keypoints[name][f] for f in FIELDS]
+                         for name in LANDMARK_NAMES], dtype=np.float32)
+    return np.asarray(keypoints, dtype=np.float32)
+
+def pose_metrics(keypoints):
+    # Works on any (..., 33, 4) stack: one pose, a frame, or a whole match
+    kp = np.asarray(keypoints, dtype=np.float32)
+    left_shoulder = kp[..., LANDMARK_INDEX['LEFT_SHOULDER'], :3]
+    right_shoulder = kp[..., LANDMARK_INDEX['RIGHT_SHOULDER'], :3]
+    left_hip = kp[..., LANDMARK_INDEX['LEFT_HIP'], :3]
+    right_hip = kp[..., LANDMARK_INDEX['RIGHT_HIP'], :3]
+
+    # Body lean: shoulder midpoint vs hip midpoint along x
+    body_lean = (left_shoulder[..., 0] + right_shoulder[..., 0]) / 2 \
+        - (left_hip[..., 0] + right_hip[..., 0]) / 2
+
+    # Hip-shoulder separation (for torque analysis)
+    hip_torque = np.abs(np.linalg.norm(left_hip - left_shoulder, axis=-1)
+                        - np.linalg.norm(right_hip - right_shoulder, axis=-1))
+
+    return {'body_lean': body_lean, 'hip_torque': hip_torque}
+
+# Joint -> (proximal, joint, distal) landmarks; the angle is at the middle one
+JOINTS = {
+    'left_knee': ('LEFT_HIP', 'LEFT_KNEE', 'LEFT_ANKLE'),
+    'right_knee': ('RIGHT_HIP', 'RIGHT_KNEE', 'RIGHT_ANKLE'),
+    'left_hip': ('LEFT_SHOULDER', 'LEFT_HIP', 'LEFT_KNEE'),
+    'right_hip': ('RIGHT_SHOULDER', 'RIGHT_HIP', 'RIGHT_KNEE'),
+    'left_elbow': ('LEFT_SHOULDER', 'LEFT_ELBOW', 'LEFT_WRIST'),
+    'right_elbow': ('RIGHT_SHOULDER', 'RIGHT_ELBOW', 'RIGHT_WRIST'),
+}
+JOINT_NAMES = list(JOINTS)
+_JOINT_INDEX = np.array([[LANDMARK_INDEX[name] for name in JOINTS[joint]]
+                         for joint in JOINT_NAMES])
+
+def joint_angles(points):
+    # (..., 33, >=2) landmark coordinates -> (..., len(JOINTS)) angles in
+    # degrees (180 = straight limb) from the first two coordinates. Pass
+    # pixel coordinates: normalized crop coordinates distort angles when the
+    # crop is not square.
+    xy = np.asarray(points, dtype=np.float32)[..., :2]
+    a = xy[..., _JOINT_INDEX[:, 0], :] - xy[..., _JOINT_INDEX[:, 1], :]
+    b = xy[..., _JOINT_INDEX[:, 2], :] - xy[..., _JOINT_INDEX[:, 1], :]
+    cos = (a * b).sum(axis=-1) / (
+        np.linalg.norm(a, axis=-1) * np.linalg.norm(b, axis=-1) + 1e-9)
+    return np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+
+def trunk_lean(points):
+    # (..., 33, >=2) -> degrees between the hip-to-shoulder line and vertical
+    xy = np.asarray(points, dtype=np.float32)[..., :2]
+    shoulders = (xy[..., LANDMARK_INDEX['LEFT_SHOULDER'], :] +
+                 xy[..., LANDMARK_INDEX['RIGHT_SHOULDER'], :]) / 2
+    hips = (xy[..., LANDMARK_INDEX['LEFT_HIP'], :] +
+            xy[..., LANDMARK_INDEX['RIGHT_HIP'], :]) / 2
+    trunk = shoulders - hips
+    # Image y points down, so an upright trunk is (0, -1)
+    return np.degrees(np.arctan2(np.abs(trunk[..., 0]), -trunk[..., 1]))
+
+
+class KeypointView(Mapping):
+    # Read-only dict-style view (name -> {'x', 'y', 'z', 'visibility'}) over
+    # a (33, 4) float32 array, for code written against the old dicts
+    __slots__ = ('array',)
+
+    def __init__(self, array):
+        self.array = np.asarray(array, dtype=np.float32)
+
+    def __getitem__(self, name):
+        row = self.array[LANDMARK_INDEX[name]]
+        return {f: float(v) for f, v in zip(FIELDS, row)}
+
+    def __iter__(self):
+        return iter(LANDMARK_NAMES)
+
+    def __len__(self):
+        return NUM_LANDMARKS
+
+    def to_dict(self):
+        return {name: self[name] for name in LANDMARK_NAMES}
\ No newline at end of file
@@ -0,0 +1,353 @@
+import os
+import tempfile
+
+import numpy as np
+
+SUMMARY_FIELDS = ('distance', 'moving_time', 'max_speed', 'max_acceleration',
+                  'max_deceleration', 'sprints')
+# Totals that add up when records of one track are merged (the rest are maxima)
+ADDITIVE = np.array([True, True, False, False, False, True])
+# Per-track records: heatmap cells of track i are cells[offsets[i]:offsets[i + 1]]
+RECORD_KEYS = ('track_ids', 'totals', 'offsets', 'cells', 'counts')
+
+class KinematicsTracker:
+    # Per-track movement from calibrated pitch positions (metres). Position
+    # histories live in preallocated (tracks, window) arrays that double when
+    # a new track needs a slot. Velocity is a trailing masked mean of the
+    # per-step velocities over `smoothing` steps; acceleration, distance and
+    # sprints follow from it in one vectorized pass over all tracks.
+    # In streaming mode a full history is folded into running totals and
+    # only the samples the smoothing needs are kept, and tracks unseen for
+    # ttl updates are retired to a compact record (totals plus the heatmap
+    # cells they visited) so their slot is reused. Past max_retired records
+    # they are written to a temporary file, so memory follows the live
+    # tracks, not match length. Otherwise histories grow and summary()
+    # recomputes over the whole match. Occupancy heatmaps are accumulated
+    # per frame.
+    def __init__(self, pitch_dimensions=(105, 68), heatmap_cell=1.0,
+                 smoothing=5, sprint_speed=7.0, sprint_duration=1.0,
+                 max_speed=12.0, max_gap=1.0, window=256, streaming=True,
+                 ttl=25, capacity=32, max_retired=1024):
+        self.pitch_length, self.pitch_width = pitch_dimensions
+        self.heatmap_cell = heatmap_cell
+        self.heatmap_shape = (int(np.ceil(self.pitch_width / heatmap_cell)),
+                              int(np.ceil(self.pitch_length / heatmap_cell)))
+        self.smoothing = smoothing  # Steps in the velocity average
+        self.sprint_speed = sprint_speed  # m/s
+        self.sprint_duration = sprint_duration  # Seconds above sprint_speed
+        self.max_speed = max_speed  # m/s; faster steps are tracking jumps
+        self.max_gap = max_gap  # Seconds; longer gaps break the history
+        self.keep = smoothing + 1  # Samples carried over a fold
+        self.window = max(window, 2 * self.keep)
+        self.streaming = streaming
+        self.ttl = ttl  # Updates before an unseen track is retired
+        self.capacity = capacity
+        self.max_retired = max_retired  # Retired records kept in memory
+        self._spill = None
+        self.reset()
+
+    def reset(self):
+        self.slots = {}  # track_id -> slot
+        self.retired = {}  # track_id -> (totals, heatmap cells, counts)
+        if self._spill is not None:
+            self._spill.cleanup()
+        self._spill = None  # Temporary directory of spilled retired records
+        self.spilled = []  # Their files, oldest first
+        self.tick = 0
+        self._allocate(self.capacity, self.window)
+
+    def _allocate(self, tracks, length):
+        self.ids = np.full(tracks, -1, dtype=np.int64)
+        self.times = np.zeros((tracks, length))
+        self.positions = np.zeros((tracks, length, 2))
+        self.lengths = np.zeros(tracks, dtype=np.int64)
+        self.start = np.ones(tracks, dtype=np.int64)  # First uncounted sample
+        self.sprint_run = np.zeros(tracks)  # Seconds of the sprint in progress
+        self.totals = np.zeros((tracks, len(SUMMARY_FIELDS)))
+        self.heatmaps = np.zeros((tracks,) + self.heatmap_shape, dtype=np.int32)
+        self.last_seen = np.zeros(tracks, dtype=np.int64)
+
+    def _grow(self, tracks, length):
+        old = (self.ids, self.times, self.positions, self.lengths, self.start,
+               self.sprint_run, self.totals, self.heatmaps, self.last_seen)
+        self._allocate(tracks, length)
+        for new, values in zip((self.ids, self.times, self.positions, self.lengths,
+                                self.start, self.sprint_run, self.totals,
+                                self.heatmaps, self.last_seen), old):
+            new[tuple(slice(0, n) for n in values.shape)] = values
+
+    def update(self, timestamp, players):
+        # players: dicts with track_id and (optionally) 'pitch'. Returns
+        # {track_id: smoothed speed in m/s} for the located players.
+        self.tick += 1
+        if self.streaming:
+            self._expire()
+        located = [p for p in players if p.get('pitch') is not None]
+        if not located:
+            return {}
+        track_ids = [p['track_id'] for p in located]
+        slots = np.array([self._slot(track_id) for track_id in track_ids])
+        self.last_seen[slots] = self.tick
+        points = np.array([p['pitch'] for p in located], dtype=np.float64)
+
+        full = slots[self.lengths[slots] == self.times.shape[1]]
+        if len(full):
+            if self.streaming:
+                self._fold(full)
+            else:
+                self._grow(len(self.ids), 2 * self.times.shape[1])
+        index = self.lengths[slots]
+        self.times[slots, index] = timestamp
+        self.positions[slots, index] = points
+        self.lengths[slots] += 1
+
+        cells = np.floor(points / self.heatmap_cell).astype(np.int64)
+        rows = np.clip(cells[:, 1], 0, self.heatmap_shape[0] - 1)
+        cols = np.clip(cells[:, 0], 0, self.heatmap_shape[1] - 1)
+        np.add.at(self.heatmaps, (slots, rows, cols), 1)
+
+        speed = self._current_speed(slots)
+        return {track_id: float(s) for track_id, s in zip(track_ids, speed)
+                if not np.isnan(s)}
+
+    def summary(self):
+        # {track_id: totals} including the samples not folded yet and the
+        # retired tracks
+        track_ids, totals = self._records()[:2]
+        summary = {}
+        for track_id, row in zip(track_ids.tolist(), totals):
+            values = dict(zip(SUMMARY_FIELDS, row.tolist()))
+            values['sprints'] = int(values['sprints'])
+            values['avg_speed'] = values['distance'] / values['moving_time'] \
+                if values['moving_time'] else 0.0
+            summary[track_id] = values
+        return summary
+
+    def heatmap(self, track_ids=None):
+        # Occupancy counts summed over the given tracks (all by default);
+        # row 0 is pitch y=0
+        ids, _, offsets, cells, counts = self._records()
+        owner = np.repeat(ids, np.diff(offsets))
+        keep = slice(None) if track_ids is None else np.isin(owner, list(track_ids))
+        grid = np.zeros(self.heatmap_shape, dtype=np.int64)
+        np.add.at(grid.reshape(-1), cells[keep], counts[keep])
+        return grid
+
+    def history(self, track_id):
+        # (times, positions) held for a live track: the whole match unless
+        # streaming, where only the samples since the last fold remain
+        slot = self.slots[track_id]
+        n = self.lengths[slot]
+        return self.times[slot, :n].copy(), self.positions[slot, :n].copy()
+
+    def save(self, path):
+        # Totals per track and sparse heatmaps (see RECORD_KEYS and
+        # load_heatmaps); the file size follows the cells visited
+        records = dict(zip(RECORD_KEYS, self._records()))
+        np.savez_compressed(
+            path, fields=np.array(SUMMARY_FIELDS), heatmap_cell=self.heatmap_cell,
+            heatmap_shape=np.array(self.heatmap_shape), **records)
+
+    def _records(self):
+        # Every track seen, live ones first, as RECORD_KEYS arrays. A track
+        # that came back after its record was spilled has two records; they
+        # are merged.
+        live = np.flatnonzero(self.ids >= 0)
+        totals, _ = self._metrics(live)
+        heatmaps = self.heatmaps[live].reshape(len(live), self.heatmaps[0].size)
+        rows, cells = np.nonzero(heatmaps)
+        parts = [(self.ids[live], totals,
+                  np.searchsorted(rows, np.arange(len(live) + 1)), cells,
+                  heatmaps[rows, cells])]
+        for path in self.spilled:
+            with np.load(path) as data:
+                parts.append(tuple(data[key] for key in RECORD_KEYS))
+        parts.append(_pack(self.retired))
+        return _merge(parts, self.heatmap_shape)
+
+    def _spill_retired(self):
+        # Write the retired records to a file and forget them, keeping
+        # memory bounded by max_retired however many tracks a match has
+        if self._spill is None:
+            self._spill = tempfile.TemporaryDirectory(prefix='kinematics-')
+        path = os.path.join(self._spill.name, f"retired-{len(self.spilled):05d}.npz")
+        np.savez(path, **dict(zip(RECORD_KEYS, _pack(self.retired))))
+        self.spilled.append(path)
+        self.retired = {}
+
+    def _slot(self, track_id):
+        slot = self.slots.get(track_id)
+        if slot is None:
+            free = np.flatnonzero(self.ids < 0)
+            if not len(free):
+                self._grow(2 * len(self.ids), self.times.shape[1])
+                free = np.flatnonzero(self.ids < 0)
+            slot = self.slots[track_id] = int(free[0])
+            self.ids[slot] = track_id
+            if track_id in self.retired:
+                # A retired track seen again continues from its record
+                totals, cells, counts = self.retired.pop(track_id)
+                self.totals[slot] = totals
+                self.heatmaps[slot].reshape(-1)[cells] = counts
+        return slot
+
+    def _expire(self):
+        # Retire tracks unseen for ttl updates and free their slots
+        stale = np.flatnonzero((self.ids >= 0) & (self.tick - self.last_seen > self.ttl))
+        if not len(stale):
+            return
+        totals, _ = self._metrics(stale)
+        for slot, row in zip(stale, totals):
+            track_id = int(self.ids[slot])
+            cells = np.flatnonzero(self.heatmaps[slot])
+            self.retired[track_id] = (row, cells, self.heatmaps[slot].reshape(-1)[cells])
+            del self.slots[track_id]
+        self.ids[stale] = -1
+        self.lengths[stale] = 0
+        self.start[stale] = 1
+        self.sprint_run[stale] = 0.0
+        self.totals[stale] = 0.0
+        self.heatmaps[stale] = 0
+        if len(self.retired) > self.max_retired:
+            self._spill_retired()
+
+    def _fold(self, slots):
+        # Move the counted part of full histories into the running totals and
+        # keep the last samples so smoothing continues seamlessly
+        self.totals[slots], self.sprint_run[slots] = self._metrics(slots)
+        length = self.times.shape[1]
+        self.times[slots, :self.keep] = self.times[slots, length - self.keep:]
+        self.positions[slots, :self.keep] = self.positions[slots, length - self.keep:]
+        self.lengths[slots] = self.keep
+        self.start[slots] = self.keep
+
+    def _steps(self, times, positions, valid):
+        # Per-step velocity and its trailing masked mean over `smoothing` steps
+        dt = np.diff(times, axis=1)
+        velocity = np.diff(positions, axis=1) / np.where(dt > 0, dt, np.inf)[..., None]
+        ok = valid[:, 1:] & (dt > 0) & (dt <= self.max_gap) & \
+            (np.linalg.norm(velocity, axis=2) <= self.max_speed)
+        velocity = np.where(ok[..., None], velocity, 0.0)
+        sums = np.cumsum(velocity, axis=1)
+        counts = np.cumsum(ok, axis=1)
+        w = self.smoothing
+        sums[:, w:] -= sums[:, :-w].copy()
+        counts[:, w:] -= counts[:, :-w].copy()
+        smoothed = sums / np.maximum(counts, 1)[..., None]
+        speed = np.where(ok, np.linalg.norm(smoothed, axis=2), np.nan)
+        return dt, speed, ok
+
+    def _current_speed(self, slots):
+        # Smoothed speed at each slot's newest sample
+        index = self.lengths[slots, None] - 1 - np.arange(self.smoothing + 1)[::-1]
+        valid = index >= 0
+        index = np.maximum(index, 0)
+        _, speed, _ = self._steps(self.times[slots[:, None], index],
+                                  self.positions[slots[:, None], index], valid)
+        return speed[:, -1]
+
+    def _metrics(self, slots):
+        # Running totals plus the samples in [start, length) of each slot,
+        # and the sprint run in progress at the last sample
+        if not len(slots):
+            return np.zeros((0, len(SUMMARY_FIELDS))), np.zeros(0)
+        n = int(self.lengths[slots].max())
+        times, positions = self.times[slots, :n], self.positions[slots, :n]
+        index = np.arange(n)
+        in_range = index < self.lengths[slots, None]
+        dt, speed, ok = self._steps(times, positions, in_range)
+        # Step i ends at sample i + 1
+        counted = in_range[:, 1:] & (index[1:] >= self.start[slots, None])
+        moving = counted & ok
+
+        accel = np.diff(speed, axis=1, prepend=np.nan) / np.where(dt > 0, dt, np.inf)
+        accel = np.where(moving, accel, np.nan)
+        distance = np.where(moving, speed * dt, 0.0).sum(axis=1)
+        moving_time = np.where(moving, dt, 0.0).sum(axis=1)
+        max_speed = _nanmax(np.where(moving, speed, np.nan))
+        max_accel = _nanmax(accel)
+        max_decel = _nanmax(-accel)
+
+        # Sprint runs: seconds above sprint_speed since the last slow or
+        # invalid step, with the run carried over from the previous fold
+        fast = moving & (speed >= self.sprint_speed)
+        elapsed = np.cumsum(np.where(fast, dt, 0.0), axis=1)
+        reset = counted & ~fast
+        base = np.maximum.accumulate(np.where(reset, elapsed, 0.0), axis=1)
+        leading = np.cumsum(reset, axis=1) == 0
+        run = elapsed - base + np.where(leading, self.sprint_run[slots, None], 0.0)
+        sprints = (fast & (run >= self.sprint_duration) &
+                   (run - dt < self.sprint_duration)).sum(axis=1)
+        # Slots without a new counted step keep their carried run
+        rows = np.arange(len(slots))
+        last = np.maximum(self.lengths[slots] - 2, 0)
+        stepped = (self.lengths[slots] >= 2) & counted[rows, last] if n > 1 \
+            else np.zeros(len(slots), dtype=bool)
+        carry = np.where(stepped, np.where(fast[rows, last], run[rows, last], 0.0),
+                         self.sprint_run[slots])
+
+        totals = self.totals[slots].copy()
+        totals[:, 0] += distance
+        totals[:, 1] += moving_time
+        totals[:, 2] = np.fmax(totals[:, 2], max_speed)
+        totals[:, 3] = np.fmax(totals[:, 3], max_accel)
+        totals[:, 4] = np.fmax(totals[:, 4], max_decel)
+        totals[:, 5] += sprints
+        return totals, carry
+
+def _pack(retired):
+    # {track_id: (totals, cells, counts)} -> RECORD_KEYS arrays
+    records = list(retired.values())
+    sizes = [len(cells) for _, cells, _ in records]
+    return (np.fromiter(retired, dtype=np.int64, count=len(records)),
+            np.reshape([totals for totals, _, _ in records], (-1, len(SUMMARY_FIELDS))),
+            np.concatenate([[0], np.cumsum(sizes, dtype=np.int64)]),
+            np.concatenate([cells for _, cells, _ in records] + [np.zeros(0, np.int64)]),
+            np.concatenate([counts for _, _, counts in records] + [np.zeros(0, np.int32)]))
+
+def _merge(parts, heatmap_shape):
+    # Concatenate record parts, combining records that share a track id:
+    # additive totals are summed, maxima kept and heatmap counts summed
+    ids = np.concatenate([part[0] for part in parts])
+    totals = np.concatenate([part[1] for part in parts])
+    cells = np.concatenate([part[3] for part in parts])
+    counts = np.concatenate([part[4] for part in parts])
+    owner = np.repeat(np.arange(len(ids)), np.concatenate(
+        [np.diff(part[2]) for part in parts]))
+    unique, first, inverse = np.unique(ids, return_index=True, return_inverse=True)
+    if len(unique) == len(ids):
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(owner, minlength=len(ids)))])
+        return ids, totals, offsets, cells, counts
+    # Merged tracks in order of first appearance
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    target = rank[inverse.ravel()]
+    merged = np.zeros((len(unique), len(SUMMARY_FIELDS)))
+    np.add.at(merged, target, np.where(ADDITIVE, totals, 0.0))
+    peaks = np.zeros_like(merged)
+    np.maximum.at(peaks, target, np.where(ADDITIVE, 0.0, totals))
+    merged = np.where(ADDITIVE, merged, peaks)
+    size = heatmap_shape[0] * heatmap_shape[1]
+    keys, summed = np.unique(target[owner] * size + cells, return_inverse=True)
+    summed = np.bincount(summed.ravel(), weights=counts, minlength=len(keys))
+    record, cells = np.divmod(keys, size)
+    offsets = np.searchsorted(record, np.arange(len(unique) + 1))
+    return unique[order], merged, offsets, cells, summed.astype(np.int32)
+
+def load_heatmaps(path):
+    # {track_id: (rows, cols) occupancy counts} from a save() file
+    with np.load(path) as data:
+        shape = tuple(data['heatmap_shape'])
+        grids = {}
+        for i, track_id in enumerate(data['track_ids'].tolist()):
+            grid = np.zeros(shape, dtype=np.int32)
+            start, end = data['offsets'][i], data['offsets'][i + 1]
+            grid.reshape(-1)[data['cells'][start:end]] = data['counts'][start:end]
+            grids[track_id] = grid
+        return grids
+
+def _nanmax(values):
+    # Row-wise max that is 0 for rows without any valid value
+    peak = np.where(np.isnan(values), -np.inf, values).max(axis=1, initial=-np.inf)
+    return np.where(np.isfinite(peak), peak, 0.0)
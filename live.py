@@ -0,0 +1,267 @@
+import json
+import socket
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+import cv2
+import numpy as np
+
+from writers import to_serializable
+
+class FrameBuffer:
+    # Bounded hand-off from the capture thread to analysis. put() never
+    # blocks: when full the oldest frame is dropped, so a slow consumer only
+    # ever sees recent frames instead of an ever-growing backlog.
+    def __init__(self, size=2):
+        self.frames = deque(maxlen=size)
+        self.condition = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self.condition:
+            if len(self.frames) == self.frames.maxlen:
+                self.dropped += 1
+            self.frames.append(item)
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        # Oldest buffered frame, or None once closed and drained
+        with self.condition:
+            while not self.frames and not self.closed:
+                if not self.condition.wait(timeout):
+                    return None
+            return self.frames.popleft() if self.frames else None
+
+    def pending(self):
+        with self.condition:
+            return len(self.frames)
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class LiveSource:
+    # Reads any cv2.VideoCapture source (RTSP/UDP/HTTP URL, camera index,
+    # pipe or file) on a background thread into a FrameBuffer. Frames carry
+    # the wall-clock time they were decoded, which latency is measured from.
+    # pace replays files at their own frame rate to imitate a live feed.
+    def __init__(self, source, buffer_size=2, max_read_failures=50, pace=False):
+        self.source = int(source) if str(source).isdigit() else source
+        self.buffer = FrameBuffer(buffer_size)
+        self.max_read_failures = max_read_failures
+        self.pace = pace
+        self.fps = None
+        self.first_capture = None  # Capture time of the first frame read
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            raise IOError(f"Cannot open live source: {self.source}")
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or None
+        self._thread = threading.Thread(target=self._read, args=(cap,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _read(self, cap):
+        frame_idx = 0
+        failures = 0
+        start = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                ok, frame = cap.read()
+                if not ok:
+                    # Network streams hiccup; give up after a run of failures
+                    failures += 1
+                    if failures >= self.max_read_failures:
+                        break
+                    time.sleep(0.01)
+                    continue
+                failures = 0
+                captured = time.monotonic()
+                if self.pace and self.fps:
+                    delay = start + frame_idx / self.fps - captured
+                    if delay > 0:
+                        time.sleep(delay)
+                        captured = time.monotonic()
+                if self.first_capture is None:
+                    self.first_capture = captured
+                self.buffer.put((frame_idx, captured, frame))
+                frame_idx += 1
+        except Exception as error:  # Reported by LiveAnalyzer.run
+            self.error = error
+        finally:
+            cap.release()
+            self.buffer.close()
+
+
+class UdpEmitter:
+    # Fire-and-forget JSON datagrams to a local listener; a slow or missing
+    # receiver never stalls analysis. Messages over max_bytes are dropped.
+    def __init__(self, url, max_bytes=65000):
+        parsed = urlparse(url)
+        if parsed.scheme != 'udp':
+            raise ValueError(f"Unsupported emit target (use udp://host:port): {url}")
+        self.address = (parsed.hostname or '127.0.0.1', parsed.port)
+        self.max_bytes = max_bytes
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.stats = {'sent': 0, 'oversize': 0, 'failed': 0}
+
+    def __call__(self, message):
+        data = json.dumps(message, default=to_serializable).encode()
+        if len(data) > self.max_bytes:
+            self.stats['oversize'] += 1
+            return
+        try:
+            self.socket.sendto(data, self.address)
+            self.stats['sent'] += 1
+        except OSError:
+            self.stats['failed'] += 1
+
+    def close(self):
+        self.socket.close()
+
+def live_message(result):
+    # Compact per-frame payload for the bench: positions, teams, speeds,
+    # ball, tactics and events, without pose keypoints
+    return {
+        'frame': result['frame'],
+        'time': result['time'],
+        'latency_ms': result['latency_ms'],
+        'players': [{key: player.get(key) for key in
+                     ('track_id', 'team', 'bbox', 'pitch', 'speed')}
+                    for player in result['players']],
+        'ball': result['ball'],
+        'tactical': result['tactical'],
+        'events': result.get('events', [])
+    }
+
+def latency_percentiles(latencies, percentiles=(50, 90, 95, 99)):
+    if not len(latencies):
+        return {}
+    values = np.percentile(np.asarray(latencies) * 1000, percentiles)
+    report = {f"p{p}": round(float(v), 1) for p, v in zip(percentiles, values)}
+    report['max'] = round(float(np.max(latencies)) * 1000, 1)
+    return report
+
+
+class LiveAnalyzer:
+    # Near-real-time analysis of a live source with a FootballAnalyzer. Each
+    # frame is detected on its own (no batching delay) and goes through the
+    # usual tracking/pose/tactical path. Frames that waited longer than
+    # latency_ms are skipped whenever a newer one is buffered, so the output
+    # stays close to live; end-to-end latency (decode to emit) percentiles
+    # are reported at the end.
+    def __init__(self, analyzer, latency_ms=500, buffer_size=2,
+                 max_read_failures=50, history=10000):
+        self.analyzer = analyzer
+        # No file to fingerprint, and nothing would ever be replayed
+        self.analyzer.cache = None
+        self.latency_ms = latency_ms
+        self.buffer_size = buffer_size
+        self.max_read_failures = max_read_failures
+        self.latencies = deque(maxlen=history)  # End-to-end seconds
+        self.processing = deque(maxlen=history)  # Analysis seconds
+        self.stats = {'processed': 0, 'dropped': 0, 'stale': 0}
+
+    def run(self, source, callback=None, emitter=None, duration=None, pace=False):
+        # callback(result) gets the full frame result with 'latency_ms';
+        # emitter(message) the compact live_message. Stops when the source
+        # ends, after duration seconds, or on KeyboardInterrupt.
+        analyzer = self.analyzer
+        live = LiveSource(source, self.buffer_size, self.max_read_failures, pace).start()
+        analyzer._reset_state()
+        analyzer.exporter.start('live')
+        target = self.latency_ms / 1000 if self.latency_ms else None
+        started = time.monotonic()
+        try:
+            while duration is None or time.monotonic() - started < duration:
+                item = live.buffer.get(timeout=0.5)
+                if item is None:
+                    if live.buffer.closed:
+                        break
+                    continue
+                frame_idx, captured, frame = item
+                begin = time.monotonic()
+                if target is not None and begin - captured > target \
+                        and live.buffer.pending():
+                    self.stats['stale'] += 1
+                    continue
+
+                analyzer._frame_size = (frame.shape[1], frame.shape[0])
+                detections = analyzer._detect_frames([frame], analyzer._frames_analyzed)
+                # Stream time from the first frame read, which the buffer
+                # may have dropped
+                result = analyzer._process_frame(
+                    frame_idx, captured - live.first_capture, frame, detections[0])
+                done = time.monotonic()
+                result['latency_ms'] = round((done - captured) * 1000, 1)
+                if callback is not None:
+                    callback(result)
+                if emitter is not None:
+                    emitter(live_message(result))
+                self.latencies.append(time.monotonic() - captured)
+                self.processing.append(done - begin)
+                self.stats['processed'] += 1
+        except KeyboardInterrupt:
+            pass
+        finally:
+            live.stop()
+            self.stats['dropped'] = live.buffer.dropped
+            analyzer.exporter.close()
+        if live.error is not None:
+            raise RuntimeError("Live source failed") from live.error
+        return self.report()
+
+    def report(self):
+        return {'frames': dict(self.stats),
+                'latency_ms': latency_percentiles(self.latencies),
+                'processing_ms': latency_percentiles(self.processing)}
+
+if __name__ == "__main__":
+    import argparse
+    from main import FootballAnalyzer
+
+    parser = argparse.ArgumentParser(description='Analyze a live video source')
+    parser.add_argument('source', help='RTSP/UDP/HTTP URL, camera index, pipe or file')
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--emit', help='Send per-frame results to udp://host:port')
+    parser.add_argument('--latency-ms', type=float,
+                        help='End-to-end latency target; older frames are skipped')
+    parser.add_argument('--buffer', type=int, help='Frames buffered before the oldest is dropped')
+    parser.add_argument('--duration', type=float, help='Stop after this many seconds')
+    parser.add_argument('--pace', action='store_true',
+                        help='Read a file source at its frame rate, like a live feed')
+    args = parser.parse_args()
+
+    analyzer = FootballAnalyzer(args.config)
+    config = analyzer.config
+    emit = args.emit or config.get('live_emit')
+    emitter = UdpEmitter(emit) if emit else None
+    live = LiveAnalyzer(
+        analyzer,
+        latency_ms=args.latency_ms or config.get('live_latency_ms', 500),
+        buffer_size=args.buffer or config.get('live_buffer_size', 2),
+        max_read_failures=config.get('live_max_read_failures', 50))
+    try:
+        report = live.run(args.source, emitter=emitter, duration=args.duration,
+                          pace=args.pace)
+    finally:
+        if emitter is not None:
+            emitter.close()
+        analyzer.pose_engine.close()
+        analyzer.profiler.close()
+    print(json.dumps(report, indent=2))
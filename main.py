@@ -1,159 +1,491 @@
-import cv2
-import numpy as np
-import yaml
-import os
-from tqdm import tqdm
-from detection import PlayerDetector
-from tracking import Tracker
-from pose_estmation import PoseAnalyzer
-from tactical import TacticalAnalyzer
-from visualization import Visualizer
-
-class FootballAnalyzer:
-    def __init__(self, config_path='config.yaml'):
-        with open(config_path) as f:
-            self.config = yaml.safe_load(f)
-            
-        self.detector = PlayerDetector()
-        self.tracker = Tracker()
-        self.pose_analyzer = PoseAnalyzer()
-        self.tactical_analyzer = TacticalAnalyzer()
-        self.visualizer = Visualizer()
-        
-    def analyze_video(self, video_path):
-        cap = cv2.VideoCapture(video_path)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        
-        results = []
-        
-        for frame_idx in tqdm(range(total_frames)):
-            ret, frame = cap.read()
-            if not ret:
-                break
-                
-            # Player detection and tracking
-            detections = self.detector.detect(frame)
-            tracks = self.tracker.update(detections)
-            
-            # Find ball (simplified - would use specialized detector in practice)
-            ball = self._find_ball(frame, tracks)
-            
-            # Analyze each player
-            frame_results = []
-            for track_id, player in tracks.items():
-                # Crop player from frame
-                x1, y1, x2, y2 = player['bbox']
-                player_img = frame[y1:y2, x1:x2]
-                
-                # Pose estimation
-                pose_analysis = self.pose_analyzer.analyze_frame(player_img)
-                
-                frame_results.append({
-                    'track_id': track_id,
-                    'bbox': player['bbox'],
-                    'pose': pose_analysis
-                })
-            
-            # Tactical analysis
-            tactical_analysis = self.tactical_analyzer.analyze_positions(
-                [p for p in tracks.values()], ball)
-            
-            # Generate visualizations for key frames
-            if frame_idx % self.config['visualization_interval'] == 0:
-                self._generate_visualizations(
-                    frame, frame_idx, frame_results, tactical_analysis)
-            
-            results.append({
-                'frame': frame_idx,
-                'time': frame_idx / fps,
-                'players': frame_results,
-                'tactical': tactical_analysis,
-                'ball': ball
-            })
-            
-        cap.release()
-        return results
-    
-    def _find_ball(self, frame, players):
-        # Simplified ball detection - would use specialized CNN in production
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        circles = cv2.HoughCircles(gray, cv2.HOUGH_GRADIENT, 1, 20,
-                                 param1=50, param2=30, minRadius=5, maxRadius=30)
-        
-        if circles is not None:
-            circles = np.uint16(np.around(circles))
-            for circle in circles[0, :]:
-                x, y, r = circle
-                # Check if circle is not inside any player bbox
-                is_ball = True
-                for player in players.values():
-                    px1, py1, px2, py2 = player['bbox']
-                    if px1 <= x <= px2 and py1 <= y <= py2:
-                        is_ball = False
-                        break
-                
-                if is_ball:
-                    return {
-                        'bbox': [x-r, y-r, x+r, y+r],
-                        'confidence': 0.8  # Placeholder
-                    }
-        
-        return {'bbox': [0, 0, 0, 0], 'confidence': 0}
-    
-    def _generate_visualizations(self, frame, frame_idx, players, tactical):
-        # Create output directory if needed
-        os.makedirs('output/visualizations', exist_ok=True)
-        
-        # Generate 3D pose visualization for each player
-        for player in players:
-            if player['pose']:
-                fig = self.visualizer.create_3d_pose(
-                    player['pose']['keypoints'], frame_idx)
-                fig.write_html(
-                    f"output/visualizations/pose_{frame_idx}_{player['track_id']}.html")
-        
-        # Generate tactical view
-        fig = self.visualizer.create_tactical_view(
-            [p for p in players], 
-            self._find_ball(frame, {i: p for i, p in enumerate(players)}), 
-            frame_idx
-        )
-        fig.write_html(f"output/visualizations/tactical_{frame_idx}.html")
-        
-        # Save annotated frame
-        annotated = frame.copy()
-        for player in players:
-            x1, y1, x2, y2 = map(int, player['bbox'])
-            cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 255, 0), 2)
-            cv2.putText(annotated, str(player['track_id']), (x1, y1-10),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
-        
-        ball = self._find_ball(frame, {i: p for i, p in enumerate(players)})
-        if ball['confidence'] > 0.5:
-            x1, y1, x2, y2 = map(int, ball['bbox'])
-            cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 0, 255), 2)
-            cv2.putText(annotated, "Ball", (x1, y1-10),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2)
-        
-        cv2.imwrite(f"output/visualizations/frame_{frame_idx}.jpg", annotated)
-
-if __name__ == "__main__":
-    analyzer = FootballAnalyzer()
-    video_path = "data/Video-2.mp4"  # Replace with your video
-    results = analyzer.analyze_video(video_path)
-    
-    # Save results
-    import json
-    def convert(obj):
-        import numpy as np
-        if isinstance(obj, (np.integer, np.int32, np.int64, np.uint16)):
-            return int(obj)
-        if isinstance(obj, (np.floating, np.float32, np.float64)):
-            return float(obj)
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        return obj
-
-    with open("output/results.json", "w") as f:
-        json.dump(results, f, default=convert)
\ No newline at end of file
+import cv2
+import numpy as np
+import yaml
+import os
+from tqdm import tqdm
+from detection import PlayerDetector, split_detections
+from ball import BallTracker
+from calibration import PitchCalibrator
+from teams import TeamClassifier
+from sampling import FrameSampler
+from pipeline import PipelineRunner
+from tracking import Tracker, KalmanTracker
+from pose_engine import DEFAULT_TIERS, PoseEngine
+from pose_scheduler import PoseScheduler
+from tactical import TacticalAnalyzer
+from kinematics import KinematicsTracker
+from events import PoseEventDetector
+from visualization import Visualizer, VisualizationExporter
+from writers import make_writer
+from cache import ResultCache
+from profiling import Profiler
+
+class FootballAnalyzer:
+    def __init__(self, config_path='config.yaml', config=None, detector=None,
+                 pose_engine=None):
+        # config, detector and pose_engine can be injected (the benchmarks
+        # use stubs that need neither YOLO nor MediaPipe)
+        if config is None:
+            with open(config_path) as f:
+                config = yaml.safe_load(f)
+        self.config = config
+            
+        self.detector = detector or PlayerDetector(
+            batch_size=self.config.get('detection_batch_size', 8),
+            detect_ball=self.config.get('ball_use_detector', False),
+            ball_confidence=self.config.get('ball_detector_confidence', 0.25))
+        self.ball_tracker = BallTracker(
+            roi_size=self.config.get('ball_roi_size', 160),
+            lost_after=self.config.get('ball_lost_after', 5),
+            full_search_scale=self.config.get('ball_full_search_scale', 0.5))
+        self.calibrator = PitchCalibrator(
+            points=self.config.get('calibration_points'),
+            cut_threshold=self.config.get('calibration_cut_threshold', 0.6),
+            pan_threshold=self.config.get('calibration_pan_threshold', 8.0),
+            pan_response=self.config.get('calibration_pan_response', 0.1),
+            pitch_dimensions=self.config.get('pitch_dimensions', (105, 68)),
+            pitch_margin=self.config.get('calibration_pitch_margin', 10.0))
+        self.team_classifier = TeamClassifier(
+            refresh_every=self.config.get('team_refresh_every', 25),
+            warmup_samples=self.config.get('team_warmup_samples', 100)) \
+            if self.config.get('team_classification', True) else None
+        self.tracker = self._make_tracker()
+        self.pose_engine = pose_engine or PoseEngine(
+            workers=self.config.get('pose_workers', 0),
+            quality=self.config.get('pose_quality', 'high'),
+            tiers=self.config.get('pose_tiers'),
+            max_sessions=self.config.get('pose_max_sessions', 32),
+            session_ttl=self.config.get('pose_session_ttl', 30))
+        self.pose_scheduler = PoseScheduler(
+            dict(DEFAULT_TIERS, **(self.config.get('pose_tiers') or {})),
+            quality=self.config.get('pose_quality', 'high'),
+            input_size=self.config.get('pose_input_size', 256),
+            padding=self.config.get('pose_crop_padding', 0.15),
+            min_height=self.config.get('pose_min_height', 40),
+            near_distance=self.config.get('pose_near_distance', 2.0),
+            far_distance=self.config.get('pose_far_distance', 6.0),
+            far_every=self.config.get('pose_far_every', 3),
+            budget_ms=self.config.get('pose_budget_ms'),
+            switch_frames=self.config.get('pose_tier_switch_frames', 3)) \
+            if self.config.get('pose_schedule', True) else None
+        self.tactical_analyzer = TacticalAnalyzer(
+            pitch_dimensions=self.config.get('pitch_dimensions', (105, 68)),
+            lane_width=self.config.get('passing_lane_width', 2.0),
+            space_control_mode=self.config.get('space_control_mode', 'voronoi'),
+            grid_resolution=self.config.get('space_control_resolution', 1.0))
+        self.kinematics = KinematicsTracker(
+            pitch_dimensions=self.config.get('pitch_dimensions', (105, 68)),
+            heatmap_cell=self.config.get('heatmap_cell', 1.0),
+            smoothing=self.config.get('velocity_smoothing', 5),
+            sprint_speed=self.config.get('sprint_speed', 7.0),
+            sprint_duration=self.config.get('sprint_duration', 1.0),
+            streaming=self.config.get('kinematics_streaming', True),
+            ttl=self.config.get('kinematics_ttl', 25),
+            max_retired=self.config.get('kinematics_max_retired', 1024)) \
+            if self.config.get('kinematics', True) else None
+        if self.kinematics is not None and not self.calibrator.enabled:
+            # Speeds and heatmaps are in metres: without calibration_points
+            # no player has pitch coordinates
+            print("kinematics: calibration_points is not set, so there are no "
+                  "pitch coordinates; distance, speed and heatmaps are skipped")
+            self.kinematics = None
+        self.event_detector = PoseEventDetector(
+            window=self.config.get('event_pose_window', 8),
+            kick_velocity=self.config.get('kick_knee_velocity', 400.0),
+            shot_velocity=self.config.get('shot_knee_velocity', 800.0),
+            ball_distance=self.config.get('event_foot_ball_distance', 0.35),
+            dribble_duration=self.config.get('dribble_duration', 1.0),
+            cooldown=self.config.get('event_cooldown', 1.0),
+            max_lean=self.config.get('shot_max_lean', 10.0)) \
+            if self.config.get('pose_events', True) else None
+        self.profiler = Profiler(
+            enabled=self.config.get('profile', False),
+            trace_path=self.config.get('profile_trace'),
+            hook=self.config.get('profile_hook'),
+            hook_stages=self.config.get('profile_hook_stages'),
+            hook_output=self.config.get('profile_hook_output', 'output/profile.prof'))
+        self.visualizer = Visualizer()
+        self.exporter = VisualizationExporter(
+            self.visualizer,
+            output_dir=self.config.get('visualization_dir', 'output/visualizations'),
+            mode=self.config.get('visualization_mode', 'files'),
+            queue_size=self.config.get('visualization_queue', 8),
+            profiler=self.profiler)
+        cache_dir = self.config.get('cache_dir')
+        self.cache = ResultCache(
+            cache_dir, self.config,
+            chunk_size=self.config.get('cache_chunk_size', 256)) \
+            if cache_dir else None
+        self._frames_analyzed = 0
+        self._last_timestamp = None
+        self._frame_size = None  # (width, height) for uncalibrated tactics
+        
+    def _make_tracker(self):
+        if self.config.get('tracker_motion_model') == 'kalman':
+            return KalmanTracker(
+                max_age=self.config.get('kalman_max_age', 5),
+                gate=self.config.get('kalman_gate', 9.21),
+                accel_std=self.config.get('kalman_accel_std', 300.0),
+                measurement_std=self.config.get('kalman_measurement_std', 10.0),
+                velocity_std=self.config.get('kalman_velocity_std', 500.0))
+        return Tracker(
+            max_distance=self.config.get('tracker_max_distance', 50),
+            assignment=self.config.get('tracker_assignment', 'greedy'),
+            metric=self.config.get('tracker_metric', 'center'),
+            min_iou=self.config.get('tracker_min_iou', 0.3),
+            max_age=self.config.get('tracker_max_age', 0))
+        
+    def analyze_video(self, video_path, sink=None, resume=False,
+                      start_frame=0, end_frame=None):
+        # Without a sink the whole match is returned as a list; with one,
+        # frames are streamed to it and nothing is kept in memory.
+        # start_frame/end_frame restrict the run to a time range.
+        if sink is not None and resume:
+            last_frame, last_track = sink.resume_state()
+            if last_frame is not None:
+                start_frame = max(start_frame, last_frame + 1)
+                # Keep new track ids clear of the ones already written
+                self.tracker.next_id = max(self.tracker.next_id, last_track + 1)
+        
+        results = [] if sink is None else None
+        self.exporter.start(os.path.splitext(os.path.basename(video_path))[0])
+        try:
+            for result in self.iter_video(video_path, start_frame, end_frame):
+                if sink is None:
+                    results.append(result)
+                else:
+                    self.profiler.call('write', sink.write, result)
+            self._save_kinematics(os.path.splitext(os.path.basename(video_path))[0])
+        finally:
+            try:
+                self.exporter.close()
+            finally:
+                if sink is not None:
+                    sink.close()
+        return results
+    
+    def _save_kinematics(self, name):
+        # Per-track distance/speed/sprint totals and heatmaps of the run,
+        # saved as kinematics_dir/<name>.npz
+        kinematics_dir = self.config.get('kinematics_dir')
+        if self.kinematics is None or not kinematics_dir:
+            return
+        os.makedirs(kinematics_dir, exist_ok=True)
+        self.kinematics.save(os.path.join(kinematics_dir, name + '.npz'))
+    
+    def iter_video(self, video_path, start_frame=0, end_frame=None):
+        # Only runs over the whole video can record or reuse tracks and
+        # poses: track ids depend on where tracking started
+        full_run = start_frame == 0 and end_frame is None
+        cap = cv2.VideoCapture(video_path)
+        self._frame_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                            int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))) \
+            if cap.isOpened() else None
+        cap.release()
+        if self.cache is not None:
+            self.cache.open(video_path, full_run)
+        try:
+            if self.cache is not None and self.cache.replayable:
+                # Tracks and poses are cached: only tactics run again
+                yield from self._replay(start_frame, end_frame)
+                return
+            if self.config.get('pipeline', False):
+                yield from PipelineRunner(self).run(
+                    video_path, start_frame, end_frame)
+            else:
+                yield from self._run_video(video_path, start_frame, end_frame)
+            if self.cache is not None and full_run:
+                self.cache.mark_complete()
+        finally:
+            if self.cache is not None:
+                self.cache.close()
+    
+    def _run_video(self, video_path, start_frame=0, end_frame=None):
+        cap = cv2.VideoCapture(video_path)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if end_frame is not None:
+            total_frames = min(total_frames, end_frame)
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        batch_size = self.detector.batch_size
+        if start_frame:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        
+        sampler = self._make_sampler(cap, fps, end_frame)
+        self._reset_state()
+        
+        batch = []
+        
+        progress = tqdm(total=total_frames, initial=start_frame)
+        try:
+            for frame_idx, timestamp, frame in self.profiler.iterate('decode', sampler):
+                # Collect frames so YOLO runs once per batch
+                batch.append((frame_idx, timestamp, frame))
+                progress.update(max(frame_idx + 1 - progress.n, 0))
+                if len(batch) == batch_size:
+                    yield from self._process_batch(batch, sampler)
+                    batch = []
+            
+            if batch:
+                yield from self._process_batch(batch, sampler)
+        finally:
+            progress.close()
+            cap.release()
+    
+    def _replay(self, start_frame=0, end_frame=None):
+        self._frames_analyzed = 0
+        if self.kinematics is not None:
+            self.kinematics.reset()
+        if self.event_detector is not None:
+            self.event_detector.reset()
+        for frame_idx, timestamp, tracks, poses, ball in self.cache.replay(
+                start_frame, end_frame):
+            tactical_analysis = self.profiler.call(
+                'tactical', self.tactical_analyzer.analyze_positions,
+                self._tactical_players(tracks), ball, self._frame_size)
+            yield self._finish_frame(
+                frame_idx, timestamp, None, tracks, poses, tactical_analysis, ball)
+    
+    def _make_sampler(self, cap, fps, end_frame=None):
+        # Only decode the frames needed for the configured analysis rate
+        return FrameSampler(
+            cap, fps,
+            analysis_fps=self.config.get('analysis_fps'),
+            event_fps=self.config.get('event_fps'),
+            event_window=self.config.get('event_window', 1.0),
+            end_frame=end_frame)
+    
+    def _reset_state(self):
+        # Per-video state; the tracker keeps counting ids across videos
+        self._frames_analyzed = 0
+        self._last_timestamp = None
+        self.ball_tracker.reset()
+        self.calibrator.reset()
+        if self.team_classifier:
+            self.team_classifier.reset()
+        if self.kinematics is not None:
+            self.kinematics.reset()
+        if self.event_detector is not None:
+            self.event_detector.reset()
+        if self.pose_scheduler is not None:
+            self.pose_scheduler.reset()
+    
+    def _detect_frames(self, frames, first_index, frame_indices=None):
+        # YOLO runs on every detect_every-th analyzed frame; the tracker
+        # predicts the frames in between (None = detection skipped)
+        every = self.config.get('detect_every', 1)
+        selected = [i for i in range(len(frames))
+                    if (first_index + i) % every == 0]
+        
+        detections = [None] * len(frames)
+        if self.cache is not None and frame_indices is not None:
+            for i in selected:
+                detections[i] = self.cache.detections(frame_indices[i])
+            selected = [i for i in selected if detections[i] is None]
+        
+        found = self.profiler.call(
+            'detect', self.detector.detect_batch, [frames[i] for i in selected]) \
+            if selected else []
+        for i, frame_detections in zip(selected, found):
+            detections[i] = frame_detections
+            self.profiler.count('detections', len(frame_detections))
+            if self.cache is not None and frame_indices is not None:
+                self.cache.store_detections(frame_indices[i], frame_detections)
+        return detections
+    
+    def _process_batch(self, batch, sampler=None):
+        detections = self._detect_frames(
+            [frame for _, _, frame in batch], self._frames_analyzed,
+            [frame_idx for frame_idx, _, _ in batch])
+        results = []
+        for i, ((frame_idx, timestamp, frame), frame_detections) in enumerate(
+                zip(batch, detections)):
+            result = self._process_frame(
+                frame_idx, timestamp, frame, frame_detections)
+            results.append(result)
+            if sampler is None:
+                continue
+            # Raise the sampling rate while the ball is close to a player
+            if self._is_event(result):
+                sampler.boost(frame_idx)
+            # The rest of the batch was read at the old rate: drop it and
+            # read the boosted window from just after this frame
+            if i + 1 < len(batch) and not sampler.due(frame_idx, batch[i + 1][0]):
+                sampler.rewind(frame_idx)
+                break
+        return results
+    
+    def _is_event(self, result):
+        ball = result['ball']
+        if ball['confidence'] <= 0:
+            return False
+        bx = (ball['bbox'][0] + ball['bbox'][2]) / 2
+        by = (ball['bbox'][1] + ball['bbox'][3]) / 2
+        max_distance = self.config.get('event_ball_distance', 50)
+        for player in result['players']:
+            x1, y1, x2, y2 = player['bbox']
+            dx = max(x1 - bx, 0, bx - x2)
+            dy = max(y1 - by, 0, by - y2)
+            if (dx ** 2 + dy ** 2) ** 0.5 <= max_distance:
+                return True
+        return False
+    
+    def _process_frame(self, frame_idx, timestamp, frame, detections):
+        tracks, ball = self._track_frame(frame, detections, timestamp)
+        
+        # Pose estimation, one MediaPipe session per track
+        poses = self.cache.poses(frame_idx, tracks) \
+            if self.cache is not None else None
+        if poses is None:
+            poses = self.profiler.call(
+                'pose', self._analyze_poses, frame, tracks, ball)
+        
+        # Tactical analysis
+        tactical_analysis = self.profiler.call(
+            'tactical', self.tactical_analyzer.analyze_positions,
+            self._tactical_players(tracks), ball, self._frame_size)
+        
+        return self._finish_frame(
+            frame_idx, timestamp, frame, tracks, poses, tactical_analysis, ball)
+    
+    def _track_frame(self, frame, detections, timestamp):
+        # Player tracking (detections come from the batched pass)
+        dt = None if self._last_timestamp is None \
+            else timestamp - self._last_timestamp
+        self._last_timestamp = timestamp
+        players, ball_candidates = split_detections(detections)
+        tracks = self.profiler.call('track', self.tracker.update, players, dt)
+        
+        # Ball is located once per frame and reused by everything downstream
+        ball = self.profiler.call(
+            'ball', self.ball_tracker.locate, frame, tracks, ball_candidates, dt)
+        
+        # Team labels from jersey colour, cached per track
+        if self.team_classifier:
+            tracks = self.profiler.call(
+                'teams', self.team_classifier.assign, frame, tracks)
+        
+        # Pitch coordinates (metres) from the cached homography
+        return self.profiler.call(
+            'calibration', self.calibrator.locate, frame, tracks, ball)
+    
+    def _tactical_players(self, tracks):
+        return [dict(player, track_id=track_id)
+                for track_id, player in tracks.items()]
+    
+    def _analyze_poses(self, frame, tracks, ball):
+        return self._collect_poses(*self._submit_poses(frame, tracks, ball))[0]
+    
+    def _submit_poses(self, frame, tracks, ball):
+        # Returns (ticket, plan). Without a scheduler every track is posed
+        # from its raw bbox crop at the default tier.
+        if self.pose_scheduler is None:
+            self.profiler.count('pose_calls', len(tracks))
+            return self.pose_engine.submit(
+                list(tracks.keys()), self._player_crops(frame, tracks)), None
+        plan = self.pose_scheduler.plan(frame, tracks, ball)
+        self.profiler.count('pose_calls', len(plan['track_ids']))
+        return self.pose_engine.submit(
+            plan['track_ids'], plan['crops'], plan['tiers']), plan
+    
+    def _collect_poses(self, ticket, plan):
+        # Poses in track order and the engine's busy time
+        poses, busy = self.pose_engine.collect(ticket)
+        if plan is not None:
+            poses = self.pose_scheduler.restore(plan, poses, busy)
+        return poses, busy
+    
+    def _player_crops(self, frame, tracks):
+        crops = []
+        for player in tracks.values():
+            # Crop player from frame
+            x1, y1, x2, y2 = player['bbox']
+            crops.append(frame[y1:y2, x1:x2])
+        return crops
+    
+    def _finish_frame(self, frame_idx, timestamp, frame, tracks, poses,
+                      tactical_analysis, ball):
+        if self.cache is not None:
+            self.cache.record(frame_idx, timestamp, tracks, poses, ball)
+        
+        frame_results = []
+        for (track_id, player), pose_analysis in zip(tracks.items(), poses):
+            frame_results.append({
+                'track_id': track_id,
+                'bbox': player['bbox'],
+                'team': player.get('team'),
+                'pitch': player.get('pitch'),
+                'pose': pose_analysis
+            })
+        if self.kinematics is not None:
+            # Smoothed speed (m/s) of players with pitch coordinates
+            speeds = self.profiler.call(
+                'kinematics', self.kinematics.update, timestamp, frame_results)
+            for player in frame_results:
+                player['speed'] = speeds.get(player['track_id'])
+        
+        events = []
+        if self.event_detector is not None:
+            events = self.profiler.call(
+                'events', self.event_detector.update, frame_idx, timestamp,
+                frame_results, ball)
+            self.profiler.count('events', len(events))
+        
+        # Generate visualizations for key frames (counted in analyzed frames,
+        # since frame_idx skips ahead when sampling). With pose_renders:
+        # events, 3D poses are only rendered for players with an event.
+        if self.config.get('pose_renders', 'events') == 'events':
+            pose_tracks = {event['track_id'] for event in events}
+        else:
+            pose_tracks = None
+        if self._frames_analyzed % self.config['visualization_interval'] == 0:
+            # Rendering and disk writes happen on the exporter's thread
+            self.exporter.submit(frame_idx, frame, frame_results, ball, pose_tracks)
+        elif pose_tracks:
+            self.exporter.submit_poses(frame_idx, frame_results, pose_tracks)
+        self._frames_analyzed += 1
+        self.profiler.count('tracks', len(tracks))
+        self.profiler.frame(frame_idx)
+        
+        return {
+            'frame': frame_idx,
+            'time': timestamp,
+            'players': frame_results,
+            'tactical': tactical_analysis,
+            'ball': ball,
+            'events': events
+        }
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('video', nargs='?', default="data/Video-2.mp4")
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Run decode/detect/pose/tactical as pipelined stages')
+    parser.add_argument('--workers', type=int,
+                        help='Process pool size for the tactical stage')
+    parser.add_argument('--queue-depth', type=int,
+                        help='Frames buffered between pipeline stages')
+    parser.add_argument('--output', help='Results path (file, or directory for parquet)')
+    parser.add_argument('--format', choices=['json', 'jsonl', 'parquet'])
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue after the last frame already in --output')
+    args = parser.parse_args()
+    
+    analyzer = FootballAnalyzer(args.config)
+    if args.pipeline:
+        analyzer.config['pipeline'] = True
+    if args.workers is not None:
+        analyzer.config['pipeline_workers'] = args.workers
+    if args.queue_depth is not None:
+        analyzer.config['pipeline_queue_depth'] = args.queue_depth
+    sink = make_writer(
+        args.output or analyzer.config.get('results_path', 'output/results.json'),
+        fmt=args.format or analyzer.config.get('results_format', 'json'),
+        flush_every=analyzer.config.get('results_flush_every', 100),
+        append=args.resume)
+    try:
+        analyzer.analyze_video(args.video, sink=sink, resume=args.resume)
+    finally:
+        analyzer.pose_engine.close()
+        analyzer.profiler.close()
@@ -0,0 +1,248 @@
+import multiprocessing as mp
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+from tqdm import tqdm
+
+from tactical import TacticalAnalyzer
+
+_END = object()  # End-of-stream marker passed between stages
+
+# Per-process analyzers, created once by the pool initializer
+_worker = {}
+
+def _init_worker(pitch_dimensions, lane_width, space_control_mode,
+                 grid_resolution):
+    _worker['tactical'] = TacticalAnalyzer(
+        pitch_dimensions=pitch_dimensions, lane_width=lane_width,
+        space_control_mode=space_control_mode, grid_resolution=grid_resolution)
+
+def _analyze_tactics(players, ball, frame_size):
+    start = time.perf_counter()
+    tactical = _worker['tactical'].analyze_positions(players, ball, frame_size)
+    return tactical, time.perf_counter() - start
+
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0
+
+    def add(self, elapsed, items=1):
+        self.items += items
+        self.busy += elapsed
+
+    def throughput(self):
+        return self.items / self.busy if self.busy > 0 else 0.0
+
+
+class PipelineRunner:
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        config = analyzer.config
+        self.workers = config.get('pipeline_workers', 4)
+        self.queue_depth = config.get('pipeline_queue_depth', 16)
+        self.stats = {name: StageStats(name) for name in
+                      ('decode', 'detect', 'track', 'pose', 'tactical', 'output')}
+        self._errors = []
+        self._stop = threading.Event()
+
+    def run(self, video_path, start_frame=0, end_frame=None):
+        # Generator: frame results are yielded in order as they complete
+        analyzer = self.analyzer
+        cap = cv2.VideoCapture(video_path)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if end_frame is not None:
+            total_frames = min(total_frames, end_frame)
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        if start_frame:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        sampler = analyzer._make_sampler(cap, fps, end_frame)
+        analyzer._reset_state()
+
+        frames = queue.Queue(maxsize=self.queue_depth)
+        detected = queue.Queue(maxsize=self.queue_depth)
+        reader = threading.Thread(
+            target=self._guard, args=(self._read, sampler, frames), daemon=True)
+        detector = threading.Thread(
+            target=self._guard, args=(self._detect, frames, detected), daemon=True)
+
+        progress = tqdm(total=total_frames, initial=start_frame)
+        wall_start = time.perf_counter()
+        count = 0
+
+        tactical = analyzer.tactical_analyzer
+        # Spawned, like the pose workers: forking once the reader and
+        # detector threads run could copy a lock they hold
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=mp.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(tactical.pitch_dimensions, tactical.lane_width,
+                      tactical.space_control_mode, tactical.grid_resolution))
+        try:
+            reader.start()
+            detector.start()
+            with pool:
+                for result in self._consume(pool, detected, sampler, progress):
+                    count += 1
+                    yield result
+        finally:
+            # Unblock the reader/detector threads if we stopped early
+            self._stop.set()
+            progress.close()
+            reader.join()
+            detector.join()
+            cap.release()
+        if self._errors:
+            raise self._errors[0]
+
+        self.wall_time = time.perf_counter() - wall_start
+        self.report(count)
+
+    def _consume(self, pool, detected, sampler, progress):
+        analyzer = self.analyzer
+        pending = deque()
+        while True:
+            try:
+                item = detected.get(timeout=0.1)
+            except queue.Empty:
+                if self._errors:
+                    return
+                continue
+            if item is _END:
+                break
+            frame_idx, timestamp, frame, detections = item
+            progress.update(frame_idx + 1 - progress.n)
+
+            # Tracking is stateful, so it stays on this thread in frame order
+            start = time.perf_counter()
+            tracks, ball = analyzer._track_frame(frame, detections, timestamp)
+            self.stats['track'].add(time.perf_counter() - start)
+
+            # Pose runs on the engine's per-track workers, tactics on the pool
+            # (a cached frame carries its poses instead of a ticket)
+            ticket = analyzer.cache.poses(frame_idx, tracks) \
+                if analyzer.cache is not None else None
+            if ticket is None:
+                ticket = analyzer._submit_poses(frame, tracks, ball)
+            future = pool.submit(
+                _analyze_tactics, analyzer._tactical_players(tracks), ball,
+                analyzer._frame_size)
+            pending.append(
+                (ticket, future, frame_idx, timestamp, frame, tracks, ball))
+
+            # Keep at most queue_depth frames in flight, collected in order
+            while pending and (len(pending) > self.queue_depth
+                               or pending[0][1].done()):
+                yield self._collect(pending.popleft(), sampler)
+
+        while pending:
+            yield self._collect(pending.popleft(), sampler)
+
+    def report(self, frames):
+        print(f"Pipeline: {frames} frames in {self.wall_time:.1f}s "
+              f"({frames / max(self.wall_time, 1e-9):.2f} frames/s, "
+              f"{self.workers} workers)")
+        print(f"{'stage':<10}{'items':>10}{'busy (s)':>12}{'items/s':>12}")
+        for stage in self.stats.values():
+            print(f"{stage.name:<10}{stage.items:>10}{stage.busy:>12.2f}"
+                  f"{stage.throughput():>12.2f}")
+
+    def _guard(self, target, *args):
+        # Surface worker-thread errors on the main thread and always
+        # unblock the next stage
+        try:
+            target(*args)
+        except Exception as exc:
+            self._errors.append(exc)
+            self._stop.set()
+        finally:
+            self._put(args[-1], _END)
+
+    def _put(self, q, item):
+        # Bounded put that gives up once the pipeline is shutting down
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read(self, sampler, frames):
+        iterator = iter(sampler)
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            item = next(iterator, None)
+            if item is None:
+                break
+            elapsed = time.perf_counter() - start
+            self.stats['decode'].add(elapsed)
+            self.analyzer.profiler.add('decode', elapsed)
+            if not self._put(frames, item):
+                break
+
+    def _detect(self, frames, detected):
+        batch_size = self.analyzer.detector.batch_size
+        frames_seen = 0
+        finished = False
+        while not finished and not self._stop.is_set():
+            batch = []
+            while len(batch) < batch_size:
+                # Run a partial batch rather than wait when the reader lags
+                if batch and frames.empty():
+                    break
+                try:
+                    item = frames.get(timeout=0.1)
+                except queue.Empty:
+                    if self._stop.is_set():
+                        return
+                    continue
+                if item is _END:
+                    finished = True
+                    break
+                batch.append(item)
+            if not batch:
+                continue
+
+            start = time.perf_counter()
+            detections = self.analyzer._detect_frames(
+                [frame for _, _, frame in batch], frames_seen,
+                [frame_idx for frame_idx, _, _ in batch])
+            self.stats['detect'].add(time.perf_counter() - start, len(batch))
+            frames_seen += len(batch)
+
+            for (frame_idx, timestamp, frame), frame_detections in zip(
+                    batch, detections):
+                self._put(detected, (frame_idx, timestamp, frame, frame_detections))
+
+    def _collect(self, entry, sampler):
+        ticket, future, frame_idx, timestamp, frame, tracks, ball = entry
+        if isinstance(ticket, list):
+            poses, pose_time = ticket, 0.0
+        else:
+            poses, pose_time = self.analyzer._collect_poses(*ticket)
+        tactical, tactical_time = future.result()
+        self.stats['pose'].add(pose_time)
+        self.stats['tactical'].add(tactical_time)
+        # Busy time measured in the pose workers and the tactical pool
+        profiler = self.analyzer.profiler
+        if not isinstance(ticket, list):
+            profiler.add('pose', pose_time)
+        profiler.add('tactical', tactical_time)
+
+        start = time.perf_counter()
+        result = self.analyzer._finish_frame(
+            frame_idx, timestamp, frame, tracks, poses, tactical, ball)
+        self.stats['output'].add(time.perf_counter() - start)
+
+        # Boosts reach the reader a queue's length late; the rate change is
+        # approximate around event boundaries in pipeline mode
+        if self.analyzer._is_event(result):
+            sampler.boost(frame_idx)
+        return result
\ No newline at end of file
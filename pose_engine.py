@@ -0,0 +1,120 @@
+import multiprocessing as mp
+import queue
+import time
+
+from pose_estmation import PoseAnalyzer
+
+# MediaPipe model_complexity per quality tier
+DEFAULT_TIERS = {'low': 0, 'medium': 1, 'high': 2}
+
+def _pose_worker(requests, replies, model_complexity, max_sessions, session_ttl):
+    analyzer = PoseAnalyzer(model_complexity, max_sessions, session_ttl)
+    while True:
+        message = requests.get()
+        if message is None:
+            break
+        ticket, items = message
+        start = time.perf_counter()
+        poses = {}
+        for track_id, crop, complexity in items:
+            poses[track_id] = _analyze_crop(analyzer, track_id, crop, complexity)
+        analyzer.advance()
+        replies.put((ticket, poses, time.perf_counter() - start))
+
+def _analyze_crop(analyzer, track_id, crop, complexity):
+    if crop is None or crop.size == 0:
+        return None
+    return analyzer.analyze_track(track_id, crop, complexity)
+
+
+class PoseEngine:
+    def __init__(self, workers=0, quality='high', tiers=None, max_sessions=32,
+                 session_ttl=30):
+        self.tiers = dict(DEFAULT_TIERS, **(tiers or {}))
+        self.model_complexity = self.tiers[quality]
+        self.workers = workers
+        self._next_ticket = 0
+        # ticket -> [poses by track, shards outstanding, busy time, track order]
+        self._results = {}
+        self._requests = []
+        self._processes = []
+
+        if workers <= 0:
+            # In-process: one analyzer holding all per-track sessions
+            self.analyzer = PoseAnalyzer(
+                self.model_complexity, max_sessions, session_ttl)
+            return
+
+        # Each worker owns the sessions of the tracks hashed to it, so a
+        # track always returns to the same MediaPipe session
+        context = mp.get_context('spawn')
+        self._replies = context.Queue()
+        self._requests = [context.Queue() for _ in range(workers)]
+        self._processes = [
+            context.Process(
+                target=_pose_worker,
+                args=(requests, self._replies, self.model_complexity,
+                      max_sessions, session_ttl),
+                daemon=True)
+            for requests in self._requests
+        ]
+        for process in self._processes:
+            process.start()
+
+    def complexity(self, tier):
+        return self.tiers[tier] if tier is not None else self.model_complexity
+
+    def submit(self, track_ids, crops, tiers=None):
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        tiers = tiers or [None] * len(track_ids)
+        items = [(track_id, crop, self.complexity(tier))
+                 for track_id, crop, tier in zip(track_ids, crops, tiers)]
+
+        if self.workers <= 0:
+            start = time.perf_counter()
+            poses = {track_id: _analyze_crop(self.analyzer, *item)
+                     for track_id, item in zip(track_ids, items)}
+            self.analyzer.advance()
+            self._results[ticket] = [poses, 0, time.perf_counter() - start,
+                                     list(track_ids)]
+            return ticket
+
+        shards = [[] for _ in range(self.workers)]
+        for item in items:
+            shards[hash(item[0]) % self.workers].append(item)
+        # Every worker gets a message each frame so idle sessions age out
+        for requests, shard in zip(self._requests, shards):
+            requests.put((ticket, shard))
+        self._results[ticket] = [{}, self.workers, 0.0, list(track_ids)]
+        return ticket
+
+    def collect(self, ticket):
+        # Returns poses in submission order and the summed worker busy time
+        while self._results[ticket][1] > 0:
+            try:
+                done, poses, busy = self._replies.get(timeout=1.0)
+            except queue.Empty:
+                if not all(p.is_alive() for p in self._processes):
+                    raise RuntimeError("Pose worker exited unexpectedly")
+                continue
+            entry = self._results[done]
+            entry[0].update(poses)
+            entry[1] -= 1
+            entry[2] += busy
+
+        poses, _, busy, track_ids = self._results.pop(ticket)
+        return [poses[track_id] for track_id in track_ids], busy
+
+    def analyze(self, track_ids, crops, tiers=None):
+        return self.collect(self.submit(track_ids, crops, tiers))[0]
+
+    def close(self):
+        for requests in self._requests:
+            requests.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._requests = []
+        self._processes = []
\ No newline at end of file
@@ -1,68 +1,82 @@
-import mediapipe as mp
-import numpy as np
-
-class PoseAnalyzer:
-    def __init__(self):
-        self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(
-            static_image_mode=False,
-            model_complexity=2,
-            enable_segmentation=False,
-            min_detection_confidence=0.7
-        )
-        
-    def analyze_frame(self, frame):
-        results = self.pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-        
-        if not results.pose_landmarks:
-            return None
-            
-        landmarks = results.pose_landmarks.landmark
-        keypoints = {}
-        
-        # Convert landmarks to more usable format
-        for i, landmark in enumerate(landmarks):
-            keypoints[self.mp_pose.PoseLandmark(i).name] = {
-                'x': landmark.x,
-                'y': landmark.y,
-                'z': landmark.z,
-                'visibility': landmark.visibility
-            }
-        
-        return {
-            'keypoints': keypoints,
-            'analysis': self._analyze_pose(keypoints)
-        }
-    
-    def _analyze_pose(self, keypoints):
-        analysis = {}
-        
-        # Body lean analysis
-        shoulder_avg = self._avg_point(keypoints['LEFT_SHOULDER'], 
-                                      keypoints['RIGHT_SHOULDER'])
-        hip_avg = self._avg_point(keypoints['LEFT_HIP'], 
-                                 keypoints['RIGHT_HIP'])
-        analysis['body_lean'] = shoulder_avg['x'] - hip_avg['x']
-        
-        # Hip-shoulder separation (for torque analysis)
-        left_hip_shoulder = self._distance(
-            keypoints['LEFT_HIP'], keypoints['LEFT_SHOULDER'])
-        right_hip_shoulder = self._distance(
-            keypoints['RIGHT_HIP'], keypoints['RIGHT_SHOULDER'])
-        analysis['hip_torque'] = abs(left_hip_shoulder - right_hip_shoulder)
-        
-        return analysis
-    
-    def _avg_point(self, p1, p2):
-        return {
-            'x': (p1['x'] + p2['x']) / 2,
-            'y': (p1['y'] + p2['y']) / 2,
-            'z': (p1['z'] + p2['z']) / 2
-        }
-    
-    def _distance(self, p1, p2):
-        return np.sqrt(
-            (p1['x']-p2['x'])**2 + 
-            (p1['y']-p2['y'])**2 + 
-            (p1['z']-p2['z'])**2
-        )
\ No newline at end of file
+import cv2
+from collections import OrderedDict
+import numpy as np
+from keypoints import KeypointView, as_array, pose_metrics
+
+class PoseAnalyzer:
+    def __init__(self, model_complexity=2, max_sessions=32, session_ttl=30):
+        import mediapipe as mp  # Imported here so pose-free runs need no mediapipe
+        self.mp_pose = mp.solutions.pose
+        self.model_complexity = model_complexity
+        self.pose = self._create_session(model_complexity)
+        
+        # Per-track sessions keep MediaPipe's temporal tracking on one player
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.sessions = OrderedDict()  # track_id -> [pose, last_tick, complexity]
+        self.tick = 0
+        
+    def _create_session(self, model_complexity):
+        return self.mp_pose.Pose(
+            static_image_mode=False,
+            model_complexity=model_complexity,
+            enable_segmentation=False,
+            min_detection_confidence=0.7
+        )
+        
+    def analyze_frame(self, frame, pose=None):
+        pose = pose or self.pose
+        results = pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        
+        if not results.pose_landmarks:
+            return None
+            
+        # Landmarks as one (33, 4) float32 array; the view keeps the old
+        # name -> {'x', 'y', 'z', 'visibility'} access working
+        keypoints = np.array(
+            [[lm.x, lm.y, lm.z, lm.visibility]
+             for lm in results.pose_landmarks.landmark], dtype=np.float32)
+        
+        return {
+            'keypoints': KeypointView(keypoints),
+            'analysis': self._analyze_pose(keypoints)
+        }
+    
+    def analyze_track(self, track_id, frame, model_complexity=None):
+        if model_complexity is None:
+            model_complexity = self.model_complexity
+        return self.analyze_frame(
+            frame, self._session(track_id, model_complexity))
+    
+    def advance(self):
+        # Called once per frame: drop sessions of tracks not seen recently
+        self.tick += 1
+        stale = [track_id for track_id, (_, last, _) in self.sessions.items()
+                 if self.tick - last > self.session_ttl]
+        for track_id in stale:
+            self.sessions.pop(track_id)[0].close()
+    
+    def _session(self, track_id, model_complexity):
+        # One session per track. The complexity is fixed when a session is
+        # created, so a tier change replaces it (the scheduler only changes
+        # a track's tier once the new one has held for a few frames)
+        entry = self.sessions.get(track_id)
+        if entry is not None and entry[2] == model_complexity:
+            self.sessions.move_to_end(track_id)
+            entry[1] = self.tick
+            return entry[0]
+        if entry is not None:
+            self.sessions.pop(track_id)[0].close()
+        
+        # Evict the least recently used session when full
+        while len(self.sessions) >= self.max_sessions:
+            _, (old, _, _) = self.sessions.popitem(last=False)
+            old.close()
+        pose = self._create_session(model_complexity)
+        self.sessions[track_id] = [pose, self.tick, model_complexity]
+        return pose
+    
+    def _analyze_pose(self, keypoints):
+        # Single-pose case of keypoints.pose_metrics (body lean, hip torque)
+        metrics = pose_metrics(as_array(keypoints))
+        return {name: float(value) for name, value in metrics.items()}
\ No newline at end of file
@@ -0,0 +1,201 @@
+import cv2
+import numpy as np
+
+from keypoints import KeypointView, as_array, pose_metrics
+
+# Starting per-pose cost (ms) by MediaPipe model_complexity, refined from
+# measured pose time as frames are processed
+DEFAULT_COST_MS = {0: 10.0, 1: 20.0, 2: 50.0}
+
+class PoseScheduler:
+    # Decides per frame which players get a pose, at which quality tier, and
+    # prepares their crops. Crops are padded around the bbox and letterboxed
+    # to a fixed square input; players shorter than min_height pixels are
+    # skipped. Players within near_distance (in player heights) of the ball
+    # get the full tier, those within far_distance one tier lower and the
+    # rest the lowest tier on every far_every-th frame only. With a budget,
+    # the closest players are served first and the rest are downgraded or
+    # skipped once the estimated pose time for the frame would exceed it.
+    # A track only moves to another distance band once it has been in it
+    # for switch_frames planned frames in a row, so a one-frame jump of the
+    # player or ball does not replace its pose session.
+    def __init__(self, tiers, quality='high', input_size=256, padding=0.15,
+                 min_height=40, near_distance=2.0, far_distance=6.0,
+                 far_every=3, budget_ms=None, smoothing=0.2, switch_frames=3):
+        # tiers: name -> model_complexity, as in PoseEngine
+        self.tiers = tiers
+        self.ranked = sorted(tiers, key=tiers.get)  # Cheapest first
+        rank = self.ranked.index(quality)
+        self.near_tier = quality
+        self.mid_tier = self.ranked[max(rank - 1, 0)]
+        self.far_tier = self.ranked[0]
+        self.band_tiers = {'near': self.near_tier, 'mid': self.mid_tier,
+                           'far': self.far_tier}
+        self.input_size = input_size
+        self.padding = padding  # Fraction of the bbox added on each side
+        self.min_height = min_height  # Pixels
+        self.near_distance = near_distance
+        self.far_distance = far_distance
+        self.far_every = far_every
+        self.switch_frames = switch_frames
+        self.budget_ms = budget_ms
+        self.smoothing = smoothing  # Weight of each new cost measurement
+        self.cost_ms = {tier: DEFAULT_COST_MS.get(complexity, 50.0)
+                        for tier, complexity in tiers.items()}
+        self.stats = {'scheduled': 0, 'small': 0, 'invalid': 0, 'deferred': 0,
+                      'downgraded': 0, 'over_budget': 0}
+        self.reset()
+
+    def reset(self):
+        self.frame_count = 0
+        self.bands = {}  # track_id -> [band, wanted band, frames wanted]
+
+    def plan(self, frame, tracks, ball):
+        # Returns the plan for restore(): the scheduled track ids, their
+        # letterboxed crops and tiers, plus what is needed to map poses back
+        self.frame_count += 1
+        height, width = frame.shape[:2]
+        candidates = []
+        for track_id, player in tracks.items():
+            x1, y1, x2, y2 = player['bbox']
+            box_h = y2 - y1
+            if box_h < self.min_height:
+                self.stats['small'] += 1
+                continue
+            # Padded region clipped to the frame
+            pad_x, pad_y = (x2 - x1) * self.padding, box_h * self.padding
+            cx1, cy1 = max(int(x1 - pad_x), 0), max(int(y1 - pad_y), 0)
+            cx2, cy2 = min(int(x2 + pad_x), width), min(int(y2 + pad_y), height)
+            if cx2 <= cx1 or cy2 <= cy1 or x2 <= x1:
+                self.stats['invalid'] += 1
+                continue
+            distance = self._ball_distance(player['bbox'], ball)
+            tier = self._tier(track_id, distance)
+            if tier is None:
+                self.stats['deferred'] += 1
+                continue
+            candidates.append((0.0 if distance is None else distance, track_id,
+                               tier, (cx1, cy1, cx2, cy2)))
+
+        # Nearest to the ball first, so the budget goes to the play
+        candidates.sort(key=lambda c: c[0])
+        spent = 0.0
+        plan = {'tracks': list(tracks), 'bboxes': [], 'track_ids': [],
+                'crops': [], 'tiers': [], 'regions': []}
+        for _, track_id, tier, region in candidates:
+            if self.budget_ms is not None:
+                tier = self._fit(tier, self.budget_ms - spent)
+                if tier is None:
+                    self.stats['over_budget'] += 1
+                    continue
+            spent += self.cost_ms[tier]
+            crop, transform = self._letterbox(frame, region)
+            plan['track_ids'].append(track_id)
+            plan['bboxes'].append(tracks[track_id]['bbox'])
+            plan['crops'].append(crop)
+            plan['tiers'].append(tier)
+            plan['regions'].append(transform)
+        self.stats['scheduled'] += len(plan['track_ids'])
+        # Forget tracks that are gone
+        for track_id in set(self.bands) - set(tracks):
+            del self.bands[track_id]
+        return plan
+
+    def restore(self, plan, poses, busy=None):
+        # Poses for every track in the plan's track order (None when not
+        # scheduled), with landmarks mapped back to bbox-normalized
+        # coordinates as if the raw bbox crop had been analyzed.
+        # busy: measured pose seconds for the plan, used to refine costs.
+        if busy and plan['tiers']:
+            self._record(plan['tiers'], busy)
+        restored = {}
+        for track_id, bbox, transform, pose in zip(
+                plan['track_ids'], plan['bboxes'], plan['regions'], poses):
+            restored[track_id] = None if pose is None \
+                else self._to_bbox(pose, bbox, transform)
+        return [restored.get(track_id) for track_id in plan['tracks']]
+
+    def _tier(self, track_id, distance):
+        band = self._band(track_id, distance)
+        # Far players are staggered across frames
+        if band == 'far' and (self.frame_count + track_id) % self.far_every:
+            return None
+        return self.band_tiers[band]
+
+    def _band(self, track_id, distance):
+        if distance is None or distance <= self.near_distance:
+            wanted = 'near'  # No ball: everyone at the default tier
+        elif distance <= self.far_distance:
+            wanted = 'mid'
+        else:
+            wanted = 'far'
+        state = self.bands.get(track_id)
+        if state is None:
+            state = self.bands[track_id] = [wanted, wanted, 0]
+        elif wanted == state[0]:
+            state[1:] = [wanted, 0]
+        else:
+            # Count consecutive frames wanting the same other band
+            state[2] = state[2] + 1 if wanted == state[1] else 1
+            state[1] = wanted
+            if state[2] >= self.switch_frames:
+                state[:] = [wanted, wanted, 0]
+        return state[0]
+
+    def _fit(self, tier, remaining_ms):
+        # The requested tier or the best cheaper one that fits the budget
+        for candidate in reversed(self.ranked[:self.ranked.index(tier) + 1]):
+            if self.cost_ms[candidate] <= remaining_ms:
+                if candidate != tier:
+                    self.stats['downgraded'] += 1
+                return candidate
+        return None
+
+    def _record(self, tiers, busy):
+        # Scale the tiers' estimates by how far off the frame's total was
+        predicted = sum(self.cost_ms[tier] for tier in tiers)
+        ratio = busy * 1000 / predicted
+        for tier in set(tiers):
+            self.cost_ms[tier] *= 1 - self.smoothing + self.smoothing * ratio
+
+    @staticmethod
+    def _ball_distance(bbox, ball):
+        # Feet to ball in player heights, None when the ball is not found
+        if not ball or ball.get('confidence', 0) <= 0:
+            return None
+        x1, y1, x2, y2 = bbox
+        bx1, by1, bx2, by2 = ball['bbox']
+        return np.hypot((x1 + x2) / 2 - (bx1 + bx2) / 2,
+                        y2 - (by1 + by2) / 2) / max(y2 - y1, 1)
+
+    def _letterbox(self, frame, region):
+        # Resize the region so its longer side is input_size and pad the
+        # other side; returns the crop and (x0, y0, scale, offset_x, offset_y)
+        cx1, cy1, cx2, cy2 = region
+        crop = frame[cy1:cy2, cx1:cx2]
+        h, w = crop.shape[:2]
+        scale = self.input_size / max(w, h)
+        new_w, new_h = max(int(round(w * scale)), 1), max(int(round(h * scale)), 1)
+        crop = cv2.resize(crop, (new_w, new_h), interpolation=cv2.INTER_AREA
+                          if scale < 1 else cv2.INTER_LINEAR)
+        off_x, off_y = (self.input_size - new_w) // 2, (self.input_size - new_h) // 2
+        crop = cv2.copyMakeBorder(
+            crop, off_y, self.input_size - new_h - off_y,
+            off_x, self.input_size - new_w - off_x, cv2.BORDER_CONSTANT, value=0)
+        return crop, (cx1, cy1, scale, off_x, off_y)
+
+    def _to_bbox(self, pose, bbox, transform):
+        x0, y0, scale, off_x, off_y = transform
+        x1, y1, x2, y2 = bbox
+        box_w, box_h = max(x2 - x1, 1), max(y2 - y1, 1)
+        keypoints = as_array(pose['keypoints']).copy()
+        # Letterbox-normalized -> frame pixels -> bbox-normalized; MediaPipe
+        # z shares the x scale
+        keypoints[:, 0] = (x0 + (keypoints[:, 0] * self.input_size - off_x) / scale
+                           - x1) / box_w
+        keypoints[:, 1] = (y0 + (keypoints[:, 1] * self.input_size - off_y) / scale
+                           - y1) / box_h
+        keypoints[:, 2] = keypoints[:, 2] * self.input_size / scale / box_w
+        metrics = pose_metrics(keypoints)
+        return {'keypoints': KeypointView(keypoints),
+                'analysis': {name: float(value) for name, value in metrics.items()}}
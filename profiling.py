@@ -0,0 +1,157 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+def peak_memory_mb():
+    # Peak resident set size of this process (ru_maxrss is KB on Linux)
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _marker(name):
+    # A function whose code object is named stage_<name>, so sampling
+    # profilers such as py-spy show the stage in every stack below it
+    def run(fn, args, kwargs):
+        return fn(*args, **kwargs)
+    run.__code__ = run.__code__.replace(co_name=f"stage_{name}")
+    return run
+
+
+class Profiler:
+    # Per-stage wall/CPU time, counters and peak memory for the analysis
+    # loop. Stages are timed by call()/iterate() (or add() for work measured
+    # elsewhere, e.g. in worker processes); frame() closes a frame and writes
+    # its line to the optional JSON Lines trace. With hook='cprofile' the
+    # stages in hook_stages (all stages when empty) also run under cProfile
+    # and the stats are dumped to hook_output on close.
+    def __init__(self, enabled=False, trace_path=None, hook=None,
+                 hook_stages=None, hook_output='output/profile.prof'):
+        self.enabled = enabled or bool(trace_path) or bool(hook)
+        self.lock = threading.Lock()
+        self.stages = defaultdict(lambda: [0, 0.0, 0.0])  # calls, wall, cpu
+        self.counts = defaultdict(int)
+        self.frames = 0
+        self._frame_stages = defaultdict(float)
+        self._frame_counts = defaultdict(int)
+        self._markers = {}
+        self._local = threading.local()  # Per-thread cProfile nesting
+        self._start = time.perf_counter()
+
+        self.trace = None
+        if trace_path:
+            os.makedirs(os.path.dirname(trace_path) or '.', exist_ok=True)
+            self.trace = open(trace_path, 'w')
+        self.hook_output = hook_output
+        self.hook_stages = set(hook_stages or [])
+        self.cprofile = cProfile.Profile() if hook == 'cprofile' else None
+
+    def call(self, name, fn, *args, **kwargs):
+        if not self.enabled:
+            return fn(*args, **kwargs)
+        marker = self._markers.get(name)
+        if marker is None:
+            marker = self._markers[name] = _marker(name)
+        profiled = self.cprofile is not None and (
+            not self.hook_stages or name in self.hook_stages)
+        wall, cpu = time.perf_counter(), time.thread_time()
+        if profiled:
+            profiled = self._enable_cprofile()
+        try:
+            return marker(fn, args, kwargs)
+        finally:
+            if profiled:
+                self.cprofile.disable()
+                self._local.active = False
+            self.add(name, time.perf_counter() - wall, time.thread_time() - cpu)
+
+    def iterate(self, name, iterable):
+        # Times each next() of an iterator (e.g. frame decoding)
+        iterator = iter(iterable)
+        while True:
+            try:
+                item = self.call(name, next, iterator)
+            except StopIteration:
+                return
+            yield item
+
+    def add(self, name, wall, cpu=0.0, calls=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            stage = self.stages[name]
+            stage[0] += calls
+            stage[1] += wall
+            stage[2] += cpu
+            self._frame_stages[name] += wall
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counts[name] += n
+            self._frame_counts[name] += n
+
+    def frame(self, frame_idx):
+        # In pipeline mode stages overlap, so a frame's line holds the work
+        # that finished since the previous frame rather than exactly its own
+        if not self.enabled:
+            return
+        with self.lock:
+            self.frames += 1
+            if self.trace is not None:
+                self.trace.write(json.dumps({
+                    'frame': frame_idx,
+                    'ms': {k: round(v * 1000, 3) for k, v in self._frame_stages.items()},
+                    'counts': dict(self._frame_counts),
+                    'peak_mb': peak_memory_mb()
+                }) + '\n')
+            self._frame_stages.clear()
+            self._frame_counts.clear()
+
+    def summary(self):
+        elapsed = time.perf_counter() - self._start
+        lines = [f"Profile: {self.frames} frames in {elapsed:.1f}s, "
+                 f"peak memory {peak_memory_mb() or 0:.0f} MB",
+                 f"{'stage':<14}{'calls':>9}{'wall (s)':>11}{'cpu (s)':>10}"
+                 f"{'ms/call':>10}{'% wall':>8}"]
+        for name, (calls, wall, cpu) in sorted(
+                self.stages.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<14}{calls:>9}{wall:>11.2f}{cpu:>10.2f}"
+                         f"{wall / max(calls, 1) * 1000:>10.2f}"
+                         f"{wall / max(elapsed, 1e-9) * 100:>8.1f}")
+        if self.counts:
+            lines.append('counts: ' + ', '.join(
+                f"{name}={n}" for name, n in sorted(self.counts.items())))
+        return '\n'.join(lines)
+
+    def close(self):
+        if not self.enabled:
+            return
+        print(self.summary())
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
+        if self.cprofile is not None:
+            os.makedirs(os.path.dirname(self.hook_output) or '.', exist_ok=True)
+            self.cprofile.dump_stats(self.hook_output)
+
+    def _enable_cprofile(self):
+        # Only the outermost stage on a thread toggles cProfile, and since
+        # one profiler can be active per interpreter, a stage overlapping on
+        # another thread simply runs unprofiled
+        if getattr(self._local, 'active', False):
+            return False
+        try:
+            self.cprofile.enable()
+        except ValueError:
+            return False
+        self._local.active = True
+        return True
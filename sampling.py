@@ -0,0 +1,77 @@
+import threading
+
+import cv2
+
+class FrameSampler:
+    def __init__(self, cap, source_fps, analysis_fps=None, event_fps=None,
+                 event_window=1.0, end_frame=None):
+        self.cap = cap
+        self.end_frame = end_frame  # Stop before this frame (time-range shards)
+        self.source_fps = source_fps or 30.0
+        # No target rate (or one above the source rate) means every frame
+        self.analysis_fps = min(analysis_fps or self.source_fps, self.source_fps)
+        self.event_fps = min(event_fps or self.analysis_fps, self.source_fps)
+        self.event_window = event_window
+        self.position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+        self.next_time = self.position / self.source_fps
+        self.boost_until = -1.0
+        # next_time/boost_until: boosts may come from another thread while
+        # a pipeline reader iterates
+        self.lock = threading.Lock()
+
+    def boost(self, frame_idx):
+        # Sample at event_fps for event_window seconds after frame_idx
+        event_time = frame_idx / self.source_fps
+        with self.lock:
+            self.boost_until = max(self.boost_until, event_time + self.event_window)
+            self.next_time = min(self.next_time, event_time + 1.0 / self.event_fps)
+
+    def due(self, frame_idx, next_idx):
+        # Whether next_idx, read ahead of frame_idx, is still the next frame
+        # due at the current rate (a boost since may want earlier ones)
+        timestamp = frame_idx / self.source_fps
+        with self.lock:
+            step = 1.0 / self.current_fps(timestamp)
+        return next_idx / self.source_fps <= timestamp + step + 0.5 / self.source_fps
+
+    def rewind(self, frame_idx):
+        # Continue sampling right after frame_idx; the caller discards the
+        # frames it already read past it
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx + 1)
+        self.position = frame_idx + 1
+        timestamp = frame_idx / self.source_fps
+        with self.lock:
+            self.next_time = timestamp + 1.0 / self.current_fps(timestamp)
+
+    def current_fps(self, timestamp):
+        # Called with the lock held
+        if timestamp < self.boost_until:
+            return max(self.event_fps, self.analysis_fps)
+        return self.analysis_fps
+
+    def __iter__(self):
+        # Half a source frame of slack so rounding never skips a due sample
+        tolerance = 0.5 / self.source_fps
+        while True:
+            frame_idx = self.position
+            timestamp = frame_idx / self.source_fps
+            if self.end_frame is not None and frame_idx >= self.end_frame:
+                break
+
+            with self.lock:
+                skip = timestamp + tolerance < self.next_time
+            if skip:
+                # Advance the stream without retrieving/converting the frame
+                if not self.cap.grab():
+                    break
+                self.position += 1
+                continue
+
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            self.position += 1
+            with self.lock:
+                self.next_time = timestamp + 1.0 / self.current_fps(timestamp)
+
+            yield frame_idx, timestamp, frame
\ No newline at end of file
@@ -1,97 +1,254 @@
-import numpy as np
-from scipy.spatial import Voronoi
-
-class TacticalAnalyzer:
-    def __init__(self, pitch_dimensions=(105, 68)):
-        self.pitch_width, self.pitch_length = pitch_dimensions
-        
-    def analyze_positions(self, players, ball):
-        analysis = {}
-        
-        # Convert to pitch coordinates (normalized 0-1)
-        norm_players = self._normalize_positions(players)
-        norm_ball = self._normalize_position(ball)
-        
-        # Space control analysis
-        analysis['space_control'] = self._calculate_space_control(norm_players)
-        
-        # Passing lanes
-        analysis['passing_options'] = self._find_passing_lanes(
-            norm_players, norm_ball)
-            
-        return analysis
-    
-    def _normalize_positions(self, players):
-        # Accepts list of dicts with 'bbox' or direct bbox lists
-        normed = []
-        for p in players:
-            bbox = p['bbox'] if isinstance(p, dict) and 'bbox' in p else p
-            normed.append(self._normalize_position(bbox))
-        return normed
-    
-    def _normalize_position(self, bbox):
-        # Accepts dict with 'bbox' or direct bbox list/tuple
-        if isinstance(bbox, dict) and 'bbox' in bbox:
-            bbox = bbox['bbox']
-        if not isinstance(bbox, (list, tuple)) or len(bbox) < 4:
-            return {'x': 0, 'y': 0}
-        x_center = (bbox[0] + bbox[2]) / 2
-        y_center = (bbox[1] + bbox[3]) / 2
-        return {
-            'x': x_center / self.pitch_length,
-            'y': y_center / self.pitch_width
-        }
-    
-    def _calculate_space_control(self, players):
-        points = np.array([[p['x'], p['y']] for p in players])
-        if points.shape[0] < 3:
-            return []  # Not enough points for Voronoi
-        vor = Voronoi(points)
-        # Calculate area for each player's Voronoi cell
-        areas = []
-        for i, region in enumerate(vor.regions):
-            if not region or -1 in region:
-                continue
-            poly = [vor.vertices[j] for j in region]
-            areas.append(self._polygon_area(poly))
-        return areas
-    
-    def _find_passing_lanes(self, players, ball):
-        passing_options = []
-        
-        for i, receiver in enumerate(players):
-            # Simple check - no defenders between ball and receiver
-            line_clear = True
-            for j, defender in enumerate(players):
-                if i == j:
-                    continue
-                if self._point_to_line_distance(
-                    defender, ball, receiver) < 0.1:  # Threshold
-                    line_clear = False
-                    break
-                    
-            if line_clear:
-                passing_options.append({
-                    'receiver': i,
-                    'distance': self._distance(ball, receiver)
-                })
-                
-        return passing_options
-    
-    def _polygon_area(self, vertices):
-        x = [v[0] for v in vertices]
-        y = [v[1] for v in vertices]
-        return 0.5 * np.abs(np.dot(x, np.roll(y, 1)) - np.dot(y, np.roll(x, 1)))
-    
-    def _distance(self, p1, p2):
-        return np.sqrt((p1['x']-p2['x'])**2 + (p1['y']-p2['y'])**2)
-    
-    def _point_to_line_distance(self, point, line_p1, line_p2):
-        # Distance from point to line segment
-        x, y = point['x'], point['y']
-        x1, y1 = line_p1['x'], line_p1['y']
-        x2, y2 = line_p2['x'], line_p2['y']
-        
-        numerator = abs((y2-y1)*x - (x2-x1)*y + x2*y1 - y2*x1)
-        denominator = np.sqrt((y2-y1)**2 + (x2-x1)**2)
-        return numerator / denominator
\ No newline at end of file
+import numpy as np
+from scipy.spatial import QhullError, Voronoi, cKDTree
+
+class TacticalAnalyzer:
+    def __init__(self, pitch_dimensions=(105, 68), lane_width=2.0,
+                 space_control_mode='voronoi', grid_resolution=1.0):
+        self.pitch_dimensions = tuple(pitch_dimensions)
+        self.pitch_width, self.pitch_length = pitch_dimensions
+        self.lane_width = lane_width  # metres either side of a passing lane
+        # Pitch rectangle in metres (length along x, width along y)
+        self.bounds = (0.0, 0.0, float(pitch_dimensions[0]),
+                       float(pitch_dimensions[1]))
+        self.space_control_mode = space_control_mode  # 'voronoi' or 'grid'
+        self.grid_resolution = grid_resolution  # Grid cell size, metres
+        self.grid = SpaceControlGrid(self.bounds, grid_resolution)
+        
+    def analyze_positions(self, players, ball, frame_size=None):
+        # frame_size (width, height) places players without calibrated
+        # 'pitch' coordinates by their bbox centre stretched over the pitch;
+        # without it they are left out of space control and passing lanes
+        analysis = {}
+        
+        # Pitch coordinates in metres (NaN = unknown)
+        positions = self._pitch_positions(players, frame_size)
+        # No ball this frame (NO_BALL): its [0, 0, 0, 0] box is not a place
+        # to pass from
+        ball_pos = self._pitch_positions([ball], frame_size)[0] \
+            if ball.get('confidence', 0) > 0 else np.full(2, np.nan)
+        located = ~np.isnan(positions).any(axis=1)
+        track_ids = [p.get('track_id', i) if isinstance(p, dict) else i
+                     for i, p in enumerate(players)]
+        teams = None
+        if players and all(isinstance(p, dict) and 'team' in p for p in players):
+            teams = np.array([p['team'] for p in players])
+        
+        # Space control analysis: area (m^2) per track_id
+        areas = np.full(len(players), np.nan)
+        areas[located] = self._calculate_space_control(
+            positions[located], None if teams is None else teams[located])
+        analysis['space_control'] = {
+            track_id: float(area) for track_id, area in zip(track_ids, areas)
+            if not np.isnan(area)}
+        if teams is not None:
+            analysis['team_control'] = team_control(areas, teams)
+        
+        # Passing lanes (team-aware once players carry a 'team' label)
+        analysis['passing_options'] = self._find_passing_lanes(
+            positions, ball_pos, teams)
+        for option in analysis['passing_options']:
+            receiver = players[option['receiver']]
+            if isinstance(receiver, dict) and 'track_id' in receiver:
+                option['track_id'] = receiver['track_id']
+            
+        return analysis
+    
+    def _pitch_positions(self, players, frame_size=None):
+        # Calibrated pitch coordinates when present ('pitch'), otherwise the
+        # bbox centre normalized by the frame size and scaled to the pitch
+        x0, y0, x1, y1 = self.bounds
+        positions = np.full((len(players), 2), np.nan)
+        for i, p in enumerate(players):
+            if isinstance(p, dict) and p.get('pitch') is not None:
+                positions[i] = p['pitch']
+                continue
+            norm = self._normalize_position(p, frame_size)
+            if norm is not None:
+                positions[i] = [x0 + norm['x'] * (x1 - x0),
+                                y0 + norm['y'] * (y1 - y0)]
+        return positions
+    
+    def _normalize_position(self, bbox, frame_size):
+        # Accepts dict with 'bbox' or direct bbox list/tuple; None when there
+        # is no bbox or frame size to normalize by
+        if isinstance(bbox, dict) and 'bbox' in bbox:
+            bbox = bbox['bbox']
+        if frame_size is None or not isinstance(bbox, (list, tuple)) or len(bbox) < 4:
+            return None
+        width, height = frame_size
+        x_center = (bbox[0] + bbox[2]) / 2
+        y_center = (bbox[1] + bbox[3]) / 2
+        return {
+            'x': x_center / width,
+            'y': y_center / height
+        }
+    
+    def _calculate_space_control(self, positions, teams=None):
+        # Referees (team -1) control no space
+        active = np.ones(len(positions), dtype=bool) if teams is None \
+            else teams >= 0
+        areas = np.full(len(positions), np.nan)
+        if not active.any():
+            return areas
+        if self.space_control_mode == 'grid':
+            areas[active] = self.grid.areas(positions[active])
+        else:
+            areas[active] = voronoi_areas(positions[active], self.bounds)
+        return areas
+    
+    def _find_passing_lanes(self, positions, ball, teams=None):
+        if not len(positions) or np.isnan(ball).any():
+            return []
+        open_lanes, distances = passing_lanes(
+            positions, ball, teams, self.lane_width)
+        
+        return [{'receiver': int(i), 'distance': float(distances[i])}
+                for i in np.flatnonzero(open_lanes)]
+    
+    def passing_options_batch(self, positions, balls, teams=None, chunk=4096):
+        # Offline: positions (frames, players, 2) in metres (NaN = absent),
+        # balls (frames, 2); returns open-lane mask and distances per player
+        positions = np.asarray(positions, dtype=np.float64)
+        balls = np.asarray(balls, dtype=np.float64)
+        open_lanes = np.zeros(positions.shape[:2], dtype=bool)
+        distances = np.full(positions.shape[:2], np.nan)
+        for start in range(0, len(positions), chunk):
+            end = start + chunk
+            open_lanes[start:end], distances[start:end] = passing_lanes(
+                positions[start:end], balls[start:end],
+                None if teams is None else np.asarray(teams)[start:end],
+                self.lane_width)
+        return open_lanes, distances
+    
+def passing_lanes(players, ball, teams=None, lane_width=2.0, min_pass=1.0):
+    # players (..., N, 2), ball (..., 2), optional teams (..., N) with -1 for
+    # non-players (referees). A lane ball -> receiver is blocked by any
+    # opponent within lane_width of the segment, ahead of the ball.
+    # Returns (open mask (..., N), ball -> receiver distance (..., N)).
+    players = np.asarray(players, dtype=np.float64)
+    ball = np.asarray(ball, dtype=np.float64)
+    present = ~np.isnan(players).any(axis=-1)
+    pos = np.where(present[..., None], players, 0.0)
+    
+    v = pos - ball[..., None, :]                   # ball -> receiver (..., N, 2)
+    length_sq = np.einsum('...i,...i->...', v, v)  # (..., N)
+    distance = np.sqrt(length_sq)
+    
+    # Projection of every player j onto every lane i: t (..., N_i, N_j)
+    w = v  # ball -> player j
+    dot = np.einsum('...id,...jd->...ij', v, w)
+    t = np.divide(dot, length_sq[..., :, None],
+                  out=np.zeros_like(dot), where=length_sq[..., :, None] > 0)
+    closest = np.clip(t, 0.0, 1.0)[..., None] * v[..., :, None, :]
+    gap = np.linalg.norm(w[..., None, :, :] - closest, axis=-1)
+    
+    n = players.shape[-2]
+    blocker = present[..., None, :] & ~np.eye(n, dtype=bool)
+    # Players at or behind the ball (the passer) never block
+    blocker &= t > 0
+    receiver = present & (distance >= min_pass)
+    
+    if teams is not None:
+        teams = np.asarray(teams)
+        # The passing side is the team of the player nearest the ball
+        nearest = np.argmin(np.where(present & (teams >= 0), distance, np.inf),
+                            axis=-1)
+        ball_team = np.take_along_axis(teams, nearest[..., None], axis=-1)
+        receiver &= teams == ball_team
+        blocker &= ((teams >= 0) & (teams != ball_team))[..., None, :]
+    
+    blocked = (blocker & (gap < lane_width)).any(axis=-1)
+    distance = np.where(present, distance, np.nan)
+    return receiver & ~blocked, distance
+
+def voronoi_areas(points, bounds):
+    # Voronoi cell area of every point, clipped to the bounds rectangle.
+    # Mirroring the points across the four edges closes every original
+    # cell exactly on the boundary, so no cell is unbounded or dropped.
+    points = np.asarray(points, dtype=np.float64)
+    n = len(points)
+    x0, y0, x1, y1 = bounds
+    if n == 1:
+        return np.array([(x1 - x0) * (y1 - y0)])
+    
+    eps = 1e-6 * max(x1 - x0, y1 - y0)
+    pts = np.clip(points, [x0 + eps, y0 + eps], [x1 - eps, y1 - eps])
+    # Players at the same spot (often after clipping) share one cell
+    pts, inverse, counts = np.unique(pts, axis=0, return_inverse=True,
+                                     return_counts=True)
+    inverse = inverse.ravel()
+    if len(pts) == 1:
+        return np.full(n, (x1 - x0) * (y1 - y0) / n)
+    mirrored = np.concatenate([
+        pts,
+        np.c_[2 * x0 - pts[:, 0], pts[:, 1]],
+        np.c_[2 * x1 - pts[:, 0], pts[:, 1]],
+        np.c_[pts[:, 0], 2 * y0 - pts[:, 1]],
+        np.c_[pts[:, 0], 2 * y1 - pts[:, 1]],
+    ])
+    try:
+        vor = Voronoi(mirrored)
+    except QhullError:
+        # Degenerate layouts: joggle the input
+        vor = Voronoi(mirrored, qhull_options='Qbb Qc Qz QJ')
+    
+    areas = np.zeros(len(pts))
+    for i in range(len(pts)):
+        region = vor.regions[vor.point_region[i]]
+        if not region or -1 in region:
+            continue
+        poly = vor.vertices[region]
+        # Cells are convex: order vertices by angle before the shoelace sum
+        centre = poly.mean(axis=0)
+        order = np.argsort(np.arctan2(poly[:, 1] - centre[1],
+                                      poly[:, 0] - centre[0]))
+        x, y = poly[order, 0], poly[order, 1]
+        areas[i] = 0.5 * np.abs(np.dot(x, np.roll(y, 1)) - np.dot(y, np.roll(x, 1)))
+    return (areas / counts)[inverse]
+
+def team_control(areas, teams):
+    # Share of the controlled area per team label (referees excluded)
+    areas = np.nan_to_num(np.asarray(areas, dtype=np.float64))
+    teams = np.asarray(teams)
+    total = areas[teams >= 0].sum()
+    if total <= 0:
+        return {}
+    return {int(team): float(areas[teams == team].sum() / total)
+            for team in np.unique(teams[teams >= 0])}
+
+
+class SpaceControlGrid:
+    # Rasterized space control: the pitch is a fixed grid of cell centres and
+    # each cell belongs to its nearest player (KD-tree lookup). The grid is
+    # built once and reused for every frame.
+    def __init__(self, bounds=(0.0, 0.0, 105.0, 68.0), resolution=1.0):
+        x0, y0, x1, y1 = bounds
+        xs = np.arange(x0 + resolution / 2, x1, resolution)
+        ys = np.arange(y0 + resolution / 2, y1, resolution)
+        self.shape = (len(ys), len(xs))
+        self.cells = np.stack(np.meshgrid(xs, ys), axis=-1).reshape(-1, 2)
+        self.cell_area = resolution * resolution
+    
+    def owners(self, points):
+        # Index of the nearest point for every cell, (rows, cols)
+        _, owner = cKDTree(points).query(self.cells)
+        return owner.reshape(self.shape)
+    
+    def areas(self, points):
+        owner = self.owners(np.asarray(points, dtype=np.float64))
+        return np.bincount(owner.ravel(), minlength=len(points)) * self.cell_area
+    
+    def team_series(self, positions, teams, n_teams=2):
+        # positions (frames, players, 2) with NaN for absent players and
+        # teams (frames, players); returns (frames, n_teams) control shares
+        positions = np.asarray(positions, dtype=np.float64)
+        teams = np.asarray(teams)
+        series = np.full((len(positions), n_teams), np.nan)
+        for f in range(len(positions)):
+            present = ~np.isnan(positions[f]).any(axis=1) & (teams[f] >= 0)
+            if not present.any():
+                continue
+            owner = self.owners(positions[f][present]).ravel()
+            owned = np.bincount(teams[f][present][owner], minlength=n_teams)
+            series[f] = owned[:n_teams] / len(owner)
+        return series
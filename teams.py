@@ -0,0 +1,100 @@
+import cv2
+import numpy as np
+
+REFEREE = -1
+
+class TeamClassifier:
+    # Team labels from jersey colour. Each crop is reduced to a hue/saturation
+    # histogram of the torso with grass pixels masked out; once enough
+    # samples are collected they are clustered (k-means, two teams plus
+    # referees) and every track is labelled by its nearest cluster. Labels are
+    # cached per track_id and only refreshed every refresh_every frames, with
+    # a vote over the refreshes so one bad crop cannot flip a player.
+    def __init__(self, refresh_every=25, warmup_samples=100, clusters=3,
+                 bins=(16, 8)):
+        self.refresh_every = refresh_every
+        self.warmup_samples = warmup_samples
+        self.clusters = clusters  # Two teams plus referees/goalkeepers
+        self.bins = bins
+        self.reset()
+
+    def reset(self):
+        self.centres = None
+        self.labels = None  # Cluster index -> team (0, 1 or REFEREE)
+        self.samples = []
+        self.cache = {}  # track_id -> [team, frames since refresh, votes]
+        self.stats = {'embedded': 0, 'cached': 0}
+
+    def assign(self, frame, tracks):
+        # Returns copies of the tracks with 'team' once the clusters exist
+        for track_id in list(self.cache):
+            if track_id not in tracks:
+                del self.cache[track_id]  # Track ended (ids are not reused)
+
+        stale = [track_id for track_id in tracks
+                 if track_id not in self.cache
+                 or self.cache[track_id][1] >= self.refresh_every]
+        self.stats['cached'] += len(tracks) - len(stale)
+        if stale:
+            embeddings = np.array([self.embed(self._torso(frame, tracks[t]['bbox']))
+                                   for t in stale])
+            self.stats['embedded'] += len(stale)
+            if self.centres is None:
+                self.samples.extend(embeddings)
+                if len(self.samples) < self.warmup_samples:
+                    return tracks
+                self._fit(np.array(self.samples))
+                self.samples = []
+                # Every track gets labelled against the new clusters
+                self.cache = {}
+                return self.assign(frame, tracks)
+            for track_id, team in zip(stale, self.predict(embeddings)):
+                entry = self.cache.setdefault(track_id, [team, 0, {}])
+                entry[2][team] = entry[2].get(team, 0) + 1
+                entry[0] = max(entry[2], key=entry[2].get)
+                entry[1] = 0
+
+        if self.centres is None:
+            return tracks
+        labelled = {}
+        for track_id, player in tracks.items():
+            entry = self.cache[track_id]
+            entry[1] += 1
+            labelled[track_id] = dict(player, team=int(entry[0]))
+        return labelled
+
+    def embed(self, crop):
+        # Normalized hue/saturation histogram, grass and dark pixels excluded
+        if crop is None or crop.size == 0:
+            return np.zeros(self.bins[0] * self.bins[1], dtype=np.float32)
+        hsv = cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)
+        grass = cv2.inRange(hsv, (35, 60, 40), (85, 255, 255))
+        dark = cv2.inRange(hsv, (0, 0, 0), (180, 255, 40))
+        mask = cv2.bitwise_not(cv2.bitwise_or(grass, dark))
+        hist = cv2.calcHist([hsv], [0, 1], mask, list(self.bins), [0, 180, 0, 256])
+        total = hist.sum()
+        return (hist.ravel() / total if total else hist.ravel()).astype(np.float32)
+
+    def predict(self, embeddings):
+        distances = np.linalg.norm(
+            embeddings[:, None, :] - self.centres[None, :, :], axis=2)
+        return self.labels[np.argmin(distances, axis=1)]
+
+    def _fit(self, samples):
+        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 50, 1e-4)
+        _, assigned, centres = cv2.kmeans(
+            samples, self.clusters, None, criteria, 3, cv2.KMEANS_PP_CENTERS)
+        # The two largest clusters are the teams, the rest referees
+        sizes = np.bincount(assigned.ravel(), minlength=self.clusters)
+        order = np.argsort(-sizes)
+        self.labels = np.full(self.clusters, REFEREE)
+        self.labels[order[:2]] = [0, 1]
+        self.centres = centres
+
+    @staticmethod
+    def _torso(frame, bbox):
+        # Shirt region: upper half of the box without the head and the edges
+        x1, y1, x2, y2 = bbox
+        height, width = y2 - y1, x2 - x1
+        return frame[y1 + height // 6:y1 + height // 2,
+                     x1 + width // 5:x2 - width // 5]
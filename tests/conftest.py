@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Flat top-level modules, and the benchmark stubs (no YOLO or MediaPipe)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+@pytest.fixture
+def config(tmp_path):
+    # config.yaml with nothing written to the working tree
+    with open(os.path.join(ROOT, 'config.yaml')) as f:
+        config = yaml.safe_load(f)
+    config.update(cache_dir=None, visualization_mode='off',
+                  visualization_dir=str(tmp_path / 'visualizations'),
+                  kinematics_dir=None, pose_workers=0)
+    return config
+
+@pytest.fixture(scope='session')
+def match_video(tmp_path_factory):
+    # Short synthetic match the stub detector can find players in
+    from synthetic import SyntheticMatch
+    path = tmp_path_factory.mktemp('video') / 'match.avi'
+    return SyntheticMatch(players=10, frames=20, seed=1).write_video(
+        str(path), (640, 360))
+
+@pytest.fixture
+def make_analyzer(config):
+    # FootballAnalyzer on the benchmark stubs; extra settings override config
+    from main import FootballAnalyzer
+    from stubs import ColourDetector, StubPoseEngine
+    analyzers = []
+
+    def make(**settings):
+        analyzer = FootballAnalyzer(
+            config=dict(config, **settings), detector=ColourDetector(),
+            pose_engine=StubPoseEngine())
+        analyzers.append(analyzer)
+        return analyzer
+    yield make
+    for analyzer in analyzers:
+        analyzer.pose_engine.close()
@@ -0,0 +1,69 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analyze_results import _pose_tables, analyze
+from keypoints import KeypointView, pose_metrics
+from writers import make_writer
+
+def match_results(frames=30, players=4, seed=0):
+    rng = np.random.default_rng(seed)
+    results = []
+    for f in range(frames):
+        results.append({
+            'frame': f, 'time': f / 25,
+            'players': [{
+                'track_id': i, 'bbox': [10 * i, 0, 10 * i + 8, 20], 'team': i % 2,
+                'pitch': [f * 0.2 + i, 10.0 + i],
+                # Track 3 never gets a pose, the others skip every 4th frame
+                'pose': None if i == 3 or f % 4 == 0 else {'keypoints': KeypointView(
+                    rng.random((33, 4), dtype=np.float32)), 'analysis': {}}}
+                for i in range(players)],
+            'tactical': {}, 'ball': {'bbox': [0, 0, 0, 0], 'confidence': 0}})
+    return results
+
+def expected_pose_averages(results):
+    lean, torque = {}, {}
+    for result in results:
+        for player in result['players']:
+            if player['pose']:
+                metrics = pose_metrics(player['pose']['keypoints'].array)
+                lean.setdefault(player['track_id'], []).append(abs(metrics['body_lean']))
+                torque.setdefault(player['track_id'], []).append(metrics['hip_torque'])
+    return ({t: np.mean(v) for t, v in lean.items()},
+            {t: np.mean(v) for t, v in torque.items()})
+
+@pytest.mark.parametrize('fmt, path', [('jsonl', 'results.jsonl'),
+                                       ('parquet', 'results'), ('json', 'results.json')])
+def test_pose_averages_per_track(tmp_path, fmt, path):
+    results = match_results()
+    path = str(tmp_path / path)
+    writer = make_writer(path, fmt=fmt, flush_every=7)
+    for result in results:
+        writer.write(result)
+    writer.close()
+
+    tracks = analyze(path, chunk_size=8, poses=True).track_summary()
+    lean, torque = expected_pose_averages(results)
+    assert tracks.loc[3, 'pose_frames'] == 0 and np.isnan(tracks.loc[3, 'avg_body_lean'])
+    for track_id in (0, 1, 2):
+        assert tracks.loc[track_id, 'pose_frames'] == 22
+        assert tracks.loc[track_id, 'avg_body_lean'] == pytest.approx(lean[track_id], rel=1e-5)
+        assert tracks.loc[track_id, 'avg_hip_torque'] == pytest.approx(torque[track_id], rel=1e-5)
+    assert (tracks['frames'] == 30).all()
+
+def test_pose_tables_memory_scales_with_poses_not_tracks():
+    # Every row a new track in a new frame: a dense frames x tracks stack
+    # would be 300 x 300 x 33 x 4 float32 (about 47 MB)
+    rng = np.random.default_rng(0)
+    players = pd.DataFrame({
+        'frame': np.arange(300), 'track_id': np.arange(300),
+        'keypoints': list(rng.random((300, 33, 4), dtype=np.float32))})
+    tracemalloc.start()
+    poses = _pose_tables(players)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert peak < 5 * 2 ** 20
+    assert len(poses) == 300 and (poses['pose_frames'] == 1).all()
@@ -0,0 +1,51 @@
+import cv2
+import numpy as np
+
+from ball import NO_BALL, BallTracker
+
+def frame(ball=None, size=(640, 360), radius=20):
+    # Pitch with one white ball, big enough for the Hough vote threshold
+    # at the reduced full-search scale
+    image = np.empty((size[1], size[0], 3), dtype=np.uint8)
+    image[:] = (40, 140, 40)
+    if ball is not None:
+        cv2.circle(image, ball, radius, (255, 255, 255), -1)
+    return image
+
+def centre(located):
+    x1, y1, x2, y2 = located['bbox']
+    return (x1 + x2) / 2, (y1 + y2) / 2
+
+def test_full_search_then_roi_around_the_prediction():
+    tracker = BallTracker()
+    first = tracker.locate(frame((200, 150)), {})
+    assert first['source'] == 'full'
+    assert np.allclose(centre(first), (200, 150), atol=3)
+    for step in range(1, 5):
+        located = tracker.locate(frame((200 + 8 * step, 150)), {})
+        assert located['source'] == 'roi'
+        assert np.allclose(centre(located), (200 + 8 * step, 150), atol=3)
+    assert tracker.stats['full'] == 1 and tracker.stats['roi'] == 4
+
+def test_circles_inside_player_boxes_are_not_the_ball():
+    players = {0: {'bbox': [180, 120, 230, 190]}}
+    assert BallTracker().locate(frame((200, 150)), players) == NO_BALL
+
+def test_coasts_on_the_prediction_then_searches_the_full_frame():
+    tracker = BallTracker(coast_frames=2, lost_after=3)
+    for step in range(3):
+        tracker.locate(frame((200 + 8 * step, 150)), {})
+    sources = [tracker.locate(frame(), {}).get('source') for _ in range(4)]
+    assert sources == ['predicted', 'predicted', None, None]
+    # Far from the old track, found again by the full-frame search
+    assert tracker.locate(frame((500, 300)), {})['source'] == 'full'
+
+def test_yolo_candidates_replace_hough():
+    tracker = BallTracker(reacquire_confidence=0.5)
+    tracker.locate(frame(), {}, [{'bbox': [90, 90, 110, 110], 'confidence': 0.4}])
+    assert tracker.stats['yolo'] == 1 and tracker.stats['full'] == 0
+    # Once locked, a weak box far away is not the ball; a confident one is
+    weak = [{'bbox': [590, 300, 610, 320], 'confidence': 0.3}]
+    assert tracker.locate(frame(), {}, weak)['source'] == 'predicted'
+    strong = [{'bbox': [590, 300, 610, 320], 'confidence': 0.9}]
+    assert centre(tracker.locate(frame(), {}, strong)) == (600, 310)
@@ -0,0 +1,102 @@
+import json
+import os
+from concurrent.futures import Future
+
+import batch
+from batch import (BatchRunner, find_videos, merge_shards, plan_shards,
+                   remap_result)
+
+def player(track_id, x):
+    return {'track_id': track_id, 'bbox': [x, 100, x + 20, 140]}
+
+def shard(path, frames, ids, shift=0):
+    # Two players walking right; the shard numbers them from its own 0
+    with open(path, 'w') as f:
+        for frame in frames:
+            players = [player(t, 100 * i + 2 * frame)
+                       for i, t in enumerate(ids)]
+            f.write(json.dumps({
+                'frame': frame, 'time': frame / 25, 'players': players,
+                'tactical': {'space_control': {str(t): 1.0 for t in ids},
+                             'passing_options': [{'receiver': 0,
+                                                  'track_id': ids[0]}]},
+                'events': []}) + '\n')
+    return str(path)
+
+def read(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+def test_find_videos_searches_directories_and_manifests(tmp_path):
+    (tmp_path / 'a' / 'b').mkdir(parents=True)
+    for name in ('a/one.mp4', 'a/b/two.MKV', 'a/notes.txt'):
+        (tmp_path / name).write_text('')
+    manifest = tmp_path / 'list.txt'
+    manifest.write_text('# matches\nthree.avi  # second half\n\n')
+    assert find_videos([str(tmp_path / 'a')], str(manifest)) == [
+        str(tmp_path / 'a' / 'b' / 'two.MKV'), str(tmp_path / 'a' / 'one.mp4'),
+        str(tmp_path / 'three.avi')]
+
+def test_shards_overlap_on_sampled_frames(match_video):
+    # 20 frames at 25 fps
+    assert plan_shards(match_video) == [(0, None, 0)]
+    assert plan_shards(match_video, 0.4, 0.2) == [(0, 10, 0), (5, None, 10)]
+    assert plan_shards(match_video, 0.3, 0.2, analysis_fps=12.5) == \
+        [(0, 6, 0), (2, 12, 6), (8, 18, 12), (14, None, 18)]
+
+def test_merge_stitches_track_ids_across_shards(tmp_path):
+    first = shard(tmp_path / 'a.jsonl', range(0, 10), [0, 1])
+    # Second shard starts 4 frames early and sees the players as 1 and 0,
+    # plus a newcomer
+    second = shard(tmp_path / 'b.jsonl', range(6, 20), [1, 0, 2])
+    output = str(tmp_path / 'merged.jsonl')
+    merge_shards([(first, 0, 0), (second, 6, 10)], output, 'jsonl')
+
+    results = read(output)
+    assert [r['frame'] for r in results] == list(range(20))
+    assert [p['track_id'] for p in results[10]['players']] == [0, 1, 2]
+    assert results[10]['tactical']['space_control'] == \
+        {'0': 1.0, '1': 1.0, '2': 1.0}
+    assert results[10]['tactical']['passing_options'][0]['track_id'] == 0
+
+def test_remap_rewrites_string_keys_and_events():
+    result = {'players': [player(3, 0)],
+              'tactical': {'space_control': {'3': 10.0}},
+              'events': [{'type': 'shot', 'track_id': 3}]}
+    remapped = remap_result(result, {3: 7})
+    assert remapped['players'][0]['track_id'] == 7
+    assert remapped['tactical']['space_control'] == {7: 10.0}
+    assert remapped['events'][0]['track_id'] == 7
+
+def test_run_job_streams_the_shard(make_analyzer, match_video, tmp_path):
+    import queue
+    batch._worker.update(analyzer=make_analyzer(analysis_fps=None),
+                         progress=queue.Queue())
+    job = {'id': 'match-001', 'video': match_video, 'start_frame': 5,
+           'end_frame': 15, 'output': str(tmp_path / 'match-001.jsonl'),
+           'format': 'jsonl'}
+    try:
+        frames, _ = batch._run_job(job)
+    finally:
+        batch._worker.clear()
+    assert frames == 10
+    assert [r['frame'] for r in read(job['output'])] == list(range(5, 15))
+
+def test_failed_jobs_retry_then_fail_their_video(tmp_path):
+    from conftest import ROOT
+    runner = BatchRunner(os.path.join(ROOT, 'config.yaml'),
+                         output_dir=str(tmp_path), retries=1)
+    runner._plan(['missing.avi'])
+    job = {'id': 'missing'}
+    failure = Future()
+    failure.set_exception(IOError('Cannot open video'))
+    assert runner._finish(job, failure)
+    assert not runner._finish(job, failure)
+    runner._merge_ready(['missing.avi'])
+
+    with open(runner.summary_path) as f:
+        summary = json.load(f)
+    assert summary['jobs']['missing']['status'] == 'failed'
+    assert summary['jobs']['missing']['attempts'] == 2
+    assert 'Cannot open video' in summary['jobs']['missing']['error']
+    assert summary['videos']['missing.avi']['status'] == 'failed'
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+
+from cache import STAGES, ResultCache, StageStore, _digest, stage_settings
+
+def stage_keys(config):
+    key, keys = 'video', {}
+    for stage in STAGES:
+        key = keys[stage] = _digest(key, stage, stage_settings(config, stage))
+    return keys
+
+def changed(config, **settings):
+    before, after = stage_keys(config), stage_keys(dict(config, **settings))
+    return [stage for stage in STAGES if before[stage] != after[stage]]
+
+def test_cache_is_off_by_default(config):
+    import yaml
+    from conftest import ROOT
+    with open(os.path.join(ROOT, 'config.yaml')) as f:
+        assert yaml.safe_load(f)['cache_dir'] is None
+
+def test_tactical_and_event_settings_keep_every_stage(config):
+    assert changed(config, passing_lane_width=5.0, space_control_mode='grid') == []
+    assert changed(config, event_pose_window=4, event_foot_ball_distance=1.0,
+                   event_cooldown=2.0) == []
+
+def test_settings_invalidate_their_stage_and_later_ones(config):
+    assert changed(config, ball_use_detector=True) == list(STAGES)
+    assert changed(config, tracker_max_distance=80) == ['tracks', 'poses']
+    assert changed(config, event_window=2.0) == ['tracks', 'poses']
+    assert changed(config, pose_quality='low') == ['poses']
+
+def test_pose_session_settings_are_part_of_the_poses_key(config):
+    assert changed(config, pose_max_sessions=4) == ['poses']
+    assert changed(config, pose_session_ttl=5) == ['poses']
+
+def test_stage_store_chunks_and_reloads(tmp_path):
+    store = StageStore(str(tmp_path / 'stage'), chunk_size=4)
+    for frame_idx in range(0, 10, 3):
+        store.put(frame_idx, {'frame': frame_idx})
+    # Moving to a new chunk wrote the finished ones
+    assert sorted(os.listdir(tmp_path / 'stage')) == \
+        ['chunk-000000.pkl', 'chunk-000001.pkl']
+    store.mark_complete()
+
+    reopened = StageStore(str(tmp_path / 'stage'), chunk_size=4)
+    assert reopened.complete
+    assert [frame_idx for frame_idx, _ in reopened.items(start_frame=4)] == [6, 9]
+    assert reopened.get(3) == {'frame': 3} and reopened.get(4) is None
+
+def test_replay_matches_the_analyzed_run(make_analyzer, match_video, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    first = make_analyzer(cache_dir=cache_dir, analysis_fps=None)
+    analyzed = first.analyze_video(match_video)
+
+    # Only tactical settings changed: tracks and poses come from the cache
+    second = make_analyzer(cache_dir=cache_dir, analysis_fps=None,
+                           space_control_mode='grid')
+    second.detector = None  # Replaying must not detect
+    replayed = second.analyze_video(match_video)
+    assert [r['frame'] for r in replayed] == [r['frame'] for r in analyzed]
+    for a, b in zip(analyzed, replayed):
+        assert [p['track_id'] for p in a['players']] == \
+            [p['track_id'] for p in b['players']]
+        assert [p['bbox'] for p in a['players']] == [p['bbox'] for p in b['players']]
+
+def test_partial_runs_reuse_detections_only(make_analyzer, match_video, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    make_analyzer(cache_dir=cache_dir, analysis_fps=None).analyze_video(
+        match_video, end_frame=10)
+    analyzer = make_analyzer(cache_dir=cache_dir, analysis_fps=None)
+    results = analyzer.analyze_video(match_video, start_frame=5, end_frame=10)
+    assert [r['frame'] for r in results] == list(range(5, 10))
+    assert analyzer.cache.stats == {'hits': 5, 'misses': 0}
@@ -0,0 +1,40 @@
+import numpy as np
+
+from ball import NO_BALL
+from calibration import PitchCalibrator
+from synthetic import SyntheticMatch
+
+SIZE = (640, 360)
+# Frame corners on the pitch corners
+CORNERS = [[0, 0, 0, 0], [640, 0, 105, 0], [640, 360, 105, 68], [0, 360, 0, 68]]
+
+def test_uncalibrated_leaves_tracks_alone():
+    calibrator = PitchCalibrator()
+    frame = SyntheticMatch(frames=1).render(0, SIZE)
+    tracks = {0: {'bbox': [10, 10, 30, 50]}}
+    assert not calibrator.enabled
+    assert calibrator.locate(frame, tracks, dict(NO_BALL)) == (tracks, NO_BALL)
+
+def test_players_are_placed_by_their_feet_and_cached():
+    match = SyntheticMatch(players=6, frames=5, seed=2)
+    calibrator = PitchCalibrator(CORNERS)
+    ball = {'bbox': [316, 176, 324, 184], 'confidence': 0.8}
+    for frame_idx in range(5):
+        tracks = {0: {'bbox': [300, 100, 340, 180]}}
+        tracks, located = calibrator.locate(
+            match.render(frame_idx, SIZE), tracks, ball)
+        np.testing.assert_allclose(tracks[0]['pitch'], [52.5, 34.0], atol=1e-3)
+        np.testing.assert_allclose(located['pitch'], [52.5, 34.0], atol=1e-3)
+    # Only the players moved: the first homography is reused
+    assert calibrator.stats['cached'] == 4
+    # No ball, no ball position
+    _, located = calibrator.locate(match.render(0, SIZE), {}, dict(NO_BALL))
+    assert 'pitch' not in located
+
+def test_cut_to_an_unregistrable_view_drops_the_homography():
+    calibrator = PitchCalibrator(CORNERS)
+    calibrator.update(SyntheticMatch(frames=1).render(0, SIZE))
+    crowd = np.zeros((SIZE[1], SIZE[0], 3), dtype=np.uint8)
+    crowd[:] = (30, 30, 160)
+    assert calibrator.update(crowd) is None
+    assert calibrator.stats['cut'] == 0 and calibrator.stats['failed'] == 1
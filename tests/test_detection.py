@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from detection import BALL_CLASS, PERSON_CLASS, PlayerDetector, split_detections
+
+class Boxes(SimpleNamespace):
+    def __len__(self):
+        return len(self.cls)
+
+class FakeYolo:
+    # Records what predict() was given; one person, one ball, one car per frame
+    def __init__(self):
+        self.sources = []
+
+    def predict(self, source, verbose=False):
+        self.sources.append(source)
+        boxes = Boxes(
+            cls=np.array([PERSON_CLASS, BALL_CLASS, 2]),
+            conf=np.array([0.6, 0.3, 0.9]),
+            xyxy=np.array([[10, 20, 30, 60], [5, 5, 9, 9], [0, 0, 50, 50]]))
+        return [SimpleNamespace(boxes=boxes) for _ in source]
+
+def detector(**settings):
+    # PlayerDetector without loading YOLO weights
+    instance = PlayerDetector.__new__(PlayerDetector)
+    instance.model = FakeYolo()
+    instance.batch_size = settings.get('batch_size', 8)
+    instance.confidence = 0.5
+    instance.class_ids = [PERSON_CLASS] + ([BALL_CLASS] if settings.get('ball') else [])
+    instance.class_confidence = {PERSON_CLASS: 0.5}
+    if settings.get('ball'):
+        instance.class_confidence[BALL_CLASS] = 0.25
+    return instance
+
+def test_frames_go_to_the_model_in_memory_batches():
+    player_detector = detector(batch_size=3)
+    frames = [np.zeros((4, 4, 3), dtype=np.uint8) for _ in range(7)]
+    detections = player_detector.detect_batch(frames)
+    assert [len(source) for source in player_detector.model.sources] == [3, 3, 1]
+    assert all(isinstance(source, list) for source in player_detector.model.sources)
+    assert player_detector.model.sources[0][0] is frames[0]
+    assert len(detections) == 7
+    assert detections[0] == [{'bbox': [10, 20, 30, 60], 'confidence': 0.6,
+                              'class_id': PERSON_CLASS}]
+
+def test_ball_boxes_use_their_own_threshold():
+    players, balls = split_detections(detector(ball=True).detect(np.zeros((4, 4, 3))))
+    assert [p['bbox'] for p in players] == [[10, 20, 30, 60]]
+    assert [b['bbox'] for b in balls] == [[5, 5, 9, 9]]
+    assert split_detections(None) == (None, None)
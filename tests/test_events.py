@@ -0,0 +1,71 @@
+import numpy as np
+
+from events import PoseEventDetector
+from keypoints import LANDMARK_INDEX, NUM_LANDMARKS
+
+DT = 0.04
+
+def pose(right_knee=180.0):
+    # Upright player in crop coordinates; the right knee bent to the angle
+    keypoints = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+    keypoints[:, 3] = 1.0
+    spots = {'SHOULDER': (0.5, 0.2), 'HIP': (0.5, 0.5), 'KNEE': (0.5, 0.7),
+             'ANKLE': (0.5, 0.9), 'FOOT_INDEX': (0.55, 0.95)}
+    for side in ('LEFT', 'RIGHT'):
+        for joint, xy in spots.items():
+            keypoints[LANDMARK_INDEX[f'{side}_{joint}'], :2] = xy
+    bend = np.radians(180.0 - right_knee)
+    ankle = np.array([0.5 + 0.2 * np.sin(bend), 0.7 + 0.2 * np.cos(bend)])
+    keypoints[LANDMARK_INDEX['RIGHT_ANKLE'], :2] = ankle
+    keypoints[LANDMARK_INDEX['RIGHT_FOOT_INDEX'], :2] = ankle + [0.05, 0.05]
+    return keypoints
+
+def player(keypoints, x=100):
+    # Square box so crop and pixel angles agree
+    return {'track_id': 4, 'bbox': [x, 100, x + 80, 180],
+            'pose': {'keypoints': keypoints}}
+
+def ball_at_right_foot(keypoints, x=100):
+    fx, fy = keypoints[LANDMARK_INDEX['RIGHT_FOOT_INDEX'], :2] * 80 + [x, 100]
+    return {'bbox': [fx - 4, fy - 4, fx + 4, fy + 4], 'confidence': 0.9}
+
+def swing(detector, start, end, frames=4, t0=0.0):
+    # Knee held at start, then extended to end in one frame at the ball
+    events = []
+    for f in range(frames):
+        events += detector.update(f, t0 + f * DT, [player(pose(start))], None)
+    kicked = pose(end)
+    events += detector.update(frames, t0 + frames * DT, [player(kicked)],
+                              ball_at_right_foot(kicked))
+    return events
+
+def test_fast_knee_extension_at_the_ball_is_a_shot():
+    events = swing(PoseEventDetector(), 90, 180)
+    assert [(e['type'], e['leg'], e['frame']) for e in events] == \
+        [('shot', 'right', 4)]
+    np.testing.assert_allclose(events[0]['knee_velocity'], 90 / DT, rtol=1e-3)
+
+def test_slower_extension_is_a_kick_and_then_the_track_is_quiet():
+    detector = PoseEventDetector(kick_velocity=400, shot_velocity=800)
+    assert [e['type'] for e in swing(detector, 160, 180)] == ['kick']
+    # Inside the cooldown
+    assert swing(detector, 90, 180, t0=0.5) == []
+    assert [e['type'] for e in swing(detector, 90, 180, t0=1.5)] == ['shot']
+
+def test_no_kick_away_from_the_ball():
+    detector = PoseEventDetector()
+    for f in range(4):
+        detector.update(f, f * DT, [player(pose(90))], None)
+    far = {'bbox': [400, 300, 408, 308], 'confidence': 0.9}
+    assert detector.update(4, 4 * DT, [player(pose(180))], far) == []
+
+def test_running_with_the_ball_at_the_feet_is_a_dribble():
+    detector = PoseEventDetector(dribble_duration=1.0)
+    keypoints = pose()
+    events = []
+    for f in range(40):
+        x = 100 + 4 * f  # 1.25 bbox heights per second
+        events += detector.update(f, f * DT, [player(keypoints, x)],
+                                  ball_at_right_foot(keypoints, x))
+    assert [e['type'] for e in events] == ['dribble']
+    assert events[0]['frame'] == 25 and events[0]['duration'] >= 1.0
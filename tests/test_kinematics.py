@@ -0,0 +1,108 @@
+import os
+
+import numpy as np
+import pytest
+
+from kinematics import KinematicsTracker, load_heatmaps
+
+def run_match(tracker, frames=600, players=6, churn=50, seed=0):
+    # Random walks; every churn frames each player gets a new track id
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(10, 60, (players, 2))
+    for f in range(frames):
+        positions = np.clip(positions + rng.normal(0, 0.2, positions.shape), 0, 104)
+        generation = f // churn
+        tracker.update(f * 0.04, [{'track_id': generation * 100 + i,
+                                   'pitch': list(positions[i])}
+                                  for i in range(players)])
+    return tracker
+
+def assert_same(a, b):
+    summary_a, summary_b = a.summary(), b.summary()
+    assert sorted(summary_a) == sorted(summary_b)
+    for track_id, values in summary_b.items():
+        for field, value in values.items():
+            assert summary_a[track_id][field] == pytest.approx(value, abs=1e-9)
+    np.testing.assert_array_equal(a.heatmap(), b.heatmap())
+    np.testing.assert_array_equal(a.heatmap([0, 105]), b.heatmap([0, 105]))
+
+def test_constant_speed_distance_and_speed():
+    tracker = KinematicsTracker(smoothing=3)
+    speeds = [tracker.update(f * 0.1, [{'track_id': 1, 'pitch': [10 + f * 0.5, 20]},
+                                       {'track_id': 2, 'pitch': None}])
+              for f in range(21)]
+    assert speeds[-1] == {1: pytest.approx(5.0)}
+    summary = tracker.summary()
+    assert list(summary) == [1]
+    assert summary[1]['distance'] == pytest.approx(10.0)
+    assert summary[1]['avg_speed'] == pytest.approx(5.0)
+    assert summary[1]['sprints'] == 0
+
+def test_sprint_counted_once():
+    tracker = KinematicsTracker(smoothing=1, sprint_speed=7.0, sprint_duration=1.0)
+    x = 0.0
+    for f in range(60):
+        x += 0.8 if 10 <= f < 40 else 0.1  # 8 m/s for 3 s
+        tracker.update(f * 0.1, [{'track_id': 1, 'pitch': [x, 10]}])
+    assert tracker.summary()[1]['sprints'] == 1
+
+def test_streaming_matches_full_history_with_bounded_memory():
+    streaming = run_match(KinematicsTracker(window=16, ttl=5, max_retired=8))
+    full = run_match(KinematicsTracker(streaming=False))
+    assert_same(streaming, full)
+    # Slots follow the live tracks and retired records are spilled to disk
+    assert len(streaming.ids) == streaming.capacity  # Never grew
+    assert len(streaming.retired) <= 8 and streaming.spilled
+
+def test_spilled_track_that_comes_back_is_merged():
+    tracker = KinematicsTracker(ttl=2, max_retired=0)
+    path = [[10 + f * 0.2, 10] for f in range(10)]
+    for f in range(5):
+        tracker.update(f * 0.04, [{'track_id': 1, 'pitch': path[f]}])
+    for f in range(5, 10):
+        tracker.update(f * 0.04, [{'track_id': 2, 'pitch': [30, 30]}])
+    assert tracker.spilled and 1 not in tracker.slots
+    for f in range(10, 15):
+        tracker.update(f * 0.04, [{'track_id': 1, 'pitch': path[f - 5]}])
+    summary = tracker.summary()
+    assert sorted(summary) == [1, 2]
+    assert summary[1]['distance'] == pytest.approx(0.8 + 0.8)
+    assert tracker.heatmap([1]).sum() == 10
+
+def test_save_round_trip(tmp_path):
+    tracker = run_match(KinematicsTracker(window=16, ttl=5, max_retired=8), frames=200)
+    path = str(tmp_path / 'match.npz')
+    tracker.save(path)
+    with np.load(path) as data:
+        summary = tracker.summary()
+        assert data['track_ids'].tolist() == list(summary)
+        np.testing.assert_allclose(data['totals'][:, 0],
+                                   [v['distance'] for v in summary.values()])
+    heatmaps = load_heatmaps(path)
+    for track_id in (0, 101, 302):
+        np.testing.assert_array_equal(heatmaps[track_id], tracker.heatmap([track_id]))
+
+def test_no_located_tracks(tmp_path):
+    tracker = KinematicsTracker()
+    assert tracker.update(0.0, [{'track_id': 1, 'pitch': None}]) == {}
+    assert tracker.summary() == {}
+    tracker.save(str(tmp_path / 'empty.npz'))
+    assert load_heatmaps(str(tmp_path / 'empty.npz')) == {}
+
+def test_uncalibrated_run_skips_kinematics(make_analyzer, match_video, tmp_path):
+    kinematics_dir = str(tmp_path / 'kinematics')
+    analyzer = make_analyzer(kinematics_dir=kinematics_dir, calibration_points=[])
+    assert analyzer.kinematics is None
+    results = analyzer.analyze_video(match_video)
+    assert results and not os.path.exists(kinematics_dir)
+
+def test_calibrated_run_saves_kinematics(make_analyzer, match_video, tmp_path):
+    kinematics_dir = str(tmp_path / 'kinematics')
+    corners = [[0, 0, 0, 0], [640, 0, 105, 0], [640, 360, 105, 68], [0, 360, 0, 68]]
+    analyzer = make_analyzer(kinematics_dir=kinematics_dir, calibration_points=corners,
+                             analysis_fps=None)
+    results = analyzer.analyze_video(match_video)
+    assert any(p['speed'] is not None for r in results for p in r['players'])
+    with np.load(os.path.join(kinematics_dir, 'match.npz')) as data:
+        assert len(data['track_ids']) >= 10
+        assert (data['totals'][:, 0] > 0).any()
@@ -0,0 +1,56 @@
+import json
+import socket
+
+import pytest
+
+from live import FrameBuffer, LiveAnalyzer, UdpEmitter, live_message
+
+def test_frame_buffer_keeps_the_newest_frames():
+    buffer = FrameBuffer(size=2)
+    for item in range(5):
+        buffer.put(item)
+    assert buffer.dropped == 3 and buffer.pending() == 2
+    assert buffer.get(timeout=0) == 3
+    buffer.close()
+    # Drained after close, then done
+    assert buffer.get() == 4 and buffer.get() is None
+
+def test_frame_buffer_get_times_out():
+    assert FrameBuffer().get(timeout=0.01) is None
+
+def test_live_run_over_a_file(make_analyzer, match_video):
+    results = []
+    live = LiveAnalyzer(make_analyzer(), latency_ms=None, buffer_size=64)
+    report = live.run(match_video, callback=results.append)
+    # Nothing dropped or skipped: every frame, in order, with its latency
+    assert [r['frame'] for r in results] == list(range(20))
+    assert all(r['latency_ms'] >= 0 for r in results)
+    assert report['frames'] == {'processed': 20, 'dropped': 0, 'stale': 0}
+    assert set(report['latency_ms']) == {'p50', 'p90', 'p95', 'p99', 'max'}
+
+def test_live_source_that_does_not_open(make_analyzer, tmp_path):
+    with pytest.raises(IOError):
+        LiveAnalyzer(make_analyzer()).run(str(tmp_path / 'missing.avi'))
+
+def test_udp_emitter_sends_compact_messages():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(('127.0.0.1', 0))
+    receiver.settimeout(2)
+    emitter = UdpEmitter(f"udp://127.0.0.1:{receiver.getsockname()[1]}")
+    result = {'frame': 3, 'time': 0.12, 'latency_ms': 40.0,
+              'players': [{'track_id': 1, 'bbox': [0, 0, 10, 20],
+                           'pose': {'keypoints': [0.0] * 132}}],
+              'ball': {'bbox': [0, 0, 0, 0], 'confidence': 0},
+              'tactical': {}}
+    try:
+        emitter(live_message(result))
+        message = json.loads(receiver.recv(65536))
+        assert message['frame'] == 3 and 'pose' not in message['players'][0]
+        emitter.max_bytes = 10
+        emitter(live_message(result))
+        assert emitter.stats == {'sent': 1, 'oversize': 1, 'failed': 0}
+    finally:
+        emitter.close()
+        receiver.close()
+    with pytest.raises(ValueError):
+        UdpEmitter('tcp://127.0.0.1:9000')
@@ -0,0 +1,20 @@
+import json
+
+from writers import to_serializable
+
+def comparable(results):
+    # Plain JSON values, as the writers would store them
+    return json.loads(json.dumps(results, default=to_serializable))
+
+def test_pipeline_matches_the_sequential_run(make_analyzer, match_video):
+    sequential = make_analyzer(analysis_fps=None).analyze_video(match_video)
+    pipelined = make_analyzer(analysis_fps=None, pipeline=True,
+                              pipeline_workers=2).analyze_video(match_video)
+    assert len(pipelined) == 20
+    assert comparable(pipelined) == comparable(sequential)
+
+def test_pipeline_honours_the_frame_range(make_analyzer, match_video):
+    results = make_analyzer(analysis_fps=None, pipeline=True,
+                            pipeline_workers=1).analyze_video(
+        match_video, start_frame=5, end_frame=12)
+    assert [r['frame'] for r in results] == list(range(5, 12))
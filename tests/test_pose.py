@@ -0,0 +1,62 @@
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+class FakePose:
+    # mediapipe.solutions.pose.Pose: one landmark set per call
+    created = []
+
+    def __init__(self, static_image_mode, model_complexity, **kwargs):
+        self.model_complexity = model_complexity
+        self.closed = False
+        self.calls = 0
+        FakePose.created.append(self)
+
+    def process(self, image):
+        self.calls += 1
+        landmarks = [SimpleNamespace(x=0.5, y=i / 33, z=0.0, visibility=1.0)
+                     for i in range(33)]
+        return SimpleNamespace(
+            pose_landmarks=SimpleNamespace(landmark=landmarks))
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    FakePose.created = []
+    monkeypatch.setitem(sys.modules, 'mediapipe', SimpleNamespace(
+        solutions=SimpleNamespace(pose=SimpleNamespace(Pose=FakePose))))
+    from pose_estmation import PoseAnalyzer
+    return PoseAnalyzer(model_complexity=2, max_sessions=3, session_ttl=2)
+
+CROP = np.zeros((64, 32, 3), dtype=np.uint8)
+
+def test_track_keeps_its_session(analyzer):
+    for _ in range(3):
+        assert analyzer.analyze_track(7, CROP) is not None
+        analyzer.advance()
+    assert list(analyzer.sessions) == [7]
+    assert analyzer.sessions[7][0].calls == 3
+
+def test_tier_change_replaces_the_track_session(analyzer):
+    analyzer.analyze_track(7, CROP, 2)
+    first = analyzer.sessions[7][0]
+    analyzer.analyze_track(7, CROP, 0)
+    # Still one session for the track, now at the new complexity
+    assert list(analyzer.sessions) == [7]
+    assert first.closed
+    assert analyzer.sessions[7][0].model_complexity == 0
+
+def test_unseen_tracks_age_out_and_lru_evicts(analyzer):
+    for track_id in (1, 2, 3):
+        analyzer.analyze_track(track_id, CROP)
+    analyzer.analyze_track(1, CROP)
+    analyzer.analyze_track(4, CROP)  # Full: 2 is the least recently used
+    assert list(analyzer.sessions) == [3, 1, 4]
+    for _ in range(3):
+        analyzer.analyze_track(4, CROP)
+        analyzer.advance()
+    assert list(analyzer.sessions) == [4]
@@ -0,0 +1,37 @@
+import numpy as np
+
+from pose_engine import DEFAULT_TIERS
+from pose_scheduler import PoseScheduler
+
+FRAME = np.zeros((720, 1280, 3), dtype=np.uint8)
+TRACKS = {0: {'bbox': [100, 300, 140, 400]}}  # 100 px tall, feet at y 400
+
+def ball_at(x):
+    return {'bbox': [x - 5, 395, x + 5, 405], 'confidence': 0.9}
+
+def tiers(scheduler, ball_xs):
+    return [dict(zip(plan['track_ids'], plan['tiers'])).get(0)
+            for plan in (scheduler.plan(FRAME, TRACKS, ball_at(x))
+                         for x in ball_xs)]
+
+def test_tier_follows_ball_distance():
+    scheduler = PoseScheduler(DEFAULT_TIERS, switch_frames=1, far_every=1)
+    # 0.3, 4 and 9 player heights from the ball
+    assert tiers(scheduler, [150, 520, 1020]) == ['high', 'medium', 'low']
+
+def test_one_frame_jump_keeps_the_tier():
+    scheduler = PoseScheduler(DEFAULT_TIERS, switch_frames=3)
+    assert tiers(scheduler, [150, 520, 150, 520, 150]) == ['high'] * 5
+
+def test_tier_switches_after_switch_frames():
+    scheduler = PoseScheduler(DEFAULT_TIERS, switch_frames=3)
+    assert tiers(scheduler, [150, 520, 520, 520, 520]) == \
+        ['high', 'high', 'high', 'medium', 'medium']
+
+def test_lost_ball_for_a_frame_keeps_far_players_staggered():
+    scheduler = PoseScheduler(DEFAULT_TIERS, switch_frames=3, far_every=3)
+    planned = [scheduler.plan(FRAME, TRACKS, ball)['track_ids']
+               for ball in [ball_at(1020)] * 3 + [{'confidence': 0}]
+               + [ball_at(1020)] * 2]
+    # Far: posed every third frame, also through the missing ball
+    assert sum(bool(ids) for ids in planned) == 2
@@ -0,0 +1,51 @@
+import json
+import pstats
+
+from profiling import Profiler
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler()
+    assert profiler.call('detect', max, 1, 2) == 2
+    profiler.count('poses', 3)
+    profiler.frame(0)
+    assert not profiler.stages and not profiler.counts and profiler.frames == 0
+
+def test_stages_counts_and_trace(tmp_path):
+    trace = tmp_path / 'trace.jsonl'
+    profiler = Profiler(trace_path=str(trace))
+    assert profiler.enabled
+    for frame_idx in range(2):
+        assert list(profiler.iterate('decode', iter('ab'))) == ['a', 'b']
+        profiler.call('detect', sorted, [3, 1])
+        profiler.count('poses', 2)
+        profiler.frame(frame_idx)
+    profiler.add('tactical', 0.5, calls=4)
+    # next() that ends the iterator is timed too
+    assert profiler.stages['decode'][0] == 6
+    assert profiler.stages['detect'][0] == 2
+    assert profiler.stages['tactical'][:2] == [4, 0.5]
+    assert profiler.counts == {'poses': 4}
+    profiler.close()
+
+    lines = [json.loads(line) for line in trace.read_text().splitlines()]
+    assert [line['frame'] for line in lines] == [0, 1]
+    assert set(lines[0]['ms']) == {'decode', 'detect'}
+    assert lines[1]['counts'] == {'poses': 2}
+
+def test_cprofile_hook_only_profiles_chosen_stages(tmp_path):
+    output = str(tmp_path / 'profile.prof')
+    profiler = Profiler(hook='cprofile', hook_stages=['pose'],
+                        hook_output=output)
+
+    def pose_work():
+        return sum(range(100))
+
+    def detect_work():
+        return sum(range(100))
+    profiler.call('pose', pose_work)
+    profiler.call('detect', detect_work)
+    profiler.close()
+    functions = {name for _, _, name in pstats.Stats(output).stats}
+    assert 'pose_work' in functions and 'detect_work' not in functions
+    # Stages show up under their marker name
+    assert 'stage_pose' in functions
@@ -0,0 +1,97 @@
+import cv2
+import numpy as np
+
+from main import FootballAnalyzer
+from sampling import FrameSampler
+from stubs import ColourDetector, StubPoseEngine
+
+class FakeCapture:
+    # cv2.VideoCapture over numbered blank frames
+    def __init__(self, frames=100, fps=25.0):
+        self.frames = frames
+        self.fps = fps
+        self.position = 0
+        self.reads = []
+
+    def isOpened(self):
+        return True
+
+    def get(self, prop):
+        return {cv2.CAP_PROP_POS_FRAMES: self.position,
+                cv2.CAP_PROP_FRAME_COUNT: self.frames,
+                cv2.CAP_PROP_FPS: self.fps,
+                cv2.CAP_PROP_FRAME_WIDTH: 64,
+                cv2.CAP_PROP_FRAME_HEIGHT: 48}.get(prop, 0)
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.position = int(value)
+        return True
+
+    def grab(self):
+        if self.position >= self.frames:
+            return False
+        self.position += 1
+        return True
+
+    def read(self):
+        if self.position >= self.frames:
+            return False, None
+        self.reads.append(self.position)
+        self.position += 1
+        return True, np.zeros((48, 64, 3), dtype=np.uint8)
+
+    def release(self):
+        pass
+
+def sampled_frames(monkeypatch, config, events, frames=100):
+    # Frame indices analyzed by _run_video when the frames in events are
+    # ball-near-player events
+    capture = FakeCapture(frames)
+    monkeypatch.setattr(cv2, 'VideoCapture', lambda path: capture)
+    analyzer = FootballAnalyzer(config=config, detector=ColourDetector(),
+                                pose_engine=StubPoseEngine())
+    monkeypatch.setattr(
+        analyzer, '_process_frame',
+        lambda frame_idx, timestamp, frame, detections:
+            {'frame': frame_idx, 'time': timestamp})
+    monkeypatch.setattr(analyzer, '_is_event',
+                        lambda result: result['frame'] in events)
+    return [result['frame'] for result in analyzer._run_video('fake.mp4')]
+
+def test_default_rate_without_events(monkeypatch, config):
+    assert sampled_frames(monkeypatch, config, ()) == list(range(0, 100, 5))
+
+def test_event_early_in_batch_boosts_its_own_window(monkeypatch, config):
+    # analysis_fps 5 of 25: a batch of 8 reaches 1.4 s ahead, but frame 10
+    # raises the rate to event_fps for the next event_window (1 s) at once
+    frames = sampled_frames(monkeypatch, config, {10})
+    assert frames == [0, 5, 10] + list(range(11, 36)) + list(range(40, 100, 5))
+
+def test_event_late_in_batch(monkeypatch, config):
+    # The last frame of the first batch: nothing read ahead to drop
+    frames = sampled_frames(monkeypatch, config, {35})
+    assert frames == list(range(0, 36, 5)) + list(range(36, 61)) + \
+        list(range(65, 100, 5))
+
+def test_events_extend_the_boost(monkeypatch, config):
+    frames = sampled_frames(monkeypatch, config, {10, 30})
+    assert frames == [0, 5, 10] + list(range(11, 56)) + list(range(60, 100, 5))
+
+def test_boosted_times_follow_event_fps(monkeypatch, config):
+    config.update(event_fps=12.5, detection_batch_size=4)
+    frames = sampled_frames(monkeypatch, config, {20})
+    # 1.8 s ends the boost between frames 44 and 46
+    assert frames == [0, 5, 10, 15, 20] + list(range(22, 47, 2)) + \
+        list(range(51, 100, 5))
+
+def test_rewind_reads_after_the_event():
+    capture = FakeCapture(50)
+    sampler = FrameSampler(capture, 25.0, analysis_fps=5, event_fps=25)
+    iterator = iter(sampler)
+    read = [next(iterator)[0] for _ in range(4)]
+    assert read == [0, 5, 10, 15]
+    sampler.boost(5)
+    assert not sampler.due(5, 10)
+    sampler.rewind(5)
+    assert [next(iterator)[0] for _ in range(3)] == [6, 7, 8]
@@ -0,0 +1,115 @@
+import numpy as np
+
+from ball import NO_BALL
+from tactical import (SpaceControlGrid, TacticalAnalyzer, passing_lanes,
+                      team_control, voronoi_areas)
+
+FRAME_SIZE = (1280, 720)
+
+def players_at(points, teams=None):
+    return [dict({'track_id': i, 'bbox': [0, 0, 10, 20], 'pitch': list(p)},
+                 **({} if teams is None else {'team': teams[i]}))
+            for i, p in enumerate(points)]
+
+def test_no_ball_means_no_passing_options_calibrated():
+    players = players_at([(10, 10), (30, 20), (50, 30)])
+    analysis = TacticalAnalyzer().analyze_positions(
+        players, dict(NO_BALL), FRAME_SIZE)
+    assert analysis['passing_options'] == []
+    assert len(analysis['space_control']) == 3
+
+def test_no_ball_means_no_passing_options_uncalibrated():
+    players = [{'track_id': i, 'bbox': [x, 300, x + 20, 360]}
+               for i, x in enumerate((100, 500, 900))]
+    analysis = TacticalAnalyzer().analyze_positions(
+        players, dict(NO_BALL), FRAME_SIZE)
+    assert analysis['passing_options'] == []
+
+def test_located_ball_gives_passing_options():
+    players = players_at([(10, 10), (30, 10), (30, 40)], teams=[0, 0, 1])
+    ball = {'bbox': [0, 0, 4, 4], 'confidence': 0.9, 'pitch': [10.5, 10]}
+    options = TacticalAnalyzer().analyze_positions(
+        players, ball, FRAME_SIZE)['passing_options']
+    # The passer's team mate; not the passer, not the opponent
+    assert [option['track_id'] for option in options] == [1]
+
+def test_uncalibrated_positions_scale_frame_to_pitch():
+    analyzer = TacticalAnalyzer()
+    players = [{'bbox': [0, 0, 1280, 720]}, {'bbox': [0, 0, 0, 0]}]
+    positions = analyzer._pitch_positions(players, FRAME_SIZE)
+    np.testing.assert_allclose(positions, [[52.5, 34.0], [0.0, 0.0]])
+    # Without a frame size nothing can be placed
+    assert np.isnan(analyzer._pitch_positions(players)).all()
+
+def test_passing_lane_blocked_by_opponent_on_the_line():
+    ball = np.array([0.0, 0.0])
+    players = np.array([[0.5, 0.0], [20.0, 0.0], [10.0, 0.5], [10.0, 20.0]])
+    teams = np.array([0, 0, 1, 0])
+    open_lanes, distances = passing_lanes(players, ball, teams, lane_width=2.0)
+    # Player 0 is nearest the ball (the passer, too close to receive),
+    # player 1 is screened by opponent 2, player 3 is free
+    np.testing.assert_array_equal(open_lanes, [False, False, False, True])
+    np.testing.assert_allclose(distances[1], 20.0)
+
+def test_passing_lanes_batch_matches_single_frames():
+    rng = np.random.default_rng(0)
+    positions = rng.uniform([0, 0], [105, 68], size=(6, 10, 2))
+    positions[2, 3] = np.nan
+    balls = rng.uniform([0, 0], [105, 68], size=(6, 2))
+    teams = np.tile(np.arange(10) % 2, (6, 1))
+    analyzer = TacticalAnalyzer()
+    open_lanes, distances = analyzer.passing_options_batch(
+        positions, balls, teams, chunk=4)
+    for f in range(6):
+        single_open, single_distances = passing_lanes(
+            positions[f], balls[f], teams[f], analyzer.lane_width)
+        np.testing.assert_array_equal(open_lanes[f], single_open)
+        np.testing.assert_allclose(distances[f], single_distances)
+    assert np.isnan(distances[2, 3]) and not open_lanes[2, 3]
+
+BOUNDS = (0.0, 0.0, 105.0, 68.0)
+
+def test_voronoi_cells_tile_the_pitch():
+    rng = np.random.default_rng(1)
+    points = rng.uniform([0, 0], [105, 68], size=(22, 2))
+    # Off the pitch (clipped to the touchline) and two at one spot
+    points[0] = [-5.0, 30.0]
+    points[2] = points[1]
+    areas = voronoi_areas(points, BOUNDS)
+    assert (areas > 0).all()
+    np.testing.assert_allclose(areas.sum(), 105 * 68)
+    assert areas[1] == areas[2]
+
+def test_voronoi_of_two_players_splits_the_pitch():
+    areas = voronoi_areas([[10.0, 34.0], [40.0, 34.0]], BOUNDS)
+    np.testing.assert_allclose(areas, [25 * 68, 80 * 68])
+    np.testing.assert_allclose(voronoi_areas([[3.0, 3.0]], BOUNDS), [105 * 68])
+
+def test_grid_agrees_with_voronoi():
+    rng = np.random.default_rng(2)
+    points = rng.uniform([0, 0], [105, 68], size=(22, 2))
+    grid = SpaceControlGrid(BOUNDS, resolution=0.5).areas(points)
+    np.testing.assert_allclose(grid.sum(), 105 * 68)
+    np.testing.assert_allclose(grid, voronoi_areas(points, BOUNDS), atol=15)
+
+def test_referees_control_no_space():
+    players = players_at([(20, 34), (80, 34), (50, 34)], teams=[0, 1, -1])
+    for mode in ('voronoi', 'grid'):
+        analysis = TacticalAnalyzer(space_control_mode=mode).analyze_positions(
+            players, dict(NO_BALL), FRAME_SIZE)
+        assert sorted(analysis['space_control']) == [0, 1]
+        np.testing.assert_allclose(sum(analysis['team_control'].values()), 1.0)
+
+def test_team_series_matches_team_control():
+    rng = np.random.default_rng(3)
+    positions = rng.uniform([0, 0], [105, 68], size=(4, 10, 2))
+    positions[1, 4] = np.nan
+    teams = np.tile(np.arange(10) % 2, (4, 1))
+    grid = SpaceControlGrid(BOUNDS)
+    series = grid.team_series(positions, teams)
+    for f in range(4):
+        present = ~np.isnan(positions[f]).any(axis=1)
+        areas = np.full(10, np.nan)
+        areas[present] = grid.areas(positions[f][present])
+        shares = team_control(areas, teams[f])
+        np.testing.assert_allclose(series[f], [shares[0], shares[1]])
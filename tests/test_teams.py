@@ -0,0 +1,37 @@
+import numpy as np
+
+from synthetic import SyntheticMatch
+from teams import REFEREE, TeamClassifier
+
+SIZE = (1280, 720)
+
+def tracks_of(match, frame_idx):
+    return {i: {'bbox': [int(v) for v in box]}
+            for i, box in enumerate(match.boxes(frame_idx, SIZE))}
+
+def test_players_split_into_their_kits():
+    match = SyntheticMatch(players=22, frames=30, seed=4)
+    classifier = TeamClassifier(refresh_every=10, warmup_samples=100)
+    for frame_idx in range(30):
+        labelled = classifier.assign(match.render(frame_idx, SIZE),
+                                     tracks_of(match, frame_idx))
+    teams = np.array([labelled[i]['team'] for i in range(22)])
+    truth = match.teams
+    # Labels are arbitrary but must follow the kits; the referee is apart
+    assert teams[truth == 2].tolist() == [REFEREE]
+    assert len(set(teams[truth == 0])) == 1 and len(set(teams[truth == 1])) == 1
+    assert {teams[truth == 0][0], teams[truth == 1][0]} == {0, 1}
+
+def test_labels_are_cached_between_refreshes():
+    match = SyntheticMatch(players=22, frames=30, seed=4)
+    classifier = TeamClassifier(refresh_every=10, warmup_samples=22)
+    for frame_idx in range(30):
+        classifier.assign(match.render(frame_idx, SIZE), tracks_of(match, frame_idx))
+    # Frame 0 twice (before and after clustering), then frames 10 and 20
+    assert classifier.stats['embedded'] == 22 * 4
+    assert classifier.stats['embedded'] + classifier.stats['cached'] == 22 * 31
+
+def test_no_labels_before_warm_up():
+    match = SyntheticMatch(players=4, frames=1)
+    tracks = tracks_of(match, 0)
+    assert TeamClassifier().assign(match.render(0, SIZE), tracks) == tracks
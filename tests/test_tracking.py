@@ -0,0 +1,79 @@
+import numpy as np
+
+from tracking import KalmanTracker, Tracker, count_id_switches, iou_matrix
+
+def box(cx, cy, w=20, h=40):
+    return [int(cx - w / 2), int(cy - h / 2), int(cx + w / 2), int(cy + h / 2)]
+
+def dets(*centres):
+    return [{'bbox': box(*c)} for c in centres]
+
+def test_hungarian_finds_the_global_assignment():
+    # Greedy lets track 0 take the detection that only track 1 can reach
+    for assignment, expected in (('greedy', {0: box(118, 0)}),
+                                 ('hungarian', {0: box(75, 0), 1: box(118, 0)})):
+        tracker = Tracker(max_distance=40, assignment=assignment)
+        tracker.update(dets((100, 0), (140, 0)))
+        tracks = tracker.update(dets((118, 0), (75, 0)))
+        assert {t: v['bbox'] for t, v in tracks.items() if t < 2} == expected
+
+def test_iou_metric_gates_on_overlap():
+    tracker = Tracker(assignment='hungarian', metric='iou', min_iou=0.3)
+    tracker.update(dets((100, 100)))
+    assert list(tracker.update(dets((104, 100)))) == [0]
+    # No overlap left: a new track
+    assert list(tracker.update(dets((200, 100)))) == [1]
+
+def test_lost_track_coasts_for_max_age_then_recovers():
+    tracker = Tracker(max_age=2)
+    tracker.update(dets((100, 100)))
+    assert tracker.update([]) == {}
+    assert list(tracker.update(dets((102, 100)))) == [0]
+    assert tracker.stats['recovered'] == 1
+    for _ in range(3):
+        tracker.update([])
+    assert list(tracker.update(dets((102, 100)))) == [1]
+
+def test_detection_skipped_holds_the_last_boxes():
+    tracker = Tracker()
+    tracker.update(dets((100, 100)))
+    assert tracker.update(None) == {0: {'bbox': box(100, 100), 'frames': 1}}
+
+def test_iou_matrix():
+    iou = iou_matrix([[0, 0, 10, 10]], [[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]])
+    np.testing.assert_allclose(iou, [[1.0, 1 / 3, 0.0]])
+
+def crossing(frames=30, speed=20):
+    # Two players running through each other along the same line, faster
+    # per frame than half their gap at the crossing
+    return [{0: box(100 + speed * f, 200),
+             1: box(110 + speed * (frames - f), 200)}
+            for f in range(frames + 1)]
+
+def run(tracker, truth):
+    return [tracker.update([{'bbox': b} for b in frame.values()], 0.04)
+            for frame in truth]
+
+def test_kalman_keeps_ids_through_a_crossing():
+    truth = crossing()
+    kalman = count_id_switches(truth, run(KalmanTracker(), truth))
+    assert kalman['id_switches'] == 0 and kalman['misses'] == 0
+    greedy = count_id_switches(truth, run(Tracker(max_distance=50), truth))
+    assert greedy['id_switches'] > 0
+
+def test_kalman_predicts_skipped_detections():
+    tracker = KalmanTracker()
+    for f in range(10):
+        tracker.update(dets((100 + 10 * f, 200)), 0.04)
+    predicted = tracker.update(None, 0.04)[0]
+    assert predicted['predicted']
+    centre = (predicted['bbox'][0] + predicted['bbox'][2]) / 2
+    assert abs(centre - 200) < 3
+
+def test_kalman_recycles_slots_of_dead_tracks():
+    tracker = KalmanTracker(max_age=1, capacity=4)
+    for f in range(50):
+        # A new player every frame, each seen once
+        tracker.update(dets((1000 * f, 200)), 0.04)
+    assert len(tracker.ids) == 4
+    assert tracker.next_id == 50
@@ -0,0 +1,53 @@
+import threading
+
+from profiling import Profiler
+from visualization import VisualizationExporter
+
+class Figure:
+    def __init__(self, log, name):
+        self.log, self.name = log, name
+
+    def write_html(self, path, include_plotlyjs=None):
+        self.log.append(self.name)
+
+class SlowVisualizer:
+    # Renders are logged instead of drawn; every render waits for release
+    def __init__(self):
+        self.log = []
+        self.release = threading.Event()
+
+    def create_3d_pose(self, keypoints, frame_idx):
+        self.release.wait()
+        return Figure(self.log, f"pose_{frame_idx}")
+
+    def create_tactical_view(self, players, ball, frame_idx):
+        self.release.wait()
+        return Figure(self.log, f"tactical_{frame_idx}")
+
+PLAYERS = [{'track_id': 1, 'bbox': [0, 0, 10, 20], 'pose': {'keypoints': None}}]
+BALL = {'bbox': [0, 0, 0, 0], 'confidence': 0}
+
+def test_event_renders_are_never_dropped(tmp_path):
+    visualizer = SlowVisualizer()
+    profiler = Profiler(enabled=True)
+    exporter = VisualizationExporter(
+        visualizer, output_dir=str(tmp_path), queue_size=2, profiler=profiler)
+    exporter.start('match')
+    for frame_idx in range(6):
+        exporter.submit(frame_idx, None, PLAYERS, BALL, set())
+    # The queue is full: these wait for the worker instead of being dropped
+    waiter = threading.Thread(target=lambda: [
+        exporter.submit_poses(10, PLAYERS, {1}),
+        exporter.submit(11, None, PLAYERS, BALL, {1})])
+    waiter.start()
+    waiter.join(0.2)
+    assert waiter.is_alive()
+    visualizer.release.set()
+    waiter.join()
+    exporter.close()
+
+    assert 'pose_10' in visualizer.log and 'pose_11' in visualizer.log
+    dropped = exporter.stats['dropped']
+    assert dropped >= 3
+    assert profiler.counts['export_dropped'] == dropped
+    assert exporter.stats['exported'] == 8 - dropped
@@ -0,0 +1,83 @@
+import json
+
+import numpy as np
+import pytest
+
+from writers import make_writer
+
+def result(frame, track_ids=(0,)):
+    keypoints = np.zeros((33, 4), dtype=np.float32)
+    return {'frame': frame, 'time': frame / 25,
+            'ball': {'bbox': [0, 0, 0, 0], 'confidence': 0.0},
+            'players': [{'track_id': t, 'bbox': [10, 10, 30, 50], 'team': 0,
+                         'pose': {'keypoints': keypoints, 'analysis': {}}}
+                        for t in track_ids],
+            'tactical': {'space_control': {}, 'passing_options': []}}
+
+def read_lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+def test_jsonl_resume_drops_a_half_written_line(tmp_path):
+    path = str(tmp_path / 'results.jsonl')
+    writer = make_writer(path, 'jsonl', flush_every=2)
+    for frame in range(3):
+        writer.write(result(frame, track_ids=(frame, 7)))
+    writer.close()
+    # Crash in the middle of the next frame
+    with open(path, 'a') as f:
+        f.write('{"frame": 3, "ti')
+
+    writer = make_writer(path, 'jsonl', append=True)
+    assert writer.resume_state() == (2, 7)
+    writer.write(result(3))
+    writer.close()
+    assert [r['frame'] for r in read_lines(path)] == [0, 1, 2, 3]
+
+def test_jsonl_resume_of_an_empty_file(tmp_path):
+    writer = make_writer(str(tmp_path / 'results.jsonl'), 'jsonl', append=True)
+    assert writer.resume_state() == (None, -1)
+    writer.close()
+
+def test_parquet_appends_parts_and_resumes(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'results')
+    writer = make_writer(path, 'parquet', flush_every=2)
+    for frame in range(3):
+        writer.write(result(frame, track_ids=(4, frame)))
+    writer.close()
+
+    writer = make_writer(path, 'parquet', append=True)
+    assert writer.resume_state() == (2, 4)
+    writer.write(result(3, track_ids=(5,)))
+    writer.close()
+    frames = pq.read_table(str(tmp_path / 'results' / 'frames'))
+    players = pq.read_table(str(tmp_path / 'results' / 'players'))
+    assert sorted(frames.column('frame').to_pylist()) == [0, 1, 2, 3]
+    assert players.num_rows == 7
+    assert len(players.column('keypoints')[0]) == 33 * 4
+
+    # Without append the table starts over
+    make_writer(path, 'parquet').close()
+    assert make_writer(path, 'parquet', append=True).resume_state() == (None, -1)
+
+def test_json_array_cannot_resume(tmp_path):
+    with pytest.raises(ValueError):
+        make_writer(str(tmp_path / 'results.json'), 'json', append=True)
+
+def test_resumed_run_continues_after_the_last_frame(make_analyzer, match_video,
+                                                    tmp_path):
+    path = str(tmp_path / 'results.jsonl')
+    make_analyzer(analysis_fps=None).analyze_video(
+        match_video, sink=make_writer(path, 'jsonl'), end_frame=10)
+    first = read_lines(path)
+    assert first[-1]['frame'] == 9
+
+    make_analyzer(analysis_fps=None).analyze_video(
+        match_video, sink=make_writer(path, 'jsonl', append=True), resume=True)
+    frames = [r['frame'] for r in read_lines(path)]
+    assert frames == list(range(20))
+    # Tracks restarted after the resume get ids unused before it
+    before = {p['track_id'] for r in first for p in r['players']}
+    after = {p['track_id'] for r in read_lines(path)[10:] for p in r['players']}
+    assert after and min(after) > max(before)
@@ -1,52 +1,305 @@
-from collections import defaultdict
-import numpy as np
-
-class Tracker:
-    def __init__(self):
-        self.tracked_objects = {}
-        self.next_id = 0
-        self.max_distance = 50  # pixels
-        
-    def update(self, detections):
-        # Simple tracking based on bbox proximity
-        updated_tracks = {}
-        used_detections = set()
-        
-        # Match existing tracks
-        for track_id, track in self.tracked_objects.items():
-            best_match = None
-            min_dist = float('inf')
-            
-            for i, det in enumerate(detections):
-                if i in used_detections:
-                    continue
-                    
-                dist = self._bbox_distance(track['bbox'], det['bbox'])
-                if dist < self.max_distance and dist < min_dist:
-                    min_dist = dist
-                    best_match = i
-            
-            if best_match is not None:
-                used_detections.add(best_match)
-                updated_tracks[track_id] = {
-                    'bbox': detections[best_match]['bbox'],
-                    'frames': track['frames'] + 1
-                }
-        
-        # Add new detections
-        for i, det in enumerate(detections):
-            if i not in used_detections:
-                updated_tracks[self.next_id] = {
-                    'bbox': det['bbox'],
-                    'frames': 1
-                }
-                self.next_id += 1
-                
-        self.tracked_objects = updated_tracks
-        return updated_tracks
-    
-    def _bbox_distance(self, box1, box2):
-        # Calculate center point distance
-        c1 = np.array([(box1[0]+box1[2])/2, (box1[1]+box1[3])/2])
-        c2 = np.array([(box2[0]+box2[2])/2, (box2[1]+box2[3])/2])
-        return np.linalg.norm(c1 - c2)
\ No newline at end of file
+from collections import defaultdict
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+class Tracker:
+    def __init__(self, max_distance=50, assignment='greedy', metric='center',
+                 min_iou=0.3, max_age=0):
+        self.tracked_objects = {}
+        self.next_id = 0
+        self.max_distance = max_distance  # pixels
+        self.assignment = assignment  # 'greedy' or 'hungarian'
+        self.metric = metric  # 'center' or 'iou' (hungarian only)
+        self.min_iou = min_iou
+        self.max_age = max_age  # Frames a track survives without a match
+        self.stats = defaultdict(int)
+
+    def update(self, detections, dt=None):
+        # No detections for this frame (detection skipped): hold last boxes
+        if detections is None:
+            return {track_id: dict(track)
+                    for track_id, track in self.tracked_objects.items()
+                    if not track.get('missed')}
+
+        track_ids = list(self.tracked_objects.keys())
+        track_boxes = [self.tracked_objects[t]['bbox'] for t in track_ids]
+        det_boxes = [det['bbox'] for det in detections]
+
+        if self.assignment == 'hungarian':
+            matches = self._match_hungarian(track_boxes, det_boxes)
+        else:
+            matches = self._match_greedy(track_boxes, det_boxes)
+
+        # Matched tracks take the new bbox
+        updated_tracks = {}
+        matched_tracks = set()
+        used_detections = set()
+        for t, d in matches:
+            track_id = track_ids[t]
+            track = self.tracked_objects[track_id]
+            if track.get('missed', 0) > 0:
+                self.stats['recovered'] += 1
+            updated_tracks[track_id] = {
+                'bbox': detections[d]['bbox'],
+                'frames': track['frames'] + 1
+            }
+            matched_tracks.add(track_id)
+            used_detections.add(d)
+        self.stats['matches'] += len(matches)
+
+        # Unmatched tracks coast for up to max_age frames (not reported)
+        coasting = {}
+        for track_id in track_ids:
+            if track_id in matched_tracks:
+                continue
+            track = self.tracked_objects[track_id]
+            missed = track.get('missed', 0) + 1
+            if missed <= self.max_age:
+                coasting[track_id] = dict(track, missed=missed)
+            else:
+                self.stats['lost_tracks'] += 1
+
+        # Add new detections
+        for i, det in enumerate(detections):
+            if i not in used_detections:
+                updated_tracks[self.next_id] = {
+                    'bbox': det['bbox'],
+                    'frames': 1
+                }
+                self.next_id += 1
+                self.stats['new_tracks'] += 1
+
+        self.tracked_objects = {**updated_tracks, **coasting}
+        return updated_tracks
+
+    def _match_greedy(self, track_boxes, det_boxes):
+        # Each track (in insertion order) takes its nearest free detection
+        if not track_boxes or not det_boxes:
+            return []
+        dist = self._center_distances(track_boxes, det_boxes)
+        matches = []
+        used = np.zeros(len(det_boxes), dtype=bool)
+        for t in range(len(track_boxes)):
+            candidates = np.where(used | (dist[t] >= self.max_distance),
+                                  np.inf, dist[t])
+            best = int(np.argmin(candidates))
+            if np.isfinite(candidates[best]):
+                used[best] = True
+                matches.append((t, best))
+        return matches
+
+    def _match_hungarian(self, track_boxes, det_boxes):
+        # Globally optimal assignment over the full cost matrix
+        if not track_boxes or not det_boxes:
+            return []
+        if self.metric == 'iou':
+            cost = 1.0 - iou_matrix(track_boxes, det_boxes)
+            valid = cost <= 1.0 - self.min_iou
+        else:
+            cost = self._center_distances(track_boxes, det_boxes)
+            valid = cost < self.max_distance
+
+        # Gated pairs get a cost no valid assignment can beat
+        cost = np.where(valid, cost, cost.max() + 1e6)
+        rows, cols = linear_sum_assignment(cost)
+        return [(int(t), int(d)) for t, d in zip(rows, cols) if valid[t, d]]
+
+    def _center_distances(self, boxes1, boxes2):
+        b1 = np.asarray(boxes1, dtype=np.float64)
+        b2 = np.asarray(boxes2, dtype=np.float64)
+        c1 = (b1[:, :2] + b1[:, 2:]) / 2
+        c2 = (b2[:, :2] + b2[:, 2:]) / 2
+        return np.linalg.norm(c1[:, None, :] - c2[None, :, :], axis=2)
+
+class KalmanTracker(Tracker):
+    # Constant-velocity Kalman filter per track. State lives in preallocated
+    # arrays whose slots are recycled when tracks die, so memory follows the
+    # number of live tracks rather than next_id.
+    def __init__(self, max_age=5, gate=9.21, accel_std=300.0,
+                 measurement_std=10.0, velocity_std=500.0, default_dt=0.04,
+                 capacity=64):
+        super().__init__(assignment='hungarian', max_age=max_age)
+        self.gate = gate  # Chi-square gate on Mahalanobis distance (2 dof)
+        self.accel_std = accel_std  # px/s^2
+        self.measurement_std = measurement_std  # px
+        self.velocity_std = velocity_std  # px/s, initial uncertainty
+        self.default_dt = default_dt  # seconds
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.ids = np.full(capacity, -1, dtype=np.int64)
+        self.state = np.zeros((capacity, 4))  # cx, cy, vx, vy
+        self.cov = np.zeros((capacity, 4, 4))
+        self.size = np.zeros((capacity, 2))  # w, h of the last measurement
+        self.frames = np.zeros(capacity, dtype=np.int64)
+        self.missed = np.zeros(capacity, dtype=np.int64)
+
+    def _grow(self):
+        old = (self.ids, self.state, self.cov, self.size, self.frames,
+               self.missed)
+        self._allocate(2 * len(self.ids))
+        for new, values in zip((self.ids, self.state, self.cov, self.size,
+                                self.frames, self.missed), old):
+            new[:len(values)] = values
+
+    def update(self, detections, dt=None):
+        dt = self.default_dt if dt is None or dt <= 0 else dt
+        active = np.flatnonzero(self.ids >= 0)
+        self._predict(active, dt)
+
+        # Detection skipped for this frame: report predicted boxes
+        if detections is None:
+            visible = active[self.missed[active] == 0]
+            tracks = {int(self.ids[i]): self._track(i, predicted=True)
+                      for i in visible}
+            self.tracked_objects = tracks
+            return tracks
+
+        boxes = np.asarray([det['bbox'] for det in detections],
+                           dtype=np.float64).reshape(-1, 4)
+        centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+        rows, cols = self._associate(active, centers)
+
+        slots = active[rows]
+        self._correct(slots, centers[cols])
+        self.size[slots] = boxes[cols, 2:] - boxes[cols, :2]
+        self.frames[slots] += 1
+        self.stats['recovered'] += int(np.count_nonzero(self.missed[slots]))
+        self.missed[slots] = 0
+        self.stats['matches'] += len(slots)
+
+        # Unmatched tracks coast on their prediction until max_age
+        unmatched = np.setdiff1d(active, slots)
+        self.missed[unmatched] += 1
+        dead = unmatched[self.missed[unmatched] > self.max_age]
+        self.ids[dead] = -1
+        self.stats['lost_tracks'] += len(dead)
+
+        tracks = {}
+        for slot, d in zip(slots, cols):
+            tracks[int(self.ids[slot])] = {
+                'bbox': detections[d]['bbox'],
+                'frames': int(self.frames[slot]),
+                'velocity': self.state[slot, 2:].tolist()
+            }
+
+        # Start tracks for unmatched detections in free slots
+        for d in np.setdiff1d(np.arange(len(detections)), cols):
+            slot = self._new_track(centers[d], boxes[d])
+            tracks[int(self.ids[slot])] = {
+                'bbox': detections[d]['bbox'],
+                'frames': 1,
+                'velocity': [0.0, 0.0]
+            }
+
+        self.tracked_objects = tracks
+        return tracks
+
+    def _predict(self, slots, dt):
+        F = np.eye(4)
+        F[0, 2] = F[1, 3] = dt
+        q = self.accel_std ** 2
+        Q = q * np.array([[dt**4 / 4, 0, dt**3 / 2, 0],
+                          [0, dt**4 / 4, 0, dt**3 / 2],
+                          [dt**3 / 2, 0, dt**2, 0],
+                          [0, dt**3 / 2, 0, dt**2]])
+        self.state[slots] = self.state[slots] @ F.T
+        self.cov[slots] = F @ self.cov[slots] @ F.T + Q
+
+    def _associate(self, active, centers):
+        if not len(active) or not len(centers):
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+
+        # Squared Mahalanobis distance of every detection to every prediction
+        R = np.eye(2) * self.measurement_std ** 2
+        S_inv = np.linalg.inv(self.cov[active][:, :2, :2] + R)
+        diff = centers[None, :, :] - self.state[active, None, :2]
+        d2 = np.einsum('mni,mij,mnj->mn', diff, S_inv, diff)
+
+        valid = d2 <= self.gate
+        cost = np.where(valid, d2, d2.max() + 1e6)
+        rows, cols = linear_sum_assignment(cost)
+        keep = valid[rows, cols]
+        return rows[keep], cols[keep]
+
+    def _correct(self, slots, measurements):
+        if not len(slots):
+            return
+        R = np.eye(2) * self.measurement_std ** 2
+        P = self.cov[slots]
+        K = P[:, :, :2] @ np.linalg.inv(P[:, :2, :2] + R)
+        innovation = measurements - self.state[slots, :2]
+        self.state[slots] += np.einsum('kij,kj->ki', K, innovation)
+        self.cov[slots] = P - K @ P[:, :2, :]
+
+    def _new_track(self, center, box):
+        free = np.flatnonzero(self.ids < 0)
+        if not len(free):
+            self._grow()
+            free = np.flatnonzero(self.ids < 0)
+        slot = free[0]
+        self.ids[slot] = self.next_id
+        self.state[slot] = [center[0], center[1], 0.0, 0.0]
+        self.cov[slot] = np.diag([self.measurement_std ** 2] * 2 +
+                                 [self.velocity_std ** 2] * 2)
+        self.size[slot] = box[2:] - box[:2]
+        self.frames[slot] = 1
+        self.missed[slot] = 0
+        self.next_id += 1
+        self.stats['new_tracks'] += 1
+        return slot
+
+    def _track(self, slot, predicted=False):
+        cx, cy, vx, vy = self.state[slot]
+        w, h = self.size[slot]
+        return {
+            'bbox': [max(int(cx - w / 2), 0), max(int(cy - h / 2), 0),
+                     int(cx + w / 2), int(cy + h / 2)],
+            'frames': int(self.frames[slot]),
+            'velocity': [float(vx), float(vy)],
+            'predicted': predicted
+        }
+
+def iou_matrix(boxes1, boxes2):
+    b1 = np.asarray(boxes1, dtype=np.float64).reshape(-1, 4)
+    b2 = np.asarray(boxes2, dtype=np.float64).reshape(-1, 4)
+    x1 = np.maximum(b1[:, None, 0], b2[None, :, 0])
+    y1 = np.maximum(b1[:, None, 1], b2[None, :, 1])
+    x2 = np.minimum(b1[:, None, 2], b2[None, :, 2])
+    y2 = np.minimum(b1[:, None, 3], b2[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area1 = (b1[:, 2] - b1[:, 0]) * (b1[:, 3] - b1[:, 1])
+    area2 = (b2[:, 2] - b2[:, 0]) * (b2[:, 3] - b2[:, 1])
+    union = area1[:, None] + area2[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+def count_id_switches(ground_truth, predictions, min_iou=0.5):
+    # ground_truth / predictions: per-frame dicts of id -> bbox (or track dict).
+    # Counts CLEAR-MOT style ID switches so trackers can be compared.
+    summary = {'matches': 0, 'id_switches': 0, 'misses': 0,
+               'false_positives': 0}
+    last_match = {}
+    for gt_frame, pred_frame in zip(ground_truth, predictions):
+        gt_ids = list(gt_frame.keys())
+        pred_ids = list(pred_frame.keys())
+        gt_boxes = [_bbox(gt_frame[i]) for i in gt_ids]
+        pred_boxes = [_bbox(pred_frame[i]) for i in pred_ids]
+
+        pairs = []
+        if gt_boxes and pred_boxes:
+            iou = iou_matrix(gt_boxes, pred_boxes)
+            rows, cols = linear_sum_assignment(-iou)
+            pairs = [(r, c) for r, c in zip(rows, cols) if iou[r, c] >= min_iou]
+
+        for r, c in pairs:
+            gt_id, pred_id = gt_ids[r], pred_ids[c]
+            if gt_id in last_match and last_match[gt_id] != pred_id:
+                summary['id_switches'] += 1
+            last_match[gt_id] = pred_id
+        summary['matches'] += len(pairs)
+        summary['misses'] += len(gt_ids) - len(pairs)
+        summary['false_positives'] += len(pred_ids) - len(pairs)
+    return summary
+
+def _bbox(item):
+    return item['bbox'] if isinstance(item, dict) else item
\ No newline at end of file
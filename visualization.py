@@ -1,101 +1,314 @@
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import numpy as np
-
-class Visualizer:
-    def __init__(self):
-        self.fig = None
-        
-    def create_3d_pose(self, keypoints, frame_idx):
-        if not keypoints:
-            return None
-            
-        # Create 3D scatter plot
-        fig = go.Figure()
-        
-        # Add skeleton connections
-        connections = [
-            ('LEFT_HIP', 'LEFT_KNEE'), ('LEFT_KNEE', 'LEFT_ANKLE'),
-            ('RIGHT_HIP', 'RIGHT_KNEE'), ('RIGHT_KNEE', 'RIGHT_ANKLE'),
-            ('LEFT_SHOULDER', 'LEFT_ELBOW'), ('LEFT_ELBOW', 'LEFT_WRIST'),
-            ('RIGHT_SHOULDER', 'RIGHT_ELBOW'), ('RIGHT_ELBOW', 'RIGHT_WRIST'),
-            ('LEFT_SHOULDER', 'RIGHT_SHOULDER'),
-            ('LEFT_HIP', 'RIGHT_HIP'), ('LEFT_SHOULDER', 'LEFT_HIP'),
-            ('RIGHT_SHOULDER', 'RIGHT_HIP')
-        ]
-        
-        for start, end in connections:
-            fig.add_trace(go.Scatter3d(
-                x=[keypoints[start]['x'], keypoints[end]['x']],
-                y=[keypoints[start]['y'], keypoints[end]['y']],
-                z=[keypoints[start]['z'], keypoints[end]['z']],
-                mode='lines',
-                line=dict(width=4, color='blue')
-            ))
-        
-        # Add keypoints
-        x = [kp['x'] for kp in keypoints.values()]
-        y = [kp['y'] for kp in keypoints.values()]
-        z = [kp['z'] for kp in keypoints.values()]
-        
-        fig.add_trace(go.Scatter3d(
-            x=x, y=y, z=z,
-            mode='markers',
-            marker=dict(size=5, color='red')
-        ))
-        
-        fig.update_layout(
-            title=f'Player Pose - Frame {frame_idx}',
-            scene=dict(
-                xaxis=dict(title='X', range=[-1, 1]),
-                yaxis=dict(title='Y', range=[-1, 1]),
-                zaxis=dict(title='Z', range=[-1, 1]),
-                aspectmode='cube'
-            ),
-            showlegend=False
-        )
-        
-        return fig
-    
-    def create_tactical_view(self, players, ball, frame_idx):
-        fig = go.Figure()
-        
-        # Draw pitch outline
-        fig.add_shape(type="rect",
-            x0=0, y0=0, x1=105, y1=68,
-            line=dict(color="Green"),
-            fillcolor="LightGreen"
-        )
-        
-        # Add players
-        for i, player in enumerate(players):
-            x = (player['bbox'][0] + player['bbox'][2]) / 2
-            y = (player['bbox'][1] + player['bbox'][3]) / 2
-            
-            fig.add_trace(go.Scatter(
-                x=[x], y=[y],
-                mode='markers',
-                marker=dict(size=10, color='blue'),
-                text=f"Player {i}",
-                hoverinfo='text'
-            ))
-        
-        # Add ball
-        x_ball = (ball['bbox'][0] + ball['bbox'][2]) / 2
-        y_ball = (ball['bbox'][1] + ball['bbox'][3]) / 2
-        fig.add_trace(go.Scatter(
-            x=[x_ball], y=[y_ball],
-            mode='markers',
-            marker=dict(size=8, color='white'),
-            text="Ball",
-            hoverinfo='text'
-        ))
-        
-        fig.update_layout(
-            title=f'Tactical View - Frame {frame_idx}',
-            xaxis=dict(range=[0, 105], scaleanchor="y", scaleratio=1),
-            yaxis=dict(range=[0, 68]),
-            showlegend=False
-        )
-        
-        return fig
\ No newline at end of file
+import os
+import queue
+import threading
+
+import cv2
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+import numpy as np
+from keypoints import LANDMARK_INDEX, as_array
+
+# Marker colour per team label (-1: referees)
+TEAM_COLORS = {0: 'blue', 1: 'red', -1: 'black'}
+
+# Skeleton connections as landmark index pairs
+POSE_CONNECTIONS = [
+    ('LEFT_HIP', 'LEFT_KNEE'), ('LEFT_KNEE', 'LEFT_ANKLE'),
+    ('RIGHT_HIP', 'RIGHT_KNEE'), ('RIGHT_KNEE', 'RIGHT_ANKLE'),
+    ('LEFT_SHOULDER', 'LEFT_ELBOW'), ('LEFT_ELBOW', 'LEFT_WRIST'),
+    ('RIGHT_SHOULDER', 'RIGHT_ELBOW'), ('RIGHT_ELBOW', 'RIGHT_WRIST'),
+    ('LEFT_SHOULDER', 'RIGHT_SHOULDER'),
+    ('LEFT_HIP', 'RIGHT_HIP'), ('LEFT_SHOULDER', 'LEFT_HIP'),
+    ('RIGHT_SHOULDER', 'RIGHT_HIP')
+]
+BONES = np.array([(LANDMARK_INDEX[a], LANDMARK_INDEX[b])
+                  for a, b in POSE_CONNECTIONS])
+
+class Visualizer:
+    def __init__(self):
+        self.fig = None
+        
+    def create_3d_pose(self, keypoints, frame_idx):
+        if keypoints is None or len(keypoints) == 0:
+            return None
+        kp = as_array(keypoints)
+            
+        # Create 3D scatter plot
+        fig = go.Figure()
+        
+        # All bones in one trace, segments separated by None
+        bones = np.full((len(BONES) * 3, 3), np.nan)
+        bones[0::3] = kp[BONES[:, 0], :3]
+        bones[1::3] = kp[BONES[:, 1], :3]
+        x, y, z = (np.where(np.isnan(c), None, c).tolist() for c in bones.T)
+        fig.add_trace(go.Scatter3d(
+            x=x, y=y, z=z,
+            mode='lines',
+            line=dict(width=4, color='blue'),
+            connectgaps=False
+        ))
+        
+        # Add keypoints
+        fig.add_trace(go.Scatter3d(
+            x=kp[:, 0], y=kp[:, 1], z=kp[:, 2],
+            mode='markers',
+            marker=dict(size=5, color='red')
+        ))
+        
+        fig.update_layout(
+            title=f'Player Pose - Frame {frame_idx}',
+            scene=dict(
+                xaxis=dict(title='X', range=[-1, 1]),
+                yaxis=dict(title='Y', range=[-1, 1]),
+                zaxis=dict(title='Z', range=[-1, 1]),
+                aspectmode='cube'
+            ),
+            showlegend=False
+        )
+        
+        return fig
+    
+    def create_tactical_view(self, players, ball, frame_idx):
+        fig = go.Figure()
+        
+        # Draw pitch outline
+        fig.add_shape(type="rect",
+            x0=0, y0=0, x1=105, y1=68,
+            line=dict(color="Green"),
+            fillcolor="LightGreen"
+        )
+        
+        # Players and ball, one trace each
+        fig.add_traces(self._tactical_traces(players, ball))
+        
+        fig.update_layout(
+            title=f'Tactical View - Frame {frame_idx}',
+            xaxis=dict(range=[0, 105], scaleanchor="y", scaleratio=1),
+            yaxis=dict(range=[0, 68]),
+            showlegend=False
+        )
+        
+        return fig
+    
+    def create_match_view(self, snapshots, title='Match'):
+        # One animated figure for the whole match instead of a file per
+        # frame; snapshots are (frame_idx, players, ball)
+        fig = self.create_tactical_view([], {'bbox': [0, 0, 0, 0]}, 0)
+        if not snapshots:
+            return fig
+        fig.data = []
+        fig.add_traces(self._tactical_traces(snapshots[0][1], snapshots[0][2]))
+        fig.frames = [go.Frame(data=self._tactical_traces(players, ball),
+                               name=str(frame_idx))
+                      for frame_idx, players, ball in snapshots]
+        fig.update_layout(
+            title=title,
+            updatemenus=[dict(type='buttons', showactive=False, buttons=[
+                dict(label='Play', method='animate',
+                     args=[None, dict(frame=dict(duration=100, redraw=False),
+                                      fromcurrent=True)])])],
+            sliders=[dict(currentvalue=dict(prefix='Frame '), steps=[
+                dict(label=str(frame_idx), method='animate',
+                     args=[[str(frame_idx)], dict(mode='immediate',
+                                                  frame=dict(redraw=False))])
+                for frame_idx, _, _ in snapshots])]
+        )
+        return fig
+    
+    def _tactical_traces(self, players, ball):
+        points = np.array([self._pitch_point(p) for p in players],
+                          dtype=float).reshape(-1, 2)
+        x_ball, y_ball = self._pitch_point(ball)
+        return [
+            go.Scatter(
+                x=points[:, 0], y=points[:, 1],
+                mode='markers',
+                marker=dict(size=10, color=[
+                    TEAM_COLORS.get(p.get('team'), 'blue') for p in players]),
+                text=[f"Player {p.get('track_id', i)}"
+                      for i, p in enumerate(players)],
+                hoverinfo='text'
+            ),
+            go.Scatter(
+                x=[x_ball], y=[y_ball],
+                mode='markers',
+                marker=dict(size=8, color='white'),
+                text="Ball",
+                hoverinfo='text'
+            )
+        ]
+    
+    @staticmethod
+    def annotate_frame(frame, players, ball):
+        annotated = frame.copy()
+        for player in players:
+            x1, y1, x2, y2 = map(int, player['bbox'])
+            cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(annotated, str(player['track_id']), (x1, y1-10),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+        
+        if ball['confidence'] > 0.5:
+            x1, y1, x2, y2 = map(int, ball['bbox'])
+            cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 0, 255), 2)
+            cv2.putText(annotated, "Ball", (x1, y1-10),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2)
+        return annotated
+    
+    @staticmethod
+    def _pitch_point(item):
+        # Calibrated pitch position, or the raw bbox centre when uncalibrated
+        if item.get('pitch') is not None:
+            return item['pitch']
+        return ((item['bbox'][0] + item['bbox'][2]) / 2,
+                (item['bbox'][1] + item['bbox'][3]) / 2)
+
+
+class VisualizationExporter:
+    # Renders and writes visualizations on a background thread so analysis
+    # never waits on Plotly or disk. Periodic snapshots are dropped when the
+    # queue is full, which rate-limits exports to what the worker keeps up
+    # with (counted as 'export_dropped' by the profiler). Jobs with event
+    # pose renders (submit_poses(), or submit() with pose_tracks) are key
+    # moments: they wait for room instead.
+    #   mode 'files': pose/tactical HTML and a JPEG per exported frame, all
+    #                 HTML sharing one plotly.min.js in the output directory
+    #   mode 'match': one animated tactical HTML and one annotated MP4 per
+    #                 match, written when the match is closed
+    #   mode 'off':   nothing
+    # 3D pose HTML is written for the players in pose_tracks (all players in
+    # 'files' mode when None) and for submit_poses(), e.g. on detected events.
+    def __init__(self, visualizer, output_dir='output/visualizations',
+                 mode='files', queue_size=8, video_fps=10, profiler=None):
+        self.visualizer = visualizer
+        self.profiler = profiler
+        self.output_dir = output_dir
+        self.mode = mode
+        self.queue_size = queue_size
+        self.video_fps = video_fps
+        self.stats = {'exported': 0, 'dropped': 0}
+        self._queue = None
+        self._thread = None
+        self._error = None
+
+    def start(self, name='match'):
+        if self.mode == 'off' or self._thread is not None:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.name = name
+        self._snapshots = []
+        self._video = None
+        self._error = None
+        self._queue = queue.Queue(self.queue_size)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, frame_idx, frame, players, ball, pose_tracks=None):
+        self._put(('frame', (frame_idx, frame, players, ball, pose_tracks)),
+                  keep=bool(pose_tracks))
+
+    def submit_poses(self, frame_idx, players, track_ids):
+        # 3D pose renders only, without a tactical view or frame
+        self._put(('poses', (frame_idx, players, track_ids)), keep=True)
+
+    def _put(self, job, keep=False):
+        if self.mode == 'off':
+            return
+        if self._thread is None:
+            self.start()
+        if self._error is not None:
+            raise RuntimeError("Visualization export failed") from self._error
+        if keep:
+            # The worker drains the queue even after an error, so this
+            # never waits forever
+            self._queue.put(job)
+            return
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self.stats['dropped'] += 1
+            if self.profiler is not None:
+                self.profiler.count('export_dropped')
+
+    def close(self):
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        if self._error is not None:
+            raise RuntimeError("Visualization export failed") from self._error
+
+    def _run(self):
+        try:
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    break
+                kind, args = job
+                if kind == 'poses':
+                    export = self._write_poses
+                else:
+                    export = self._add_to_match if self.mode == 'match' \
+                        else self._write_files
+                if self.profiler is not None:
+                    self.profiler.call('export', export, *args)
+                else:
+                    export(*args)
+                self.stats['exported'] += 1
+            if self.mode == 'match':
+                self._finish_match()
+        except Exception as error:  # Reported to the analysis thread
+            self._error = error
+            # Keep draining so submit()/close() never wait on a dead worker
+            while self._queue.get() is not None:
+                pass
+
+    def _write_poses(self, frame_idx, players, track_ids=None):
+        # Generate 3D pose visualization for each selected player
+        for player in players:
+            if player['pose'] and (track_ids is None or player['track_id'] in track_ids):
+                fig = self.visualizer.create_3d_pose(
+                    player['pose']['keypoints'], frame_idx)
+                fig.write_html(self._path(f"pose_{frame_idx}_{player['track_id']}.html"),
+                               include_plotlyjs='directory')
+
+    def _write_files(self, frame_idx, frame, players, ball, pose_tracks=None):
+        self._write_poses(frame_idx, players, pose_tracks)
+        
+        # Generate tactical view
+        fig = self.visualizer.create_tactical_view(players, ball, frame_idx)
+        fig.write_html(self._path(f"tactical_{frame_idx}.html"),
+                       include_plotlyjs='directory')
+        
+        # Save annotated frame (replays from the cache have no frame)
+        if frame is not None:
+            cv2.imwrite(self._path(f"frame_{frame_idx}.jpg"),
+                        self.visualizer.annotate_frame(frame, players, ball))
+
+    def _add_to_match(self, frame_idx, frame, players, ball, pose_tracks=None):
+        if pose_tracks:
+            self._write_poses(frame_idx, players, pose_tracks)
+        if frame is not None:
+            annotated = self.visualizer.annotate_frame(frame, players, ball)
+            if self._video is None:
+                height, width = annotated.shape[:2]
+                self._video = cv2.VideoWriter(
+                    self._path(f"{self.name}_frames.mp4"),
+                    cv2.VideoWriter_fourcc(*'mp4v'), self.video_fps,
+                    (width, height))
+            self._video.write(annotated)
+        # Only positions are kept for the animation, not frames or poses
+        self._snapshots.append((frame_idx, [
+            {key: p.get(key) for key in ('track_id', 'team', 'bbox', 'pitch')}
+            for p in players], dict(ball)))
+
+    def _finish_match(self):
+        if self._video is not None:
+            self._video.release()
+        fig = self.visualizer.create_match_view(
+            self._snapshots, title=f'Tactical View - {self.name}')
+        fig.write_html(self._path(f"{self.name}_tactical.html"),
+                       include_plotlyjs='directory')
+
+    def _path(self, filename):
+        return os.path.join(self.output_dir, filename)
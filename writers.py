@@ -0,0 +1,232 @@
+import glob
+import json
+import os
+
+import numpy as np
+
+from keypoints import KeypointView, as_array
+
+def to_serializable(obj):
+    if isinstance(obj, KeypointView):
+        return obj.to_dict()
+    if isinstance(obj, (np.integer, np.int32, np.int64, np.uint16)):
+        return int(obj)
+    if isinstance(obj, (np.floating, np.float32, np.float64)):
+        return float(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return obj
+
+def make_writer(path, fmt='json', flush_every=100, append=False):
+    if fmt == 'jsonl':
+        return JsonLinesWriter(path, flush_every, append)
+    if fmt == 'parquet':
+        return ParquetWriter(path, flush_every, append)
+    if fmt == 'json':
+        if append:
+            raise ValueError("Resuming needs the jsonl or parquet format")
+        return JsonArrayWriter(path, flush_every)
+    raise ValueError(f"Unknown results format: {fmt}")
+
+def _max_track_id(result):
+    return max((p['track_id'] for p in result.get('players', [])), default=-1)
+
+
+class JsonArrayWriter:
+    # Streams the legacy single-array results.json one frame at a time
+    def __init__(self, path, flush_every=100):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.file = open(path, 'w')
+        self.file.write('[')
+        self.flush_every = flush_every
+        self.count = 0
+
+    def write(self, result):
+        if self.count:
+            self.file.write(', ')
+        json.dump(result, self.file, default=to_serializable)
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self.file.flush()
+
+    def resume_state(self):
+        return None, -1
+
+    def close(self):
+        if not self.file.closed:
+            self.file.write(']')
+            self.file.close()
+
+
+class JsonLinesWriter:
+    # One JSON object per frame, flushed to disk every flush_every frames
+    def __init__(self, path, flush_every=100, append=False):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.flush_every = flush_every
+        self.buffer = []
+        if append:
+            self._drop_partial_line()
+        self.file = open(path, 'a' if append else 'w')
+
+    def write(self, result):
+        self.buffer.append(json.dumps(result, default=to_serializable))
+        if len(self.buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.file.write('\n'.join(self.buffer) + '\n')
+            self.buffer = []
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def resume_state(self):
+        # (last written frame, highest track id) from what is on disk
+        self.flush()
+        last_frame, last_track = None, -1
+        with open(self.path) as f:
+            for line in f:
+                result = json.loads(line)
+                last_frame = result['frame']
+                last_track = max(last_track, _max_track_id(result))
+        return last_frame, last_track
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def _drop_partial_line(self):
+        # A crash can leave a half-written last line; cut back to the last '\n'
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            f.truncate(data.rfind(b'\n') + 1)
+
+
+class ParquetWriter:
+    # Columnar output as a directory of part files: frames/ holds one row per
+    # frame and players/ one row per player per frame. Each flush writes one
+    # part, so a crash loses at most flush_every frames.
+    def __init__(self, path, flush_every=100, append=False):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("The parquet results format requires pyarrow")
+        self.pa, self.pq = pa, pq
+        # Explicit schemas keep part files consistent when a part has only nulls
+        bbox = [(name, pa.int64()) for name in ('x1', 'y1', 'x2', 'y2')]
+        self.schemas = {
+            'frames': pa.schema(
+                [('frame', pa.int64()), ('time', pa.float64()),
+                 ('player_count', pa.int64())] +
+                [('ball_' + name, kind) for name, kind in bbox] +
+                [('ball_confidence', pa.float64()), ('ball_pitch_x', pa.float64()),
+                 ('ball_pitch_y', pa.float64()), ('tactical', pa.string()),
+                 ('events', pa.string())]),
+            'players': pa.schema(
+                [('frame', pa.int64()), ('time', pa.float64()),
+                 ('track_id', pa.int64()), ('team', pa.int64())] + bbox +
+                [('pitch_x', pa.float64()), ('pitch_y', pa.float64()),
+                 ('speed', pa.float64()), ('body_lean', pa.float64()), ('hip_torque', pa.float64()),
+                 ('keypoints', pa.list_(pa.float32()))]),
+        }
+        self.path = path
+        self.flush_every = flush_every
+        self.frames = []
+        self.players = []
+        self.pending = 0
+
+        for table in ('frames', 'players'):
+            os.makedirs(os.path.join(path, table), exist_ok=True)
+            if not append:
+                for part in self._parts(table):
+                    os.remove(part)
+        self.part = len(self._parts('frames'))
+
+    def write(self, result):
+        ball = result['ball']
+        bx1, by1, bx2, by2 = (int(v) for v in ball['bbox'])
+        ball_pitch = ball.get('pitch') or (None, None)
+        self.frames.append({
+            'frame': int(result['frame']),
+            'time': float(result['time']),
+            'player_count': len(result['players']),
+            'ball_x1': bx1, 'ball_y1': by1, 'ball_x2': bx2, 'ball_y2': by2,
+            'ball_confidence': float(ball['confidence']),
+            'ball_pitch_x': self._optional_float(ball_pitch[0]),
+            'ball_pitch_y': self._optional_float(ball_pitch[1]),
+            'tactical': json.dumps(result['tactical'], default=to_serializable),
+            'events': json.dumps(result.get('events', []), default=to_serializable)
+        })
+        for player in result['players']:
+            pose = player['pose'] or {}
+            analysis = pose.get('analysis', {})
+            keypoints = pose.get('keypoints')
+            x1, y1, x2, y2 = (int(v) for v in player['bbox'])
+            pitch = player.get('pitch') or (None, None)
+            self.players.append({
+                'frame': int(result['frame']),
+                'time': float(result['time']),
+                'track_id': int(player['track_id']),
+                'team': player.get('team'),
+                'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2,
+                'pitch_x': self._optional_float(pitch[0]),
+                'pitch_y': self._optional_float(pitch[1]),
+                'speed': self._optional_float(player.get('speed')),
+                'body_lean': self._optional_float(analysis.get('body_lean')),
+                'hip_torque': self._optional_float(analysis.get('hip_torque')),
+                'keypoints': self._flatten(keypoints)
+            })
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        name = f"part-{self.part:05d}.parquet"
+        # Frames are written last and renamed into place: resume reads the
+        # frames table, so a part only counts once both tables are complete
+        for table, rows in (('players', self.players), ('frames', self.frames)):
+            if rows:
+                target = os.path.join(self.path, table, name)
+                self.pq.write_table(
+                    self.pa.Table.from_pylist(rows, schema=self.schemas[table]),
+                    target + '.tmp')
+                os.replace(target + '.tmp', target)
+        self.part += 1
+        self.frames, self.players, self.pending = [], [], 0
+
+    def resume_state(self):
+        self.flush()
+        last_frame, last_track = None, -1
+        for part in self._parts('frames'):
+            frames = self.pq.read_table(part, columns=['frame']).column('frame')
+            if len(frames):
+                last_frame = max(last_frame or 0, max(frames.to_pylist()))
+        for part in self._parts('players'):
+            tracks = self.pq.read_table(part, columns=['track_id']).column('track_id')
+            if len(tracks):
+                last_track = max(last_track, max(tracks.to_pylist()))
+        return last_frame, last_track
+
+    def close(self):
+        self.flush()
+
+    def _parts(self, table):
+        return sorted(glob.glob(os.path.join(self.path, table, 'part-*.parquet')))
+
+    @staticmethod
+    def _optional_float(value):
+        return None if value is None else float(value)
+
+    @staticmethod
+    def _flatten(keypoints):
+        # 33 landmarks x (x, y, z, visibility) in landmark order
+        if keypoints is None:
+            return None
+        return as_array(keypoints).ravel().tolist()
\ No newline at end of file